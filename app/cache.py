@@ -0,0 +1,80 @@
+"""ETags y caché LRU de respuestas de lectura ya serializadas.
+
+Cada lectura se identifica por su ETag, que combina el ámbito (lista o
+conjunto de listas), su versión en el almacén y los parámetros de la
+consulta. Como las versiones nunca se repiten, una entrada de la caché no
+queda obsoleta: cuando los datos cambian cambia la clave y la entrada
+antigua termina saliendo por LRU.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+
+from fastapi import Request, Response, status
+
+from app import config
+
+
+class ResponseCache:
+    """Caché LRU acotada de ``ETag -> (cuerpo, cabeceras)``."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: str, entry):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+response_cache = ResponseCache(config.RESPONSE_CACHE_SIZE)
+
+
+def make_etag(scope: str, version: int, request: Request) -> str:
+    query = "&".join(sorted(f"{key}={value}" for key, value in request.query_params.multi_items()))
+    digest = hashlib.blake2s(query.encode(), digest_size=12).hexdigest()
+    return f'"{scope}-{version}-{digest}"'
+
+
+def matches_if_none_match(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    tags = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return "*" in tags or etag in tags
+
+
+async def cached_response(request: Request, etag: str, build) -> Response:
+    """Responde 304 si el cliente ya tiene ``etag``; si no, sirve el cuerpo de la caché.
+
+    ``build`` es una corrutina que devuelve ``(cuerpo, cabeceras)`` y solo se
+    ejecuta cuando la respuesta no está en caché.
+    """
+    if matches_if_none_match(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    entry = response_cache.get(etag)
+    if entry is None:
+        entry = await build()
+        response_cache.put(etag, entry)
+    body, headers = entry
+    return Response(body, media_type="application/json", headers={**headers, "ETag": etag})
@@ -0,0 +1,129 @@
+"""Registro de cambios para que los clientes reciban deltas en lugar de releer listas.
+
+Cada escritura de ``app.services`` publica un evento con un número de
+secuencia creciente (``seq``). Los últimos ``TODOLIST_CHANGE_FEED_SIZE``
+eventos se guardan en un búfer circular: un cliente puede pedir los cambios
+posteriores a la última secuencia que vio y, si ya se descartaron, recibe un
+410 y debe volver a descargar los datos.
+
+La secuencia vuelve a 0 al reiniciar el servidor y cada worker tiene la
+suya, así que un número de secuencia solo tiene sentido en el proceso que lo
+dio. Por eso las respuestas incluyen la ``epoch`` del proceso (un valor
+aleatorio fijado al arrancar): el cliente la devuelve junto a ``since`` y, si
+no coincide, recibe un 410 en lugar de cambios ajenos a su copia. Sin
+``epoch`` solo se detecta una secuencia posterior a la actual.
+
+Tipos de evento: ``list_created``, ``list_updated``, ``list_deleted`` (la
+lista con sus contadores; sus ítems no generan eventos ``item_deleted`` y el
+cliente los descarta), ``item_created``, ``item_updated``, ``item_deleted``,
+``import`` (lote importado) y ``reset`` (almacén vaciado).
+
+Los eventos viven en la memoria de cada proceso: con varios workers cada uno
+solo ve los cambios que atendió él.
+"""
+import asyncio
+import itertools
+import secrets
+import threading
+from collections import deque
+
+from fastapi import HTTPException, status
+
+from app import config
+
+
+class ChangeFeed:
+    """Búfer circular de eventos con espera asíncrona de eventos nuevos.
+
+    ``publish`` se puede llamar desde cualquier hilo; despierta a los
+    clientes que esperan en ``wait`` en su bucle de eventos.
+    """
+
+    def __init__(self, size: int):
+        self._lock = threading.Lock()
+        self._events = deque(maxlen=size)
+        self._seq = 0
+        self._waiters = set()
+        # Identifica este proceso: una secuencia de otra epoch no es comparable
+        self.epoch = secrets.token_hex(6)
+
+    @property
+    def seq(self) -> int:
+        """Secuencia del último evento publicado (0 si no hay ninguno)."""
+        return self._seq
+
+    def publish(self, event_type: str, list_id: int = None, **data) -> dict:
+        with self._lock:
+            self._seq += 1
+            event = {"seq": self._seq, "type": event_type, "list_id": list_id, **data}
+            self._events.append(event)
+            waiters = list(self._waiters)
+        for loop, flag in waiters:
+            try:
+                loop.call_soon_threadsafe(flag.set)
+            except RuntimeError:
+                # El bucle del cliente ya se cerró
+                with self._lock:
+                    self._waiters.discard((loop, flag))
+        return event
+
+    def since(self, seq: int, list_id: int = None, limit: int = None, epoch: str = None) -> tuple[list[dict], int]:
+        """Devuelve ``(eventos posteriores a seq, última secuencia revisada)``.
+
+        Con ``list_id`` solo devuelve los eventos de esa lista (y los
+        ``import`` y ``reset``, que afectan a todas). La secuencia revisada
+        permite continuar aunque el filtro haya descartado eventos. Con
+        ``epoch`` distinta de la de este proceso responde 410.
+        """
+        if epoch is not None and epoch != self.epoch:
+            raise HTTPException(
+                status_code=status.HTTP_410_GONE,
+                detail=f"La secuencia {seq} es de otro proceso del servidor (reiniciado u otro worker); "
+                       "vuelve a descargar los datos"
+            )
+        with self._lock:
+            oldest = self._events[0]["seq"] if self._events else self._seq + 1
+            if seq < oldest - 1:
+                raise HTTPException(
+                    status_code=status.HTTP_410_GONE,
+                    detail=f"Los cambios posteriores a {seq} ya no están disponibles; vuelve a descargar los datos"
+                )
+            if seq > self._seq:
+                raise HTTPException(
+                    status_code=status.HTTP_410_GONE,
+                    detail=f"La secuencia {seq} es posterior a la actual ({self._seq}): el servidor se reinició; "
+                           "vuelve a descargar los datos"
+                )
+            pending = list(itertools.islice(self._events, max(0, seq - oldest + 1), None))
+            last = self._seq
+        events = []
+        for event in pending:
+            if list_id is None or event["list_id"] in (list_id, None):
+                events.append(event)
+                if limit is not None and len(events) >= limit:
+                    return events, event["seq"]
+        return events, last
+
+    async def wait(self, seq: int, timeout: float) -> bool:
+        """Espera hasta ``timeout`` segundos a que haya eventos posteriores a ``seq``.
+
+        Con una ``seq`` posterior a la actual no espera: ``since`` responde 410.
+        """
+        flag = asyncio.Event()
+        waiter = (asyncio.get_running_loop(), flag)
+        with self._lock:
+            if self._seq != seq:
+                return True
+            self._waiters.add(waiter)
+        try:
+            await asyncio.wait_for(flag.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            with self._lock:
+                self._waiters.discard(waiter)
+
+
+# Registro compartido por los servicios y la ruta /changes
+feed = ChangeFeed(config.CHANGE_FEED_SIZE)
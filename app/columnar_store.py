@@ -0,0 +1,414 @@
+"""Almacén en memoria con los ítems guardados en columnas compactas.
+
+Cada ítem del ``InMemoryStore`` es un diccionario con cuatro claves, más sus
+objetos ``int`` y ``str`` y las entradas de los índices: varios cientos de
+bytes por ítem. Aquí cada ítem ocupa un hueco (``slot``) en unas pocas
+columnas contiguas:
+
+- ``_id_column`` y ``_list_id_column``: ``array("q")`` de enteros de 64 bits.
+- ``_completed``: mapa de bits (un bit por hueco).
+- ``_text``: las descripciones codificadas en UTF-8, una detrás de otra en un
+  único ``bytearray``; ``_offsets`` y ``_lengths`` indican dónde empieza y
+  cuánto mide cada una.
+
+Los índices también son arrays: ``_slots_by_id`` y ``_slots_by_description``
+son tablas hash de direccionamiento abierto que guardan solo el número de
+hueco, y ``_item_order`` guarda los IDs de cada lista en un ``array`` ordenado
+para paginar con ``bisect`` (con sus huecos en ``_item_slots``, en el mismo
+orden). Los diccionarios de los ítems se crean al leerlos.
+"""
+import hashlib
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+
+from app.search import SearchIndex
+from app.store import InMemoryStore, description_key, matches_description
+
+_EMPTY = -1
+_DELETED = -2
+_MASK64 = (1 << 64) - 1
+# Longitud que marca un hueco libre
+_FREE = 0xFFFFFFFF
+# Bytes de descripciones obsoletas a partir de los que se compacta ``_text``
+_COMPACT_MIN_GARBAGE = 1 << 20
+
+
+def _insert_sorted(order: array, slots: array, item_id: int, slot: int):
+    # Los IDs nuevos casi siempre son los mayores: append en O(1)
+    if not order or item_id > order[-1]:
+        order.append(item_id)
+        slots.append(slot)
+    else:
+        index = bisect_left(order, item_id)
+        order.insert(index, item_id)
+        slots.insert(index, slot)
+
+
+def _remove_sorted(order: array, slots: array, item_id: int):
+    index = bisect_left(order, item_id)
+    if index < len(order) and order[index] == item_id:
+        del order[index]
+        del slots[index]
+
+
+def _description_hash_of(list_id: int, description: str) -> int:
+    """Hash de ``(list_id, description_key(description))`` igual en todos los procesos.
+
+    ``hash`` de un ``str`` cambia en cada proceso (``PYTHONHASHSEED``), y las
+    posiciones de ``_slots_by_description`` se guardan en la instantánea del WAL.
+    """
+    key = f"{list_id}:{description_key(description)}".encode()
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "little")
+
+
+class SlotTable:
+    """Tabla hash de direccionamiento abierto que guarda números de hueco.
+
+    No guarda las claves: ``hash_of(slot)`` recalcula el hash de la clave de
+    un hueco al crecer, y cada búsqueda recibe ``matches(slot)`` para
+    comparar. Cada entrada ocupa 8 bytes, con una ocupación máxima de 2/3.
+    El llamador debe serializar las escrituras.
+    """
+
+    def __init__(self, hash_of):
+        self._hash_of = hash_of
+        self._table = array("q", [_EMPTY]) * 8
+        self._size = 0
+        # Entradas ocupadas más las marcadas como borradas
+        self._used = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def find(self, key_hash: int, matches) -> int:
+        """Devuelve el hueco cuya clave cumple ``matches``, o -1."""
+        table = self._table
+        mask = len(table) - 1
+        perturb = key_hash & _MASK64
+        index = perturb & mask
+        while True:
+            slot = table[index]
+            if slot == _EMPTY:
+                return -1
+            if slot >= 0 and matches(slot):
+                return slot
+            perturb >>= 5
+            index = (5 * index + 1 + perturb) & mask
+
+    def find_value(self, key_hash: int, column: array, value) -> int:
+        """Como ``find``, para claves guardadas tal cual en ``column``."""
+        table = self._table
+        mask = len(table) - 1
+        perturb = key_hash & _MASK64
+        index = perturb & mask
+        while True:
+            slot = table[index]
+            if slot == _EMPTY:
+                return -1
+            if slot >= 0 and column[slot] == value:
+                return slot
+            perturb >>= 5
+            index = (5 * index + 1 + perturb) & mask
+
+    def add(self, key_hash: int, slot: int):
+        """Añade un hueco; la clave no debe estar ya en la tabla."""
+        if (self._used + 1) * 3 > len(self._table) * 2:
+            self._resize()
+        table = self._table
+        mask = len(table) - 1
+        perturb = key_hash & _MASK64
+        index = perturb & mask
+        while table[index] >= 0:
+            perturb >>= 5
+            index = (5 * index + 1 + perturb) & mask
+        if table[index] == _EMPTY:
+            self._used += 1
+        table[index] = slot
+        self._size += 1
+
+    def remove(self, key_hash: int, slot: int):
+        table = self._table
+        mask = len(table) - 1
+        perturb = key_hash & _MASK64
+        index = perturb & mask
+        while table[index] != _EMPTY:
+            if table[index] == slot:
+                table[index] = _DELETED
+                self._size -= 1
+                return
+            perturb >>= 5
+            index = (5 * index + 1 + perturb) & mask
+
+    def _resize(self):
+        capacity = 8
+        while capacity * 2 < self._size * 3 + 3:
+            capacity *= 2
+        capacity *= 2
+        slots = [slot for slot in self._table if slot >= 0]
+        self._table = array("q", [_EMPTY]) * capacity
+        self._size = self._used = 0
+        for slot in slots:
+            self.add(self._hash_of(slot), slot)
+
+
+class ColumnarStore(InMemoryStore):
+    """``InMemoryStore`` con los ítems en columnas: misma interfaz, mucha menos memoria.
+
+    Las listas se guardan igual que en ``InMemoryStore``. Los ítems que
+    devuelve son copias creadas al leer: modificarlas no cambia el almacén.
+
+    Las columnas son compartidas por todas las listas, así que además del
+    candado de la lista cada escritura toma ``_columns_lock``, y las lecturas
+    lo toman mientras copian los ítems.
+    """
+
+    def _reset_items(self):
+        self._columns_lock = threading.RLock()
+        self._id_column = array("q")
+        self._list_id_column = array("q")
+        self._completed = bytearray()
+        self._text = bytearray()
+        self._offsets = array("Q")
+        self._lengths = array("I")
+        self._free_slots = array("q")
+        # Bytes de ``_text`` que ya no usa ningún ítem
+        self._garbage = 0
+        self._slots_by_id = SlotTable(self._id_hash)
+        self._slots_by_description = SlotTable(self._description_hash)
+        self._item_order = {}
+        self._item_slots = {}
+        self._search = SearchIndex()
+
+    def _add_list_indexes(self, list_id: int):
+        self._item_order.setdefault(list_id, array("q"))
+        self._item_slots.setdefault(list_id, array("q"))
+
+    def __getstate__(self):
+        state = super().__getstate__()
+        del state["_columns_lock"]
+        return state
+
+    def __setstate__(self, state):
+        super().__setstate__(state)
+        self._columns_lock = threading.RLock()
+
+    # Columnas
+
+    def _description(self, slot: int) -> str:
+        offset = self._offsets[slot]
+        return self._text[offset:offset + self._lengths[slot]].decode()
+
+    def _is_completed(self, slot: int) -> bool:
+        return bool(self._completed[slot >> 3] >> (slot & 7) & 1)
+
+    def _set_completed(self, slot: int, completed: bool):
+        if completed:
+            self._completed[slot >> 3] |= 1 << (slot & 7)
+        else:
+            self._completed[slot >> 3] &= ~(1 << (slot & 7)) & 0xFF
+
+    def _set_description(self, slot: int, description: str):
+        encoded = description.encode()
+        self._offsets[slot] = len(self._text)
+        self._lengths[slot] = len(encoded)
+        self._text += encoded
+
+    def _release_description(self, length: int):
+        """Cuenta como basura una descripción que ya no se usa y compacta si hace falta."""
+        self._garbage += length
+        if self._garbage > _COMPACT_MIN_GARBAGE and self._garbage * 2 > len(self._text):
+            self._compact_text()
+
+    def _compact_text(self):
+        """Reescribe ``_text`` sin las descripciones obsoletas."""
+        text = bytearray()
+        offsets = array("Q", bytes(8 * len(self._offsets)))
+        for slot, length in enumerate(self._lengths):
+            if length != _FREE:
+                offsets[slot] = len(text)
+                text += self._text[self._offsets[slot]:self._offsets[slot] + length]
+        self._text, self._offsets, self._garbage = text, offsets, 0
+
+    def _row(self, slot: int) -> dict:
+        return {
+            "id": self._id_column[slot],
+            "list_id": self._list_id_column[slot],
+            "description": self._description(slot),
+            "completed": self._is_completed(slot),
+        }
+
+    def _id_hash(self, slot: int) -> int:
+        return hash(self._id_column[slot])
+
+    def _description_hash(self, slot: int) -> int:
+        return _description_hash_of(self._list_id_column[slot], self._description(slot))
+
+    def _slot_of(self, item_id: int) -> int:
+        return self._slots_by_id.find_value(hash(item_id), self._id_column, item_id)
+
+    def _slot_of_description(self, list_id: int, description: str) -> int:
+        key = description_key(description)
+        list_ids = self._list_id_column
+        return self._slots_by_description.find(
+            _description_hash_of(list_id, description),
+            lambda slot: list_ids[slot] == list_id and description_key(self._description(slot)) == key)
+
+    def _slot_in_list(self, list_id: int, item_id: int) -> int:
+        slot = self._slot_of(item_id)
+        if slot < 0 or self._list_id_column[slot] != list_id:
+            return -1
+        return slot
+
+    def export(self):
+        lists = [dict(lst) for lst in self._lists.values()]
+        with self._columns_lock:
+            slots = sorted((slot for slot, length in enumerate(self._lengths) if length != _FREE),
+                           key=self._id_column.__getitem__)
+            items = [self._row(slot) for slot in slots]
+        return lists, items
+
+    # Ítems
+
+    def get_items(self, list_id: int) -> list[dict]:
+        return self.page_items(list_id)
+
+    def page_items(self, list_id: int, after_id: int = None, limit: int = None, completed: bool = None,
+                   prefix: str = None, contains: str = None) -> list[dict]:
+        """Devuelve hasta ``limit`` ítems de la lista con ID mayor que ``after_id``.
+
+        El filtro ``completed`` se resuelve con el mapa de bits, sin crear el
+        diccionario de los ítems descartados.
+        """
+        order = self._item_order.get(list_id)
+        if order is None:
+            return []
+        slots = self._item_slots[list_id]
+        filtered = prefix or contains
+        page = []
+        with self.lock_list(list_id), self._columns_lock:
+            text, offsets, lengths, bits = self._text, self._offsets, self._lengths, self._completed
+            index = bisect_right(order, after_id) if after_id is not None else 0
+            while index < len(order) and (limit is None or len(page) < limit):
+                slot = slots[index]
+                item_id = order[index]
+                index += 1
+                done = bool(bits[slot >> 3] >> (slot & 7) & 1)
+                if completed is not None and done != completed:
+                    continue
+                offset = offsets[slot]
+                description = text[offset:offset + lengths[slot]].decode()
+                if filtered and not matches_description(description, prefix, contains):
+                    continue
+                page.append({"id": item_id, "list_id": list_id, "description": description, "completed": done})
+        return page
+
+    def get_item(self, list_id: int, item_id: int):
+        with self._columns_lock:
+            slot = self._slot_in_list(list_id, item_id)
+            return self._row(slot) if slot >= 0 else None
+
+    def find_by_description(self, list_id: int, description: str):
+        with self._columns_lock:
+            slot = self._slot_of_description(list_id, description)
+            return self._row(slot) if slot >= 0 else None
+
+    def _check_new_items(self, items: list[dict]):
+        ids = set()
+        keys = set()
+        for item in items:
+            if item["list_id"] not in self._lists:
+                raise ValueError("La lista del ítem no existe")
+            if self._slot_of(item["id"]) >= 0 or item["id"] in ids:
+                raise ValueError("Ya existe un ítem con ese ID")
+            key = (item["list_id"], description_key(item["description"]))
+            if self._slot_of_description(*key) >= 0 or key in keys:
+                raise ValueError("Ya existe un ítem con esta descripción en la lista")
+            ids.add(item["id"])
+            keys.add(key)
+
+    def _insert_item(self, item: dict) -> dict:
+        list_id = item["list_id"]
+        with self.lock_list(list_id), self._columns_lock:
+            self._item_ids.observe(item["id"])
+            if self._free_slots:
+                slot = self._free_slots.pop()
+                self._id_column[slot] = item["id"]
+                self._list_id_column[slot] = list_id
+            else:
+                slot = len(self._id_column)
+                self._id_column.append(item["id"])
+                self._list_id_column.append(list_id)
+                self._offsets.append(0)
+                self._lengths.append(0)
+                if slot >> 3 >= len(self._completed):
+                    self._completed.append(0)
+            self._set_description(slot, item["description"])
+            self._set_completed(slot, item["completed"])
+            if item["completed"]:
+                self._count_completed(list_id, 1)
+            self._slots_by_id.add(hash(item["id"]), slot)
+            self._slots_by_description.add(_description_hash_of(list_id, item["description"]), slot)
+            _insert_sorted(self._item_order[list_id], self._item_slots[list_id], item["id"], slot)
+            self._search.add(item["id"], item["description"])
+            self._bump(list_id)
+        return item
+
+    def update_item(self, list_id: int, item_id: int, changes: dict):
+        with self.lock_list(list_id), self._columns_lock:
+            slot = self._slot_in_list(list_id, item_id)
+            if slot < 0:
+                return None
+            if "description" in changes:
+                old_description = self._description(slot)
+                old_length = self._lengths[slot]
+                self._slots_by_description.remove(_description_hash_of(list_id, old_description), slot)
+                self._set_description(slot, changes["description"])
+                self._release_description(old_length)
+                self._slots_by_description.add(_description_hash_of(list_id, changes["description"]), slot)
+                self._search.remove(item_id, old_description)
+                self._search.add(item_id, changes["description"])
+            if "completed" in changes and changes["completed"] != self._is_completed(slot):
+                self._set_completed(slot, changes["completed"])
+                self._count_completed(list_id, 1 if changes["completed"] else -1)
+            self._bump(list_id)
+            return self._row(slot)
+
+    def delete_item(self, list_id: int, item_id: int):
+        with self.lock_list(list_id), self._columns_lock:
+            slot = self._slot_in_list(list_id, item_id)
+            if slot < 0:
+                return None
+            item = self._row(slot)
+            if item["completed"]:
+                self._count_completed(list_id, -1)
+            self._slots_by_id.remove(hash(item_id), slot)
+            self._slots_by_description.remove(_description_hash_of(list_id, item["description"]), slot)
+            _remove_sorted(self._item_order[list_id], self._item_slots[list_id], item_id)
+            self._search.remove(item_id, item["description"])
+            old_length = self._lengths[slot]
+            self._lengths[slot] = _FREE
+            self._release_description(old_length)
+            self._free_slots.append(slot)
+            self._bump(list_id)
+        return item
+
+    def _delete_list_items(self, list_id: int):
+        # Recorre los huecos de la lista (``_item_slots``), no las columnas completas
+        with self._columns_lock:
+            for item_id, slot in zip(self._item_order.pop(list_id), self._item_slots.pop(list_id)):
+                description = self._description(slot)
+                self._slots_by_id.remove(hash(item_id), slot)
+                self._slots_by_description.remove(_description_hash_of(list_id, description), slot)
+                self._search.remove(item_id, description)
+                old_length = self._lengths[slot]
+                self._lengths[slot] = _FREE
+                self._release_description(old_length)
+                self._free_slots.append(slot)
+
+    def search_items(self, query: str, list_id: int = None, limit: int = None) -> list[dict]:
+        accept = None
+        if list_id is not None:
+            accept = lambda item_id: self._list_id_column[self._slot_of(item_id)] == list_id
+        with self._columns_lock:
+            return [self._row(self._slot_of(item_id)) for item_id in self._search.search(query, limit, accept)]
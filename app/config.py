@@ -0,0 +1,52 @@
+import os
+
+# Backend de almacenamiento: "memory" (por defecto), "columnar", "sqlite" o "redis"
+STORE_BACKEND = os.getenv("TODOLIST_BACKEND", "memory")
+
+# Ruta del fichero SQLite cuando STORE_BACKEND es "sqlite"
+SQLITE_PATH = os.getenv("TODOLIST_DB_PATH", "todolist.db")
+
+# Servidor (Redis o compatible con su protocolo) y prefijo de las claves cuando STORE_BACKEND es "redis"
+REDIS_URL = os.getenv("TODOLIST_REDIS_URL", "redis://localhost:6379/0")
+REDIS_PREFIX = os.getenv("TODOLIST_REDIS_PREFIX", "{todolist}")
+
+# Dirección, puerto y número de procesos de la API al arrancarla con run.py
+HOST = os.getenv("TODOLIST_HOST", "127.0.0.1")
+PORT = int(os.getenv("TODOLIST_PORT", "8000"))
+WORKERS = int(os.getenv("TODOLIST_WORKERS", "1"))
+
+# Recargar la API al cambiar el código (solo desarrollo, un único worker); "1" lo activa
+RELOAD = os.getenv("TODOLIST_RELOAD", "0") == "1"
+
+# Número máximo de respuestas serializadas en la caché LRU de lecturas
+RESPONSE_CACHE_SIZE = int(os.getenv("TODOLIST_RESPONSE_CACHE_SIZE", "1024"))
+
+# Métricas en /metrics (formato Prometheus); "0" las desactiva
+METRICS_ENABLED = os.getenv("TODOLIST_METRICS", "1") != "0"
+
+# Respuestas de lectura serializadas directamente desde las filas del almacén
+# (con orjson si está instalado), sin volver a validarlas con pydantic; "1" lo activa
+FAST_JSON = os.getenv("TODOLIST_FAST_JSON", "0") == "1"
+
+# Directorio del registro de escrituras y las instantáneas de los almacenes en
+# memoria ("memory" y "columnar"); sin él los datos se pierden al reiniciar
+WAL_DIR = os.getenv("TODOLIST_WAL_DIR")
+
+# Cuándo sincronizar el registro con el disco: "always", "interval" o "never"
+WAL_FSYNC = os.getenv("TODOLIST_WAL_FSYNC", "always")
+
+# Segundos entre sincronizaciones con WAL_FSYNC="interval"
+WAL_FSYNC_INTERVAL = float(os.getenv("TODOLIST_WAL_FSYNC_INTERVAL", "1"))
+
+# Operaciones registradas tras las que se guarda una instantánea nueva
+WAL_SNAPSHOT_EVERY = int(os.getenv("TODOLIST_WAL_SNAPSHOT_EVERY", "100000"))
+
+# Eventos recientes que guarda /changes para reanudar desde una secuencia
+CHANGE_FEED_SIZE = int(os.getenv("TODOLIST_CHANGE_FEED_SIZE", "10000"))
+
+# Segundos que se guarda la respuesta de cada Idempotency-Key y máximo de
+# respuestas guardadas (en SQLite o en memoria; en Redis las acota el plazo)
+IDEMPOTENCY_TTL = float(os.getenv("TODOLIST_IDEMPOTENCY_TTL", "86400"))
+IDEMPOTENCY_CACHE_SIZE = int(os.getenv("TODOLIST_IDEMPOTENCY_CACHE_SIZE", "10000"))
+# Bytes máximos de una respuesta guardada; las mayores no se guardan
+IDEMPOTENCY_MAX_RESPONSE = int(os.getenv("TODOLIST_IDEMPOTENCY_MAX_RESPONSE", str(1024 * 1024)))
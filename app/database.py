@@ -0,0 +1,51 @@
+from app import config
+from app.store import InMemoryStore
+
+# Datos de ejemplo con los que arranca la aplicación
+SEED_LISTS = [
+    {"id": 1, "name": "Trabajo"},
+    {"id": 2, "name": "Casa"}
+]
+
+SEED_ITEMS = [
+    {"id": 1, "list_id": 1, "description": "Portátil de 15 pulgadas", "completed": False},
+    {"id": 2, "list_id": 1, "description": "Smartphone Android", "completed": True},
+    {"id": 3, "list_id": 2, "description": "Lavar los platos de la cena", "completed": False},
+    {"id": 4, "list_id": 2, "description": "Comprar frutas y verduras", "completed": True}
+]
+
+
+def _durable(memory_store):
+    """Con ``TODOLIST_WAL_DIR`` el almacén en memoria registra sus escrituras en disco."""
+    if not config.WAL_DIR:
+        return memory_store
+    from app.wal import DurableStore
+    return DurableStore(memory_store, config.WAL_DIR, fsync=config.WAL_FSYNC,
+                        fsync_interval=config.WAL_FSYNC_INTERVAL, snapshot_every=config.WAL_SNAPSHOT_EVERY)
+
+
+def create_store(backend: str = None, path: str = None):
+    """Crea el almacén configurado: ``memory``, ``columnar``, ``sqlite`` o ``redis``.
+
+    Todos exponen la misma interfaz (ver ``InMemoryStore``). ``columnar``
+    guarda los ítems en columnas compactas y ocupa mucha menos memoria. Con
+    ``sqlite`` varios workers de uvicorn comparten el mismo fichero de base de
+    datos; con ``redis``, varios workers en varias máquinas comparten el mismo servidor.
+    """
+    backend = backend or config.STORE_BACKEND
+    if backend == "memory":
+        return _durable(InMemoryStore(SEED_LISTS, SEED_ITEMS))
+    if backend == "columnar":
+        from app.columnar_store import ColumnarStore
+        return _durable(ColumnarStore(SEED_LISTS, SEED_ITEMS))
+    if backend == "sqlite":
+        from app.sqlite_store import SQLiteStore
+        return SQLiteStore(path or config.SQLITE_PATH, SEED_LISTS, SEED_ITEMS)
+    if backend == "redis":
+        from app.redis_store import RedisStore
+        return RedisStore(path or config.REDIS_URL, config.REDIS_PREFIX, SEED_LISTS, SEED_ITEMS)
+    raise ValueError(f"Backend de almacenamiento no soportado: {backend}")
+
+
+# Almacén compartido por todos los routers
+store = create_store()
@@ -0,0 +1,323 @@
+"""Claves de idempotencia (cabecera ``Idempotency-Key``) para POST y PATCH.
+
+La primera respuesta de cada clave se guarda durante ``TODOLIST_IDEMPOTENCY_TTL``
+segundos; un reintento con la misma clave, el mismo método, la misma ruta y
+el mismo cuerpo recibe esa respuesta (con ``Idempotent-Replayed: true``) sin
+volver a validar ni a escribir nada. Así un cliente que pierde la respuesta
+por un corte de red puede reintentar una creación sin duplicarla ni recibir
+un "ya existe" engañoso.
+
+- Misma clave con otro cuerpo: 422.
+- Misma clave mientras la primera petición sigue en curso: 409.
+- Las respuestas 5xx no se guardan: el reintento vuelve a ejecutarse.
+- Tampoco las mayores de ``TODOLIST_IDEMPOTENCY_MAX_RESPONSE`` bytes.
+- Las rutas que leen el cuerpo en streaming (``/import``) ignoran la
+  clave: comprobar el reintento obligaría a leer antes el cuerpo entero.
+
+Con los backends ``sqlite`` y ``redis`` las respuestas se guardan en la misma
+base de datos y las comparten todos los workers; con ``memory`` y
+``columnar`` (un solo proceso) en una caché en memoria acotada por
+``TODOLIST_IDEMPOTENCY_CACHE_SIZE``.
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from anyio import to_thread
+
+from app import config, metrics
+
+HEADER = b"idempotency-key"
+# Métodos que aceptan la cabecera; GET, PUT y DELETE ya son idempotentes
+KEYED_METHODS = {"POST", "PATCH"}
+MAX_KEY_LENGTH = 255
+# Segundos que una clave queda reservada mientras su petición se ejecuta;
+# si el proceso muere a medias, pasado este plazo se puede reintentar
+IN_PROGRESS_LEASE = 60
+# Rutas cuyo cuerpo puede ocupar varios GB y se procesa a medida que llega
+STREAMING_PATHS = {"/import"}
+
+
+def _encode(entry: dict) -> str:
+    return json.dumps(entry, ensure_ascii=False, separators=(",", ":"))
+
+
+class IdempotencyCache:
+    """Caché en memoria de ``clave -> respuesta`` con caducidad y tamaño máximo.
+
+    Las entradas se guardan en orden de escritura; como todas caducan tras
+    el mismo plazo, las caducadas siempre están al principio.
+    """
+
+    blocking = False
+
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _evict(self, now: float):
+        while self._entries:
+            key, (expires_at, _) = next(iter(self._entries.items()))
+            if expires_at > now and len(self._entries) <= self.max_entries:
+                return
+            del self._entries[key]
+
+    def reserve(self, key: str, fingerprint: str):
+        """Reserva ``key`` y devuelve ``None``, o devuelve la entrada que ya tenía."""
+        now = time.monotonic()
+        with self._lock:
+            current = self._entries.get(key)
+            if current is not None and current[0] > now:
+                return current[1]
+            self._entries.pop(key, None)
+            self._entries[key] = (now + IN_PROGRESS_LEASE, {"fingerprint": fingerprint, "status": None})
+            self._evict(now)
+        return None
+
+    def complete(self, key: str, entry: dict):
+        now = time.monotonic()
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (now + self.ttl, entry)
+            self._evict(now)
+
+    def release(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteIdempotencyCache:
+    """Respuestas guardadas en la tabla ``idempotency_keys`` de la base de datos de ``SQLiteStore``.
+
+    ``reserve`` inserta la reserva en una transacción ``IMMEDIATE``, así que
+    dos workers con la misma clave no pueden ejecutar la petición a la vez.
+    Cada ``CLEANUP_EVERY`` reservas se borran las caducadas y, si sobran, las
+    más antiguas.
+    """
+
+    blocking = True
+    CLEANUP_EVERY = 1000
+
+    def __init__(self, path: str, ttl: float, max_entries: int):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._reservations = 0
+        self._connection().execute(
+            "CREATE TABLE IF NOT EXISTS idempotency_keys ("
+            "key TEXT PRIMARY KEY, entry TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False,
+                                                      timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def reserve(self, key: str, fingerprint: str):
+        conn = self._connection()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT entry FROM idempotency_keys WHERE key = ? AND expires_at > ?",
+                               (key, now)).fetchone()
+            if row is None:
+                conn.execute("INSERT OR REPLACE INTO idempotency_keys (key, entry, expires_at) VALUES (?, ?, ?)",
+                             (key, _encode({"fingerprint": fingerprint, "status": None}), now + IN_PROGRESS_LEASE))
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        self._reservations += 1
+        if self._reservations % self.CLEANUP_EVERY == 0:
+            self._cleanup(conn, now)
+        return json.loads(row[0]) if row is not None else None
+
+    def _cleanup(self, conn, now: float):
+        conn.execute("DELETE FROM idempotency_keys WHERE expires_at <= ?", (now,))
+        conn.execute(
+            "DELETE FROM idempotency_keys WHERE key IN (SELECT key FROM idempotency_keys "
+            "ORDER BY expires_at DESC LIMIT -1 OFFSET ?)", (self.max_entries,)
+        )
+
+    def complete(self, key: str, entry: dict):
+        self._connection().execute("UPDATE idempotency_keys SET entry = ?, expires_at = ? WHERE key = ?",
+                                   (_encode(entry), time.time() + self.ttl, key))
+
+    def release(self, key: str):
+        self._connection().execute("DELETE FROM idempotency_keys WHERE key = ?", (key,))
+
+
+class RedisIdempotencyCache:
+    """Respuestas guardadas en Redis con caducidad (``SET ... NX PX``), compartidas por todos los nodos.
+
+    Redis borra las claves al caducar; el número de entradas lo acota el
+    plazo, no ``max_entries``.
+    """
+
+    blocking = True
+
+    def __init__(self, url: str, prefix: str, ttl: float):
+        import redis
+        self._redis = redis.Redis.from_url(url, decode_responses=True)
+        self._prefix = prefix
+        self.ttl = ttl
+
+    def _key(self, key: str) -> str:
+        return f"{self._prefix}:idempotency:{key}"
+
+    def reserve(self, key: str, fingerprint: str):
+        reservation = _encode({"fingerprint": fingerprint, "status": None})
+        while True:
+            if self._redis.set(self._key(key), reservation, nx=True, px=IN_PROGRESS_LEASE * 1000):
+                return None
+            current = self._redis.get(self._key(key))
+            # Si caducó entre SET y GET, se vuelve a intentar la reserva
+            if current is not None:
+                return json.loads(current)
+
+    def complete(self, key: str, entry: dict):
+        self._redis.set(self._key(key), _encode(entry), px=int(self.ttl * 1000))
+
+    def release(self, key: str):
+        self._redis.delete(self._key(key))
+
+
+def create_cache(backend: str = None, path: str = None):
+    """Crea la caché de respuestas del backend configurado (ver ``database.create_store``)."""
+    backend = backend or config.STORE_BACKEND
+    if backend == "sqlite":
+        return SQLiteIdempotencyCache(path or config.SQLITE_PATH, config.IDEMPOTENCY_TTL,
+                                      config.IDEMPOTENCY_CACHE_SIZE)
+    if backend == "redis":
+        return RedisIdempotencyCache(path or config.REDIS_URL, config.REDIS_PREFIX, config.IDEMPOTENCY_TTL)
+    return IdempotencyCache(config.IDEMPOTENCY_TTL, config.IDEMPOTENCY_CACHE_SIZE)
+
+
+async def _call(cache, method: str, *args):
+    if cache.blocking:
+        return await to_thread.run_sync(getattr(cache, method), *args)
+    return getattr(cache, method)(*args)
+
+
+async def _send_json(send, status_code: int, detail: str):
+    body = json.dumps({"detail": detail}, ensure_ascii=False).encode()
+    await send({"type": "http.response.start", "status": status_code,
+                "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]})
+    await send({"type": "http.response.body", "body": body})
+
+
+class IdempotencyMiddleware:
+    """Middleware ASGI que responde los reintentos con la respuesta guardada de su ``Idempotency-Key``.
+
+    Solo lee el cuerpo completo de las peticiones con clave (para comprobar
+    que el reintento es la misma petición), salvo en ``STREAMING_PATHS``; el
+    resto pasa sin tocar.
+    """
+
+    def __init__(self, app, cache=None, max_response: int = None):
+        self.app = app
+        self.cache = cache if cache is not None else create_cache()
+        self.max_response = max_response if max_response is not None else config.IDEMPOTENCY_MAX_RESPONSE
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in KEYED_METHODS:
+            await self.app(scope, receive, send)
+            return
+        header = next((value for name, value in scope["headers"] if name == HEADER), None)
+        if header is None:
+            await self.app(scope, receive, send)
+            return
+        if scope["path"].rstrip("/") in STREAMING_PATHS:
+            metrics.IDEMPOTENT_REQUESTS.inc("skipped")
+            await self.app(scope, receive, send)
+            return
+        if not header or len(header) > MAX_KEY_LENGTH:
+            await _send_json(send, 400, f"Idempotency-Key debe tener entre 1 y {MAX_KEY_LENGTH} caracteres")
+            return
+
+        chunks = []
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body"):
+                break
+        body = b"".join(chunks)
+        # La clave vale para una petición concreta: el mismo valor en otra ruta es otra clave
+        key = " ".join((scope["method"], scope["path"], scope["query_string"].decode("latin-1"),
+                        header.decode("latin-1")))
+        fingerprint = hashlib.blake2s(body, digest_size=16).hexdigest()
+
+        stored = await _call(self.cache, "reserve", key, fingerprint)
+        if stored is not None:
+            if stored["fingerprint"] != fingerprint:
+                metrics.IDEMPOTENT_REQUESTS.inc("mismatch")
+                await _send_json(send, 422, "Idempotency-Key ya usada con otro cuerpo de petición")
+            elif stored["status"] is None:
+                metrics.IDEMPOTENT_REQUESTS.inc("conflict")
+                await _send_json(send, 409, "Hay una petición con esta Idempotency-Key en curso")
+            else:
+                metrics.IDEMPOTENT_REQUESTS.inc("replayed")
+                headers = [(name.encode("latin-1"), value.encode("latin-1")) for name, value in stored["headers"]]
+                await send({"type": "http.response.start", "status": stored["status"],
+                            "headers": headers + [(b"idempotent-replayed", b"true")]})
+                await send({"type": "http.response.body", "body": stored["body"].encode("latin-1")})
+            return
+
+        delivered = False
+
+        async def replay_body():
+            nonlocal delivered
+            if delivered:
+                return await receive()
+            delivered = True
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        response = {"status": 500, "headers": [], "body": [], "size": 0}
+
+        async def send_and_capture(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                response["headers"] = [(name.decode("latin-1"), value.decode("latin-1"))
+                                       for name, value in message.get("headers", [])]
+            elif message["type"] == "http.response.body" and response["body"] is not None:
+                chunk = message.get("body", b"")
+                response["size"] += len(chunk)
+                if response["size"] > self.max_response:
+                    # Demasiado grande para guardarla: se envía sin copiarla
+                    response["body"] = None
+                else:
+                    response["body"].append(chunk)
+            await send(message)
+
+        try:
+            await self.app(scope, replay_body, send_and_capture)
+        except BaseException:
+            metrics.IDEMPOTENT_REQUESTS.inc("released")
+            await _call(self.cache, "release", key)
+            raise
+        if response["status"] >= 500 or response["body"] is None:
+            metrics.IDEMPOTENT_REQUESTS.inc("released")
+            await _call(self.cache, "release", key)
+            return
+        metrics.IDEMPOTENT_REQUESTS.inc("stored")
+        await _call(self.cache, "complete", key, {
+            "fingerprint": fingerprint,
+            "status": response["status"],
+            "headers": response["headers"],
+            "body": b"".join(response["body"]).decode("latin-1"),
+        })
@@ -0,0 +1,128 @@
+"""Transporte en proceso del servidor MCP: llama a la capa de servicios sin HTTP.
+
+Aplica las mismas validaciones que la API REST (modelos pydantic y reglas de
+``app.services``) y devuelve los errores con el mismo formato que
+``async_safe_request``, de modo que las herramientas MCP se comportan igual
+en los dos modos.
+"""
+import json
+
+from fastapi import HTTPException
+from pydantic import TypeAdapter, ValidationError
+
+from app import services
+from app.changes import feed
+from app.models import TodoItemBatchUpdate, TodoItemCreate, TodoItemUpdate, TodoListCreate, TodoListUpdate
+
+SUCCESS = {"message": "Operación exitosa", "status": "success"}
+
+_batch_updates = TypeAdapter(list[TodoItemBatchUpdate])
+
+
+async def _call(operation):
+    try:
+        return await services.run(operation)
+    except HTTPException as e:
+        body = json.dumps({"detail": e.detail}, ensure_ascii=False, separators=(",", ":"))
+        return {"error": f"Error {e.status_code}: {body}"}
+    except ValidationError as e:
+        body = json.dumps({"detail": e.errors(include_url=False, include_context=False)},
+                          ensure_ascii=False, separators=(",", ":"))
+        return {"error": f"Error 422: {body}"}
+    except Exception as e:
+        return {"error": str(e)}
+
+
+def _copy(item):
+    return dict(item)
+
+
+def _copy_results(results):
+    return [dict(result, item=dict(result["item"])) for result in results]
+
+
+class InProcessTransport:
+    """Ejecuta las operaciones en el mismo proceso, sobre el almacén configurado.
+
+    Cada operación (validación, reglas y copia del resultado) se ejecuta con
+    ``services.run``, así que con SQLite no bloquea el bucle de eventos.
+    """
+
+    async def get_lists(self):
+        return await _call(lambda: [_copy(lst) for lst in services.get_lists()])
+
+    async def create_list(self, name: str):
+        return await _call(lambda: _copy(services.create_list(TodoListCreate(name=name))))
+
+    async def rename_list(self, list_id: int, name: str):
+        return await _call(lambda: _copy(services.rename_list(list_id, TodoListUpdate(name=name))))
+
+    async def delete_list(self, list_id: int):
+        def operation():
+            services.delete_list(list_id)
+            return dict(SUCCESS)
+        return await _call(operation)
+
+    async def get_items(self, list_id: int):
+        return await _call(lambda: [_copy(item) for item in services.get_items(list_id)])
+
+    async def search_items(self, query: str, list_id: int = None, limit: int = 20):
+        return await _call(lambda: [_copy(item) for item in services.search_items(query, list_id=list_id, limit=limit)])
+
+    async def create_item(self, list_id: int, description: str):
+        return await _call(lambda: _copy(services.create_item(list_id, TodoItemCreate(description=description))))
+
+    async def update_item(self, list_id: int, item_id: int, data: dict):
+        return await _call(lambda: _copy(services.update_item(list_id, item_id, TodoItemUpdate(**data))))
+
+    async def complete_item(self, list_id: int, item_id: int):
+        return await _call(lambda: _copy(services.complete_item(list_id, item_id)))
+
+    async def delete_item(self, list_id: int, item_id: int):
+        def operation():
+            services.delete_item(list_id, item_id)
+            return dict(SUCCESS)
+        return await _call(operation)
+
+    async def create_items(self, list_id: int, descriptions: list[str]):
+        return await _call(lambda: _copy_results(services.create_items(
+            list_id, [TodoItemCreate(description=description) for description in descriptions])))
+
+    async def update_items(self, list_id: int, updates: list[dict]):
+        return await _call(lambda: _copy_results(services.update_items(list_id, _batch_updates.validate_python(updates))))
+
+    async def complete_items(self, list_id: int, item_ids: list[int]):
+        return await _call(lambda: _copy_results(services.complete_items(list_id, item_ids)))
+
+    async def delete_items(self, list_id: int, item_ids: list[int]):
+        return await _call(lambda: _copy_results(services.delete_items(list_id, item_ids)))
+
+    async def get_snapshot(self, include_open_items: bool = True, items_per_list: int = 50):
+        def operation():
+            lists = services.get_snapshot(include_open_items, items_per_list)
+            for lst in lists:
+                if lst["open_items"] is not None:
+                    lst["open_items"] = [_copy(item) for item in lst["open_items"]]
+            return lists
+        return await _call(operation)
+
+    async def get_items_by_name(self, list_name: str, completed: bool = None):
+        return await _call(lambda: [_copy(item) for item in services.get_items_by_name(list_name, completed=completed)])
+
+    async def create_items_by_name(self, list_name: str, descriptions: list[str], create_list: bool = False):
+        return await _call(lambda: _copy_results(services.create_items_by_name(
+            list_name, [TodoItemCreate(description=description) for description in descriptions], create_list)))
+
+    async def complete_item_by_name(self, list_name: str, description: str):
+        return await _call(lambda: _copy(services.complete_item_by_name(list_name, description)))
+
+    async def delete_item_by_name(self, list_name: str, description: str):
+        return await _call(lambda: _copy(services.delete_item_by_name(list_name, description)))
+
+    async def get_changes(self, since: int = None, list_id: int = None, limit: int = 100, epoch: str = None):
+        def operation():
+            if since is None:
+                return {"epoch": feed.epoch, "seq": feed.seq, "changes": []}
+            changes, seq = feed.since(since, list_id, limit, epoch)
+            return {"epoch": feed.epoch, "seq": seq, "changes": changes}
+        return await _call(operation)
@@ -1,10 +1,19 @@
 from fastapi import FastAPI
-from app.routes import lists, items
+from app.idempotency import IdempotencyMiddleware
+from app.middleware import MetricsMiddleware
+from app.routes import by_name, changes, lists, items, metrics, search, transfer
 
 
 app = FastAPI(title="TodoList API")
 
+app.add_middleware(MetricsMiddleware)
+# Exterior a las métricas: los reintentos respondidos desde la caché no cuentan como peticiones a la ruta
+app.add_middleware(IdempotencyMiddleware)
+
 app.include_router(lists.router)
 app.include_router(items.router)
-
-
+app.include_router(by_name.router)
+app.include_router(search.router)
+app.include_router(transfer.router)
+app.include_router(changes.router)
+app.include_router(metrics.router)
@@ -1,85 +1,405 @@
+import asyncio
+import concurrent.futures
+import functools
+import logging
+import os
+import sys
+import threading
+import time
+import uuid
+from urllib.parse import urlencode
+
 from mcp.server.fastmcp import FastMCP
 
-import requests
+import httpx
+
+if __package__ in (None, ""):
+    # Ejecutado como script (python app/mcp_server.py): hacer importable el paquete app
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import metrics
 
 # Crear servidor MCP
 mcp = FastMCP("TodoList")
 
-API_BASE_URL = "http://localhost:8000"
+# FastMCP activa el nivel INFO: evitar una línea de log por cada petición HTTP
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+# Configuración del cliente HTTP (variables de entorno opcionales)
+API_BASE_URL = os.getenv("TODOLIST_API_URL", "http://localhost:8000").rstrip("/")
+HTTP_POOL_SIZE = int(os.getenv("TODOLIST_HTTP_POOL_SIZE", "10"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("TODOLIST_HTTP_CONNECT_TIMEOUT", "3"))
+HTTP_READ_TIMEOUT = float(os.getenv("TODOLIST_HTTP_READ_TIMEOUT", "10"))
+HTTP_RETRIES = int(os.getenv("TODOLIST_HTTP_RETRIES", "3"))
+HTTP_BACKOFF = float(os.getenv("TODOLIST_HTTP_BACKOFF", "0.2"))
+
+# "http" (por defecto) llama a la API REST; "inprocess" usa directamente la capa de servicios
+MCP_TRANSPORT = os.getenv("TODOLIST_MCP_TRANSPORT", "http")
+# Puerto opcional para exponer /metrics del servidor MCP (latencia de herramientas y de la API)
+MCP_METRICS_PORT = int(os.getenv("TODOLIST_MCP_METRICS_PORT", "0"))
+
+SUPPORTED_METHODS = {"GET", "POST", "PUT", "PATCH", "DELETE"}
+# POST y PATCH son idempotentes gracias a la cabecera Idempotency-Key
+KEYED_METHODS = {"POST", "PATCH"}
+RETRY_STATUSES = {502, 503, 504}
+# 409: el intento anterior con la misma Idempotency-Key sigue en curso en la API
+KEYED_RETRY_STATUSES = RETRY_STATUSES | {409}
+# Máximo de lecturas recordadas para las peticiones condicionales (If-None-Match)
+CONDITIONAL_CACHE_SIZE = int(os.getenv("TODOLIST_CONDITIONAL_CACHE_SIZE", "256"))
+
+
+def parse_response(response):
+    """Convierte la respuesta de la API al resultado de las herramientas."""
+    if response.status_code in [200, 201, 204]:
+        if response.status_code == 204:
+            return {"message": "Operación exitosa", "status": "success"}
+        return response.json()
+    else:
+        raise Exception(f"Error {response.status_code}: {response.text}")
+
+
+# Cliente asíncrono compartido; se crea en el primer uso, dentro del bucle de eventos
+async_client = None
 
 
-# Función auxiliar para hacer requests seguras
-def safe_request(method: str, url: str, data: dict = None):
+def get_async_client() -> httpx.AsyncClient:
+    global async_client
+    if async_client is None:
+        async_client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=HTTP_POOL_SIZE, max_keepalive_connections=HTTP_POOL_SIZE),
+            timeout=httpx.Timeout(HTTP_READ_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT),
+            follow_redirects=True,
+        )
+    return async_client
+
+
+# Última respuesta de cada GET: ``url -> (ETag, resultado)``
+conditional_cache = {}
+
+
+def remember_response(url: str, response):
+    """Guarda el resultado de un GET con ETag para revalidarlo después."""
+    etag = response.headers.get("etag")
+    result = parse_response(response)
+    if etag and CONDITIONAL_CACHE_SIZE > 0:
+        conditional_cache.pop(url, None)
+        conditional_cache[url] = (etag, result)
+        if len(conditional_cache) > CONDITIONAL_CACHE_SIZE:
+            del conditional_cache[next(iter(conditional_cache))]
+    return result
+
+
+async def async_safe_request(method: str, url: str, data: dict | list = None):
+    """Llama a la API con el cliente compartido, con reintentos y espera exponencial.
+
+    Los GET repetidos envían ``If-None-Match``: si la API responde 304 se
+    devuelve el resultado anterior sin volver a transferirlo. POST y PATCH
+    envían una ``Idempotency-Key`` nueva por llamada, la misma en todos sus
+    reintentos: si la API ya ejecutó la escritura pero la respuesta se
+    perdió, el reintento recibe la respuesta guardada en lugar de repetirla.
+    """
     try:
-        if method == "GET":
-            response = requests.get(url)
-        elif method == "POST":
-            response = requests.post(url, json=data)
-        elif method == "PUT":
-            response = requests.put(url, json=data)
-        elif method == "PATCH":
-            response = requests.patch(url, json=data)
-        elif method == "DELETE":
-            response = requests.delete(url)
-        else:
+        if method not in SUPPORTED_METHODS:
             raise ValueError(f"Método no soportado: {method}")
-
-        if response.status_code in [200, 201, 204]:
-            if response.status_code == 204:
-                return {"message": "Operación exitosa", "status": "success"}
-            return response.json()
-        else:
-            raise Exception(f"Error {response.status_code}: {response.text}")
+        cached = conditional_cache.get(url) if method == "GET" else None
+        headers = {}
+        if cached:
+            headers["If-None-Match"] = cached[0]
+        retry_statuses = RETRY_STATUSES
+        if method in KEYED_METHODS:
+            headers["Idempotency-Key"] = uuid.uuid4().hex
+            retry_statuses = KEYED_RETRY_STATUSES
+        attempts = HTTP_RETRIES + 1
+        for attempt in range(attempts):
+            last_attempt = attempt == attempts - 1
+            start = time.perf_counter()
+            try:
+                response = await get_async_client().request(method, url, json=data, headers=headers)
+            except httpx.TransportError:
+                metrics.MCP_UPSTREAM_ERRORS.inc(method, "connection")
+                if last_attempt:
+                    raise
+            else:
+                metrics.MCP_UPSTREAM_SECONDS.observe(time.perf_counter() - start, method)
+                if response.status_code == 304 and cached:
+                    return cached[1]
+                if response.status_code not in retry_statuses or last_attempt:
+                    if response.status_code >= 400:
+                        metrics.MCP_UPSTREAM_ERRORS.inc(method, "status")
+                    if method == "GET":
+                        return remember_response(url, response)
+                    return parse_response(response)
+            metrics.MCP_UPSTREAM_ERRORS.inc(method, "retry")
+            await asyncio.sleep(HTTP_BACKOFF * 2 ** attempt)
     except Exception as e:
         return {"error": str(e)}
 
 
+class HttpTransport:
+    """Ejecuta las operaciones llamando a la API REST con el cliente asíncrono."""
+
+    def __init__(self, base_url: str):
+        self.base_url = base_url
+
+    async def get_lists(self):
+        return await async_safe_request("GET", f"{self.base_url}/lists/")
+
+    async def create_list(self, name: str):
+        return await async_safe_request("POST", f"{self.base_url}/lists/", {"name": name})
+
+    async def rename_list(self, list_id: int, name: str):
+        return await async_safe_request("PATCH", f"{self.base_url}/lists/{list_id}", {"name": name})
+
+    async def delete_list(self, list_id: int):
+        return await async_safe_request("DELETE", f"{self.base_url}/lists/{list_id}")
+
+    async def get_items(self, list_id: int):
+        return await async_safe_request("GET", f"{self.base_url}/lists/{list_id}/items/")
+
+    async def search_items(self, query: str, list_id: int = None, limit: int = 20):
+        params = {"q": query, "limit": limit}
+        if list_id is not None:
+            params["list_id"] = list_id
+        return await async_safe_request("GET", f"{self.base_url}/search/?{urlencode(params)}")
+
+    async def create_item(self, list_id: int, description: str):
+        return await async_safe_request("POST", f"{self.base_url}/lists/{list_id}/items/", {"description": description})
+
+    async def update_item(self, list_id: int, item_id: int, data: dict):
+        return await async_safe_request("PUT", f"{self.base_url}/lists/{list_id}/items/{item_id}", data)
+
+    async def complete_item(self, list_id: int, item_id: int):
+        return await async_safe_request("PATCH", f"{self.base_url}/lists/{list_id}/items/{item_id}/complete")
+
+    async def delete_item(self, list_id: int, item_id: int):
+        return await async_safe_request("DELETE", f"{self.base_url}/lists/{list_id}/items/{item_id}")
+
+    async def create_items(self, list_id: int, descriptions: list[str]):
+        return await async_safe_request("POST", f"{self.base_url}/lists/{list_id}/items/batch",
+                            [{"description": description} for description in descriptions])
+
+    async def update_items(self, list_id: int, updates: list[dict]):
+        return await async_safe_request("PUT", f"{self.base_url}/lists/{list_id}/items/batch", updates)
+
+    async def complete_items(self, list_id: int, item_ids: list[int]):
+        return await async_safe_request("PATCH", f"{self.base_url}/lists/{list_id}/items/batch/complete", {"ids": item_ids})
+
+    async def delete_items(self, list_id: int, item_ids: list[int]):
+        return await async_safe_request("DELETE", f"{self.base_url}/lists/{list_id}/items/batch", {"ids": item_ids})
+
+    async def get_snapshot(self, include_open_items: bool = True, items_per_list: int = 50):
+        params = {"include_open_items": str(include_open_items).lower(), "items_per_list": items_per_list}
+        return await async_safe_request("GET", f"{self.base_url}/lists/snapshot?{urlencode(params)}")
+
+    async def get_items_by_name(self, list_name: str, completed: bool = None):
+        params = {"list_name": list_name}
+        if completed is not None:
+            params["completed"] = str(completed).lower()
+        return await async_safe_request("GET", f"{self.base_url}/by-name/items/?{urlencode(params)}")
+
+    async def create_items_by_name(self, list_name: str, descriptions: list[str], create_list: bool = False):
+        return await async_safe_request("POST", f"{self.base_url}/by-name/items/", {
+            "list_name": list_name,
+            "items": [{"description": description} for description in descriptions],
+            "create_list": create_list,
+        })
+
+    async def complete_item_by_name(self, list_name: str, description: str):
+        return await async_safe_request("PATCH", f"{self.base_url}/by-name/items/complete",
+                                        {"list_name": list_name, "description": description})
+
+    async def delete_item_by_name(self, list_name: str, description: str):
+        return await async_safe_request("DELETE", f"{self.base_url}/by-name/items/",
+                                        {"list_name": list_name, "description": description})
+
+    async def get_changes(self, since: int = None, list_id: int = None, limit: int = 100, epoch: str = None):
+        params = {"limit": limit}
+        if since is not None:
+            params["since"] = since
+        if epoch is not None:
+            params["epoch"] = epoch
+        if list_id is not None:
+            params["list_id"] = list_id
+        return await async_safe_request("GET", f"{self.base_url}/changes/?{urlencode(params)}")
+
+
+class DeferredTransport:
+    """Crea un transporte en un hilo aparte y espera a que esté listo en la primera herramienta.
+
+    El transporte en proceso importa la API y carga el almacén (con un WAL
+    grande, varios segundos): así el servidor MCP responde a ``initialize``
+    y ``list_tools`` sin esperarlo y la carga se solapa con el arranque del cliente.
+    """
+
+    def __init__(self, factory):
+        self._future = concurrent.futures.Future()
+        threading.Thread(target=self._create, args=(factory,), daemon=True).start()
+
+    def _create(self, factory):
+        try:
+            self._future.set_result(factory())
+        except BaseException as exc:
+            self._future.set_exception(exc)
+
+    def __getattr__(self, name):
+        async def call(*args, **kwargs):
+            target = await asyncio.wrap_future(self._future)
+            return await getattr(target, name)(*args, **kwargs)
+        return call
+
+
+def create_transport(name: str = None):
+    """Crea el transporte configurado en ``TODOLIST_MCP_TRANSPORT``."""
+    name = name or MCP_TRANSPORT
+    if name == "http":
+        return HttpTransport(API_BASE_URL)
+    if name == "inprocess":
+        def create_inprocess():
+            from app.inprocess import InProcessTransport
+            return InProcessTransport()
+        return DeferredTransport(create_inprocess)
+    raise ValueError(f"Transporte MCP no soportado: {name}")
+
+
+transport = create_transport()
+
+
+def tool():
+    """Registra una herramienta MCP midiendo su latencia en ``todolist_mcp_tool_duration_seconds``."""
+    def register(function):
+        @functools.wraps(function)
+        async def timed_tool(*args, **kwargs):
+            with metrics.MCP_TOOL_SECONDS.time(function.__name__):
+                return await function(*args, **kwargs)
+        return mcp.tool()(timed_tool)
+    return register
+
+
 # Tools registrados
 
-@mcp.tool()
-def get_lists() -> list:
+@tool()
+async def get_lists() -> list:
     """Devuelve todas las listas disponibles"""
-    return safe_request("GET", f"{API_BASE_URL}/lists")
-@mcp.tool()
-def create_list(name: str) -> dict:
+    return await transport.get_lists()
+@tool()
+async def create_list(name: str) -> dict:
     """Crea una nueva lista de tareas"""
-    return safe_request("POST", f"{API_BASE_URL}/lists", {"name": name})
+    return await transport.create_list(name)
+
+@tool()
+async def rename_list(list_id: int, name: str) -> dict:
+    """Cambia el nombre de una lista"""
+    return await transport.rename_list(list_id, name)
 
-@mcp.tool()
-def get_items(list_id: int) -> list:
+
+@tool()
+async def delete_list(list_id: int) -> dict:
+    """Elimina una lista junto con todos sus ítems"""
+    return await transport.delete_list(list_id)
+
+@tool()
+async def get_items(list_id: int) -> list:
     """Devuelve todos los ítems de una lista específica"""
-    return safe_request("GET", f"{API_BASE_URL}/lists/{list_id}/items")
+    return await transport.get_items(list_id)
 
 
-@mcp.tool()
-def create_item(list_id: int, description: str) -> dict:
+@tool()
+async def create_item(list_id: int, description: str) -> dict:
     """Crea un ítem nuevo en una lista"""
-    return safe_request("POST", f"{API_BASE_URL}/lists/{list_id}/items", {"description": description})
+    return await transport.create_item(list_id, description)
 
 
-@mcp.tool()
-def update_item(list_id: int, item_id: int, description: str = None, completed: bool = None) -> dict:
+@tool()
+async def update_item(list_id: int, item_id: int, description: str = None, completed: bool = None) -> dict:
     """Actualiza un ítem existente (descripción y/o completado)"""
     data = {}
     if description is not None:
         data["description"] = description
     if completed is not None:
         data["completed"] = completed
-    return safe_request("PUT", f"{API_BASE_URL}/lists/{list_id}/items/{item_id}", data)
+    return await transport.update_item(list_id, item_id, data)
+
 
+@tool()
+async def search_items(query: str, list_id: int = None, limit: int = 20) -> list:
+    """Busca ítems en todas las listas (o en list_id) por las palabras de su descripción, sin distinguir mayúsculas ni acentos"""
+    return await transport.search_items(query, list_id, limit)
 
-@mcp.tool()
-def complete_item(list_id: int, item_id: int) -> dict:
+
+@tool()
+async def complete_item(list_id: int, item_id: int) -> dict:
     """Marca un ítem como completado"""
-    return safe_request("PATCH", f"{API_BASE_URL}/lists/{list_id}/items/{item_id}/complete")
+    return await transport.complete_item(list_id, item_id)
 
 
-@mcp.tool()
-def delete_item(list_id: int, item_id: int) -> dict:
+@tool()
+async def delete_item(list_id: int, item_id: int) -> dict:
     """Elimina un ítem de una lista"""
-    return safe_request("DELETE", f"{API_BASE_URL}/lists/{list_id}/items/{item_id}")
+    return await transport.delete_item(list_id, item_id)
+
+
+@tool()
+async def create_items(list_id: int, descriptions: list[str]) -> list:
+    """Crea varios ítems en una lista con una sola petición"""
+    return await transport.create_items(list_id, descriptions)
+
+
+@tool()
+async def update_items(list_id: int, updates: list[dict]) -> list:
+    """Actualiza varios ítems; cada elemento lleva id y los campos description y/o completed"""
+    return await transport.update_items(list_id, updates)
+
+
+@tool()
+async def complete_items(list_id: int, item_ids: list[int]) -> list:
+    """Marca varios ítems como completados"""
+    return await transport.complete_items(list_id, item_ids)
+
+
+@tool()
+async def delete_items(list_id: int, item_ids: list[int]) -> list:
+    """Elimina varios ítems de una lista"""
+    return await transport.delete_items(list_id, item_ids)
+
+
+@tool()
+async def get_snapshot(include_open_items: bool = True, items_per_list: int = 50) -> list:
+    """Devuelve en una sola llamada todas las listas con item_count y completed_count y, opcionalmente, sus ítems pendientes (open_items)"""
+    return await transport.get_snapshot(include_open_items, items_per_list)
+
+
+@tool()
+async def get_items_by_name(list_name: str, completed: bool = None) -> list:
+    """Devuelve los ítems de la lista con ese nombre (sin distinguir mayúsculas ni acentos), sin buscar antes su ID"""
+    return await transport.get_items_by_name(list_name, completed)
+
+
+@tool()
+async def add_items_to_list_by_name(list_name: str, descriptions: list[str], create_list: bool = False) -> list:
+    """Añade ítems a la lista con ese nombre; con create_list=True crea la lista si no existe"""
+    return await transport.create_items_by_name(list_name, descriptions, create_list)
+
+
+@tool()
+async def complete_item_by_name(list_name: str, description: str) -> dict:
+    """Marca como completado el ítem con esa descripción en la lista con ese nombre (sin distinguir mayúsculas ni acentos)"""
+    return await transport.complete_item_by_name(list_name, description)
+
+
+@tool()
+async def delete_item_by_name(list_name: str, description: str) -> dict:
+    """Elimina el ítem con esa descripción de la lista con ese nombre (sin distinguir mayúsculas ni acentos)"""
+    return await transport.delete_item_by_name(list_name, description)
+
+
+@tool()
+async def get_changes(since: int = None, list_id: int = None, limit: int = 100, epoch: str = None) -> dict:
+    """Devuelve los cambios posteriores a la secuencia since (sin since, solo la secuencia actual) para no releer listas enteras; pasar también la epoch recibida, con otra epoch la secuencia ya no vale"""
+    return await transport.get_changes(since, list_id, limit, epoch)
 
 
 # Ejecutar el servidor
 if __name__ == "__main__":
+    if MCP_METRICS_PORT:
+        metrics.serve(MCP_METRICS_PORT)
     mcp.run()
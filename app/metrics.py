@@ -0,0 +1,240 @@
+"""Métricas internas (contadores e histogramas) en formato de texto de Prometheus.
+
+Solo usa la biblioteca estándar: lo importan tanto la API como el servidor MCP.
+
+Para que medir no cueste casi nada, cada hilo escribe en su propia copia de
+los valores (sin candados en el camino caliente) y ``render`` suma las copias
+de todos los hilos al generar el texto. Cuando un hilo termina (anyio retira
+los hilos de trabajo inactivos), su copia se suma a ``_retired`` y se
+descarta, así que el número de copias no crece con los hilos que han existido.
+"""
+import threading
+import weakref
+from bisect import bisect_left
+from time import perf_counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from app import config
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Límites de los histogramas de latencia, en segundos
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+# Con TODOLIST_METRICS=0 las observaciones se descartan
+enabled = config.METRICS_ENABLED
+
+_local = threading.local()
+# Copias de los hilos vivos: ``id(copia) -> copia``
+_shards = {}
+# Suma de las copias de los hilos que ya terminaron
+_retired = {}
+_shards_lock = threading.Lock()
+_metrics = []
+
+
+class _ShardOwner:
+    """Objeto que solo guarda la variable local de cada hilo: se libera cuando el hilo termina."""
+
+    __slots__ = ("__weakref__",)
+
+
+def _merge(target: dict, shard: dict):
+    for key, value in shard.items():
+        current = target.get(key)
+        if isinstance(value, list):
+            target[key] = list(value) if current is None else [a + b for a, b in zip(current, value)]
+        else:
+            target[key] = value if current is None else current + value
+
+
+def _retire(shard: dict):
+    with _shards_lock:
+        _shards.pop(id(shard), None)
+        _merge(_retired, shard)
+
+
+def _new_shard() -> dict:
+    shard = _local.shard = {}
+    owner = _local.owner = _ShardOwner()
+    weakref.finalize(owner, _retire, shard)
+    with _shards_lock:
+        _shards[id(shard)] = shard
+    return shard
+
+
+def _all_shards() -> list[dict]:
+    """Copia de ``_retired`` más las copias de los hilos vivos."""
+    with _shards_lock:
+        return [dict(_retired), *_shards.values()]
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names, values, extra=()) -> str:
+    pairs = [*zip(names, values), *extra]
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        _metrics.append(self)
+
+    def inc(self, *labels, amount=1):
+        if not enabled:
+            return
+        try:
+            shard = _local.shard
+        except AttributeError:
+            shard = _new_shard()
+        key = (self, labels)
+        shard[key] = shard.get(key, 0) + amount
+
+    def _collect(self, shards):
+        totals = {}
+        for shard in shards:
+            for (metric, labels), value in list(shard.items()):
+                if metric is self:
+                    totals[labels] = totals.get(labels, 0) + value
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(totals.items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+
+class _Timer:
+    __slots__ = ("histogram", "labels", "start")
+
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(perf_counter() - self.start, *self.labels)
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        _metrics.append(self)
+
+    def observe(self, value: float, *labels):
+        if not enabled:
+            return
+        try:
+            shard = _local.shard
+        except AttributeError:
+            shard = _new_shard()
+        key = (self, labels)
+        cell = shard.get(key)
+        if cell is None:
+            # Un contador por límite, más +Inf, la suma y el total
+            cell = shard[key] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+        cell[bisect_left(self.buckets, value)] += 1
+        cell[-2] += value
+        cell[-1] += 1
+
+    def time(self, *labels) -> _Timer:
+        """Context manager que observa la duración del bloque."""
+        return _Timer(self, labels)
+
+    def _collect(self, shards):
+        totals = {}
+        for shard in shards:
+            for (metric, labels), cell in list(shard.items()):
+                if metric is self:
+                    total = totals.get(labels)
+                    totals[labels] = list(cell) if total is None else [a + b for a, b in zip(total, cell)]
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for labels, cell in sorted(totals.items()):
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), cell):
+                cumulative += count
+                le = bound if bound == "+Inf" else _format_value(float(bound))
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, [('le', le)])} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(cell[-2])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {cell[-1]}")
+        return lines
+
+
+def render() -> str:
+    """Texto de todas las métricas registradas, en el formato de exposición de Prometheus."""
+    shards = _all_shards()
+    lines = []
+    for metric in _metrics:
+        lines.extend(metric._collect(shards))
+    return "\n".join(lines) + "\n"
+
+
+def reset():
+    """Pone a cero todas las métricas (para tests y benchmarks)."""
+    with _shards_lock:
+        _retired.clear()
+        for shard in _shards.values():
+            shard.clear()
+
+
+def serve(port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """Expone ``/metrics`` en un hilo aparte, para procesos sin API HTTP (el servidor MCP)."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+# Métricas de la API
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "todolist_http_request_duration_seconds", "Latencia de las peticiones HTTP por ruta", ("method", "route"))
+HTTP_REQUESTS = Counter(
+    "todolist_http_requests_total", "Peticiones HTTP por ruta y código de estado", ("method", "route", "status"))
+STORE_OPERATION_SECONDS = Histogram(
+    "todolist_store_operation_duration_seconds",
+    "Duración de las operaciones del camino caliente (búsquedas, duplicados, lecturas, escrituras, serialización)",
+    ("operation",))
+IDEMPOTENT_REQUESTS = Counter(
+    "todolist_idempotent_requests_total",
+    "Peticiones con Idempotency-Key (outcome: stored, replayed, conflict, mismatch, released, skipped)", ("outcome",))
+
+# Métricas del servidor MCP
+
+MCP_TOOL_SECONDS = Histogram(
+    "todolist_mcp_tool_duration_seconds", "Latencia de las herramientas MCP", ("tool",))
+MCP_UPSTREAM_SECONDS = Histogram(
+    "todolist_mcp_upstream_request_duration_seconds", "Latencia de las peticiones del servidor MCP a la API", ("method",))
+MCP_UPSTREAM_ERRORS = Counter(
+    "todolist_mcp_upstream_errors_total",
+    "Errores de las peticiones del servidor MCP a la API (kind: connection, status, retry)", ("method", "kind"))
@@ -0,0 +1,37 @@
+"""Middleware ASGI que mide la latencia y el código de estado de cada petición."""
+from time import perf_counter
+
+from app import metrics
+
+
+class MetricsMiddleware:
+    """Registra cada petición con la plantilla de su ruta (``/lists/{list_id}/items/``).
+
+    Es un middleware ASGI puro, sin ``BaseHTTPMiddleware``: no copia el cuerpo
+    de la respuesta y no interfiere con las respuestas en streaming.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not metrics.enabled:
+            await self.app(scope, receive, send)
+            return
+        start = perf_counter()
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            # Las rutas inexistentes comparten etiqueta para no crear una serie por URL
+            path = route.path if route is not None else "unmatched"
+            metrics.HTTP_REQUEST_SECONDS.observe(perf_counter() - start, scope["method"], path)
+            metrics.HTTP_REQUESTS.inc(scope["method"], path, str(status_code))
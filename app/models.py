@@ -8,6 +8,19 @@ class TodoList(BaseModel):
 class TodoListCreate(BaseModel):
     name: str = Field(..., min_length=1, max_length=50)
 
+class TodoListUpdate(BaseModel):
+    name: str = Field(..., min_length=1, max_length=50)
+
+class TodoListWithCounts(TodoList):
+    item_count: int
+    completed_count: int
+
+class TodoListStats(BaseModel):
+    list_id: int
+    item_count: int
+    completed_count: int
+    pending_count: int
+
 class TodoItemBase(BaseModel):
     description: str = Field(..., min_length=3, max_length=200)
     completed: bool = False
@@ -21,4 +34,37 @@ class TodoItemUpdate(BaseModel):
 
 class TodoItem(TodoItemBase):
     id: int
-    list_id: int
\ No newline at end of file
+    list_id: int
+
+class TodoItemBatchUpdate(TodoItemUpdate):
+    id: int
+
+class TodoItemIds(BaseModel):
+    ids: list[int]
+
+class TodoItemBatchResult(BaseModel):
+    index: int
+    status: int
+    item: Optional[TodoItem] = None
+    detail: Optional[str] = None
+
+class TodoListSnapshot(TodoListWithCounts):
+    open_items: Optional[list[TodoItem]] = None
+
+class TodoItemsByName(BaseModel):
+    list_name: str = Field(..., min_length=1, max_length=50)
+    items: list[TodoItemCreate] = Field(..., min_length=1)
+    create_list: bool = False
+
+class TodoItemByName(BaseModel):
+    list_name: str = Field(..., min_length=1, max_length=50)
+    description: str = Field(..., min_length=1, max_length=200)
+
+class ImportResult(BaseModel):
+    lists: int
+    items: int
+
+class ChangePage(BaseModel):
+    epoch: str
+    seq: int
+    changes: list[dict]
@@ -0,0 +1,91 @@
+"""Escritura y lectura incremental de NDJSON (un registro JSON por línea), con gzip opcional."""
+import json
+import zlib
+
+from fastapi import HTTPException, status
+
+# Registros por lote al exportar y al insertar lo importado
+BATCH_SIZE = 1000
+# Una línea más larga que esto se rechaza en lugar de acumularla en memoria
+MAX_LINE_BYTES = 1 << 20
+
+GZIP_MAGIC = b"\x1f\x8b"
+# Máximo de bytes descomprimidos por paso, para no expandir de golpe un bloque muy comprimido
+_INFLATE_STEP = 1 << 20
+
+
+def encode_batches(batches, compress: bool = False):
+    """Convierte lotes de registros en trozos NDJSON; con ``compress`` los comprime en gzip."""
+    compressor = zlib.compressobj(wbits=31) if compress else None
+    for batch in batches:
+        chunk = "".join(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n"
+                        for record in batch).encode()
+        if compressor is not None:
+            chunk = compressor.compress(chunk)
+        if chunk:
+            yield chunk
+    if compressor is not None:
+        yield compressor.flush()
+
+
+def invalid_line(line_number: int, message: str) -> HTTPException:
+    return HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Línea {line_number}: {message}")
+
+
+async def _inflate(chunks):
+    """Descomprime el flujo si empieza por la cabecera gzip; si no, lo devuelve tal cual."""
+    decompressor = None
+    pending = b""
+    async for chunk in chunks:
+        if decompressor is None:
+            pending += chunk
+            if len(pending) < len(GZIP_MAGIC):
+                continue
+            if not pending.startswith(GZIP_MAGIC):
+                yield pending
+                async for rest in chunks:
+                    yield rest
+                return
+            decompressor = zlib.decompressobj(wbits=31)
+            chunk, pending = pending, b""
+        data = chunk
+        while data:
+            try:
+                out = decompressor.decompress(data, _INFLATE_STEP)
+            except zlib.error:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Contenido gzip inválido")
+            data = decompressor.unconsumed_tail
+            if out:
+                yield out
+    if pending:
+        yield pending
+
+
+async def iter_records(chunks):
+    """Genera ``(número de línea, registro)`` a partir de trozos de bytes NDJSON.
+
+    Solo guarda en memoria la línea en curso; las líneas vacías se ignoran.
+    """
+    buffer = b""
+    line_number = 0
+    async for data in _inflate(chunks):
+        buffer += data
+        *lines, buffer = buffer.split(b"\n")
+        if len(buffer) > MAX_LINE_BYTES:
+            raise invalid_line(line_number + len(lines) + 1, "línea demasiado larga")
+        for line in lines:
+            line_number += 1
+            if line.strip():
+                yield line_number, _parse(line_number, line)
+    if buffer.strip():
+        yield line_number + 1, _parse(line_number + 1, buffer)
+
+
+def _parse(line_number: int, line: bytes) -> dict:
+    try:
+        record = json.loads(line)
+    except ValueError:
+        raise invalid_line(line_number, "JSON inválido")
+    if not isinstance(record, dict):
+        raise invalid_line(line_number, "se esperaba un objeto JSON")
+    return record
@@ -0,0 +1,89 @@
+"""Utilidades de paginación por cursor y selección de campos."""
+import base64
+import binascii
+import json
+from functools import lru_cache
+
+from fastapi import HTTPException, status
+from pydantic import TypeAdapter
+
+from app import config, metrics
+
+try:
+    import orjson
+except ImportError:  # dependencia opcional
+    orjson = None
+
+# Cabecera con el cursor de la página siguiente (ausente en la última página)
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+MAX_PAGE_SIZE = 1000
+
+# Con TODOLIST_FAST_JSON=1 las filas se serializan sin pasar por el modelo
+fast_json = config.FAST_JSON
+
+
+def encode_cursor(last_id: int) -> str:
+    return base64.urlsafe_b64encode(str(last_id).encode()).decode()
+
+
+def decode_cursor(cursor: str | None) -> int | None:
+    """Devuelve el último ID visto codificado en ``cursor``."""
+    if cursor is None:
+        return None
+    try:
+        return int(base64.urlsafe_b64decode(cursor.encode()).decode())
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor inválido"
+        )
+
+
+def parse_fields(fields: str | None, model) -> list[str] | None:
+    """Valida la lista de campos separada por comas contra los campos de ``model``."""
+    if fields is None:
+        return None
+    selected = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = [field for field in selected if field not in model.model_fields]
+    if not selected or unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Campos no válidos: {', '.join(unknown) or fields}"
+        )
+    return selected
+
+
+def dumps(value) -> bytes:
+    """JSON compacto en UTF-8; usa orjson si está instalado."""
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+@lru_cache(maxsize=None)
+def _list_adapter(model) -> TypeAdapter:
+    return TypeAdapter(list[model])
+
+
+def serialize_page(rows: list[dict], limit: int | None, fields: list[str] | None, model) -> tuple[bytes, dict]:
+    """Recorta la página y la serializa; devuelve ``(cuerpo, cabeceras)``.
+
+    ``rows`` debe traer un elemento más que ``limit`` si hay página siguiente,
+    cuyo cursor se publica en la cabecera ``X-Next-Cursor``. Sin ``fields`` se
+    valida y serializa con ``model`` igual que haría ``response_model``.
+
+    Con ``fast_json`` las filas se serializan tal cual: los servicios ya las
+    validan al escribirlas y ambos almacenes devuelven exactamente los campos
+    del modelo, así que volver a validarlas en cada lectura no aporta nada.
+    """
+    with metrics.STORE_OPERATION_SECONDS.time("serialize"):
+        headers = {}
+        if limit is not None and len(rows) > limit:
+            rows = rows[:limit]
+            headers[NEXT_CURSOR_HEADER] = encode_cursor(rows[-1]["id"])
+        if fields is not None:
+            return dumps([{field: row[field] for field in fields} for row in rows]), headers
+        if fast_json:
+            return dumps(rows), headers
+        adapter = _list_adapter(model)
+        return adapter.dump_json(adapter.validate_python(rows)), headers
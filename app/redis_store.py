@@ -0,0 +1,563 @@
+"""Almacén en Redis (o un servidor compatible con su protocolo) con la misma interfaz que ``InMemoryStore``.
+
+Lo comparten todos los workers y todos los nodos que apunten al mismo
+servidor. Necesita el paquete ``redis`` (``pip install redis``).
+
+Claves (todas con el prefijo ``TODOLIST_REDIS_PREFIX``, ``{todolist}`` por
+defecto; las llaves hacen que en Redis Cluster caigan en el mismo slot y se
+puedan usar en una misma transacción):
+
+- ``lists``: conjunto ordenado de IDs de lista (puntuación = ID), para paginar.
+- ``list_names``: ``list_id -> nombre``; ``list_name_keys``: ``nombre normalizado -> list_id``.
+- ``list:<id>:items``: conjunto ordenado de los IDs de ítem de la lista.
+- ``list:<id>:descriptions``: ``descripción normalizada -> item_id``.
+- ``item:<id>``: el ítem en JSON.
+- ``completed``: ``list_id -> ítems completados``.
+- ``term:<término>``: IDs de los ítems con ese término; ``terms``: vocabulario
+  ordenado para resolver prefijos con ``ZRANGEBYLEX``.
+- ``sequences``: contadores de IDs; ``versions``: contador global de
+  versiones; ``version:<id>``: versión de cada lista (``version:lists``, la
+  del conjunto); ``data_version``: cambia con cada escritura.
+
+Cada escritura es una transacción optimista: ``WATCH`` de las claves que
+comprueba, comprobaciones y ``MULTI``/``EXEC`` con todos los cambios. Si otro
+proceso modifica una clave vigilada, ``EXEC`` no aplica nada y se reintenta;
+así se rechazan IDs y descripciones repetidos entre procesos igual que con
+los índices únicos de SQLite. Cada escritura toma su versión del contador
+global antes de la transacción y la guarda en la misma transacción que los
+datos, así que una versión nunca se publica antes que sus datos ni se repite
+cuando vuelve a aparecer el ID de una lista eliminada.
+"""
+import json
+import threading
+
+import redis
+
+from app.search import tokenize
+from app.store import ListLocks, description_key
+
+# Ítems que se leen por iteración al paginar con filtros
+_SCAN_BATCH = 200
+
+
+def _dump(item: dict) -> str:
+    return json.dumps(item, ensure_ascii=False, separators=(",", ":"))
+
+
+def _load(value):
+    return json.loads(value) if value is not None else None
+
+
+def _search_length(item: dict) -> tuple[int, int]:
+    # Mismo orden que ``SearchIndex``: descripciones más cortas primero
+    return len(tokenize(item["description"])), item["id"]
+
+
+class RedisStore:
+    """Guarda listas e ítems en Redis; varios procesos pueden compartirlo.
+
+    Como con SQLite, ``lock_list`` solo serializa las escrituras de este
+    proceso; entre procesos las transacciones garantizan que no haya
+    duplicados. ``reset`` no es atómico respecto a escrituras concurrentes
+    de otros procesos.
+    """
+
+    # Las operaciones hacen E/S: desde código asíncrono se ejecutan en un hilo
+    blocking = True
+
+    def __init__(self, url: str, prefix: str = "{todolist}", seed_lists=(), seed_items=()):
+        self._redis = redis.Redis.from_url(url, decode_responses=True)
+        self._prefix = prefix
+        self._locks = ListLocks()
+        # Solo el primer proceso que arranca contra una base vacía carga los datos de ejemplo
+        if self._redis.set(self._key("initialized"), 1, nx=True):
+            self._insert(seed_lists, seed_items)
+
+    def _key(self, *parts) -> str:
+        return ":".join((self._prefix, *map(str, parts)))
+
+    def lock_list(self, list_id: int) -> threading.RLock:
+        """Candado de este proceso para comprobar y escribir en una lista."""
+        return self._locks.get(list_id)
+
+    def lock_lists(self) -> threading.RLock:
+        return self._locks.lists
+
+    def sync(self):
+        """Cada escritura ya se confirma con ``EXEC``: no hay nada que esperar."""
+
+    def close(self):
+        self._redis.close()
+
+    def _transaction(self, write, *watches):
+        """Ejecuta ``write(pipe)`` con ``watches`` vigilados y reintenta si otro proceso los cambió.
+
+        ``write`` hace sus lecturas, llama a ``pipe.multi()`` y encola los
+        cambios; su resultado se devuelve cuando ``EXEC`` los aplica.
+        """
+        with self._redis.pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(*watches)
+                    result = write(pipe)
+                    pipe.execute()
+                    return result
+                except redis.WatchError:
+                    continue
+
+    def _read(self, *commands) -> list:
+        """Ejecuta ``(método, *argumentos)`` en un solo viaje de ida y vuelta, sin transacción.
+
+        Las comprobaciones de una escritura se leen así después del ``WATCH``:
+        si otro proceso cambia una clave vigilada, ``EXEC`` falla igualmente.
+        """
+        with self._redis.pipeline(transaction=False) as pipe:
+            for method, *args in commands:
+                getattr(pipe, method)(*args)
+            return pipe.execute()
+
+    def _observe(self, pipe, name: str, used_id: int, last_id):
+        """Devuelve el valor a guardar en el contador si ``used_id`` supera ``last_id``, o ``None``.
+
+        El contador guarda el último ID asignado. Solo se vigila cuando hay
+        que subirlo (IDs explícitos al importar): los IDs que salen del propio
+        contador nunca lo superan y no chocan con las asignaciones concurrentes.
+        """
+        if used_id <= int(last_id or 0):
+            return None
+        pipe.watch(self._key("sequences"))
+        return used_id if used_id > int(pipe.hget(self._key("sequences"), name) or 0) else None
+
+    def _new_version(self, pipe, *scopes) -> int:
+        """Vigila la versión de ``scopes`` y reserva la siguiente del contador global.
+
+        Se llama antes de ``pipe.multi()``. Al vigilar la versión actual, si
+        otra escritura en la misma lista se confirma antes ``EXEC`` falla y se
+        reintenta con una versión nueva: las versiones de una lista siempre crecen.
+        """
+        pipe.watch(*(self._key("version", scope) for scope in scopes))
+        return pipe.incr(self._key("versions"))
+
+    def _bump(self, pipe, version: int, *scopes):
+        pipe.mset({self._key("version", scope): version for scope in scopes})
+        pipe.incr(self._key("data_version"))
+
+    def _insert(self, lists, items):
+        self.add_lists([dict(lst) for lst in lists])
+        self.add_items([dict(item) for item in items])
+
+    def reset(self, lists=(), items=()):
+        """Reemplaza todo el contenido del almacén.
+
+        El contador de versiones no se borra: así nunca se repiten, ni siquiera tras vaciar el almacén.
+        """
+        version = self._redis.incr(self._key("versions"))
+        kept = {self._key(name) for name in ("versions", "data_version", "initialized")}
+        keys = [key for key in self._redis.scan_iter(match=self._key("*"), count=1000) if key not in kept]
+        with self._redis.pipeline() as pipe:
+            for start in range(0, len(keys), 1000):
+                pipe.delete(*keys[start:start + 1000])
+            self._bump(pipe, version, "lists")
+            pipe.execute()
+        self._insert(lists, items)
+
+    def export(self):
+        """Devuelve copias de todas las listas e ítems, en orden de ID."""
+        lists = self.get_lists()
+        items = sorted((item for lst in lists for item in self.get_items(lst["id"])), key=lambda item: item["id"])
+        return lists, items
+
+    # Versiones
+
+    def list_version(self, list_id: int):
+        """Versión actual de los ítems de la lista, o ``None`` si no existe."""
+        with self._redis.pipeline(transaction=False) as pipe:
+            pipe.hexists(self._key("list_names"), list_id)
+            pipe.get(self._key("version", list_id))
+            exists, version = pipe.execute()
+        return int(version or 0) if exists else None
+
+    def lists_version(self) -> int:
+        """Versión actual del conjunto de listas."""
+        return int(self._redis.get(self._key("version", "lists")) or 0)
+
+    def data_version(self) -> int:
+        """Versión de todo el almacén: cambia con cualquier escritura."""
+        return int(self._redis.get(self._key("data_version")) or 0)
+
+    # Listas
+
+    def get_lists(self) -> list[dict]:
+        return self.page_lists()
+
+    def page_lists(self, after_id: int = None, limit: int = None, counts: bool = False) -> list[dict]:
+        """Devuelve hasta ``limit`` listas con ID mayor que ``after_id`` (con sus contadores si ``counts``)."""
+        ids = self._redis.zrangebyscore(self._key("lists"), f"({after_id or 0}", "+inf",
+                                        start=0 if limit is not None else None, num=limit)
+        if not ids:
+            return []
+        names = self._redis.hmget(self._key("list_names"), ids)
+        lists = [{"id": int(list_id), "name": name} for list_id, name in zip(ids, names)]
+        if counts:
+            with self._redis.pipeline(transaction=False) as pipe:
+                for list_id in ids:
+                    pipe.zcard(self._key("list", list_id, "items"))
+                pipe.hmget(self._key("completed"), ids)
+                *item_counts, completed_counts = pipe.execute()
+            for lst, item_count, completed_count in zip(lists, item_counts, completed_counts):
+                lst["item_count"] = item_count
+                lst["completed_count"] = int(completed_count or 0)
+        return lists
+
+    def list_counts(self, list_id: int):
+        """Devuelve ``(ítems, completados)`` de la lista, o ``None`` si no existe."""
+        with self._redis.pipeline(transaction=False) as pipe:
+            pipe.hexists(self._key("list_names"), list_id)
+            pipe.zcard(self._key("list", list_id, "items"))
+            pipe.hget(self._key("completed"), list_id)
+            exists, item_count, completed_count = pipe.execute()
+        return (item_count, int(completed_count or 0)) if exists else None
+
+    def get_list(self, list_id: int):
+        name = self._redis.hget(self._key("list_names"), list_id)
+        return {"id": list_id, "name": name} if name is not None else None
+
+    def find_list_by_name(self, name: str):
+        """Busca una lista por nombre, sin distinguir mayúsculas (``list_name_keys``)."""
+        list_id = self._redis.hget(self._key("list_name_keys"), description_key(name))
+        return self.get_list(int(list_id)) if list_id is not None else None
+
+    def list_exists(self, list_id: int) -> bool:
+        return bool(self._redis.hexists(self._key("list_names"), list_id))
+
+    def next_list_id(self) -> int:
+        return self._redis.hincrby(self._key("sequences"), "lists", 1)
+
+    def add_list(self, new_list: dict) -> dict:
+        return self.add_lists([new_list])[0]
+
+    def add_lists(self, lists: list[dict]) -> list[dict]:
+        """Añade varias listas en una transacción; rechaza IDs y nombres repetidos."""
+        if not lists:
+            return []
+        names_key, name_keys_key = self._key("list_names"), self._key("list_name_keys")
+        keys = [description_key(lst["name"]) for lst in lists]
+
+        def write(pipe):
+            existing_ids, existing_names, last_id = self._read(
+                ("hmget", names_key, [lst["id"] for lst in lists]),
+                ("hmget", name_keys_key, keys),
+                ("hget", self._key("sequences"), "lists"),
+            )
+            ids = set()
+            for lst, key, existing_id, existing_name in zip(lists, keys, existing_ids, existing_names):
+                if existing_id is not None or lst["id"] in ids:
+                    raise ValueError("Ya existe una lista con ese ID")
+                if existing_name is not None or keys.count(key) > 1:
+                    raise ValueError("Ya existe una lista con este nombre")
+                ids.add(lst["id"])
+            next_id = self._observe(pipe, "lists", max(ids), last_id)
+            version = self._new_version(pipe, *ids, "lists")
+            pipe.multi()
+            pipe.hset(names_key, mapping={lst["id"]: lst["name"] for lst in lists})
+            pipe.hset(name_keys_key, mapping={key: lst["id"] for lst, key in zip(lists, keys)})
+            pipe.zadd(self._key("lists"), {lst["id"]: lst["id"] for lst in lists})
+            if next_id is not None:
+                pipe.hset(self._key("sequences"), "lists", next_id)
+            self._bump(pipe, version, *ids, "lists")
+            return lists
+
+        return self._transaction(write, names_key, name_keys_key)
+
+    def rename_list(self, list_id: int, name: str):
+        """Cambia el nombre de la lista; devuelve la lista o ``None`` si no existe."""
+        names_key, name_keys_key = self._key("list_names"), self._key("list_name_keys")
+        new_key = description_key(name)
+
+        def write(pipe):
+            old_name, owner = self._read(("hget", names_key, list_id), ("hget", name_keys_key, new_key))
+            if old_name is None:
+                return None
+            if owner is not None and int(owner) != list_id:
+                raise ValueError("Ya existe una lista con este nombre")
+            version = self._new_version(pipe, list_id, "lists")
+            pipe.multi()
+            pipe.hdel(name_keys_key, description_key(old_name))
+            pipe.hset(name_keys_key, new_key, list_id)
+            pipe.hset(names_key, list_id, name)
+            self._bump(pipe, version, list_id, "lists")
+            return {"id": list_id, "name": name}
+
+        return self._transaction(write, names_key, name_keys_key)
+
+    def delete_list(self, list_id: int):
+        """Elimina la lista y sus ítems; devuelve la lista con sus contadores o ``None`` si no existe.
+
+        Lee los ítems del conjunto ordenado de la lista y borra sus claves en
+        la misma transacción: O(k) en el tamaño de la lista.
+        """
+        names_key, name_keys_key = self._key("list_names"), self._key("list_name_keys")
+        order_key = self._key("list", list_id, "items")
+
+        def write(pipe):
+            name, ids, completed = self._read(("hget", names_key, list_id), ("zrange", order_key, 0, -1),
+                                              ("hget", self._key("completed"), list_id))
+            if name is None:
+                return None
+            items = [item for item in self._items(ids) if item is not None]
+            version = self._new_version(pipe, "lists")
+            pipe.multi()
+            pipe.hdel(names_key, list_id)
+            pipe.hdel(name_keys_key, description_key(name))
+            pipe.zrem(self._key("lists"), list_id)
+            pipe.delete(order_key, self._key("list", list_id, "descriptions"))
+            for start in range(0, len(ids), 1000):
+                pipe.delete(*(self._key("item", item_id) for item_id in ids[start:start + 1000]))
+            for item in items:
+                self._unindex(pipe, item)
+            pipe.hdel(self._key("completed"), list_id)
+            pipe.delete(self._key("version", list_id))
+            self._bump(pipe, version, "lists")
+            return {"id": list_id, "name": name, "item_count": len(ids), "completed_count": int(completed or 0)}
+
+        return self._transaction(write, names_key, order_key, self._key("list", list_id, "descriptions"))
+
+    # Ítems
+
+    def next_item_id(self) -> int:
+        return self._redis.hincrby(self._key("sequences"), "items", 1)
+
+    def _items(self, ids) -> list[dict]:
+        if not ids:
+            return []
+        return [_load(value) for value in self._redis.mget([self._key("item", item_id) for item_id in ids])]
+
+    def get_items(self, list_id: int) -> list[dict]:
+        return self.page_items(list_id)
+
+    def page_items(self, list_id: int, after_id: int = None, limit: int = None, completed: bool = None,
+                   prefix: str = None, contains: str = None) -> list[dict]:
+        """Devuelve hasta ``limit`` ítems de la lista con ID mayor que ``after_id``.
+
+        Lee los IDs del conjunto ordenado de la lista desde el cursor y los
+        ítems con un ``MGET``; con filtros lee por tandas hasta llenar la página.
+        """
+        order_key = self._key("list", list_id, "items")
+        filtered = completed is not None or prefix or contains
+        if not filtered:
+            ids = self._redis.zrangebyscore(order_key, f"({after_id or 0}", "+inf",
+                                            start=0 if limit is not None else None, num=limit)
+            return self._items(ids)
+        page = []
+        while limit is None or len(page) < limit:
+            ids = self._redis.zrangebyscore(order_key, f"({after_id or 0}", "+inf", start=0, num=_SCAN_BATCH)
+            for item in self._items(ids):
+                if item is None or (completed is not None and item["completed"] != completed):
+                    continue
+                if prefix and not description_key(item["description"]).startswith(description_key(prefix)):
+                    continue
+                if contains and description_key(contains) not in description_key(item["description"]):
+                    continue
+                page.append(item)
+                if limit is not None and len(page) >= limit:
+                    break
+            if len(ids) < _SCAN_BATCH:
+                break
+            after_id = int(ids[-1])
+        return page
+
+    def get_item(self, list_id: int, item_id: int):
+        item = _load(self._redis.get(self._key("item", item_id)))
+        return item if item is not None and item["list_id"] == list_id else None
+
+    def find_by_description(self, list_id: int, description: str):
+        """Busca un ítem de la lista por descripción, sin distinguir mayúsculas."""
+        item_id = self._redis.hget(self._key("list", list_id, "descriptions"), description_key(description))
+        return self.get_item(list_id, int(item_id)) if item_id is not None else None
+
+    def search_items(self, query: str, list_id: int = None, limit: int = None) -> list[dict]:
+        """Ítems cuya descripción contiene las palabras de ``query``, por relevancia.
+
+        Intersecta los conjuntos de los términos (el último, como prefijo,
+        se expande con el vocabulario) y ordena las coincidencias como
+        ``SearchIndex``: el coste depende del número de coincidencias.
+        """
+        terms = tokenize(query)
+        if not terms:
+            return []
+        # ZRANGEBYLEX compara bytes: 0xff no aparece en UTF-8 y acota todos los términos con ese prefijo
+        prefix = terms[-1].encode()
+        expanded = self._redis.zrangebylex(self._key("terms"), b"[" + prefix, b"[" + prefix + b"\xff")
+        if not expanded:
+            return []
+        keys = [self._key("term", term) for term in dict.fromkeys(terms[:-1])]
+        with self._redis.pipeline() as pipe:
+            if len(expanded) == 1:
+                pipe.sinter(keys + [self._key("term", expanded[0])])
+            else:
+                # MULTI/EXEC es atómico: ninguna otra búsqueda ve esta clave temporal
+                union = self._key("search_union")
+                pipe.sunionstore(union, [self._key("term", term) for term in expanded])
+                pipe.sinter(keys + [union])
+                pipe.delete(union)
+            ids = pipe.execute()[0 if len(expanded) == 1 else 1]
+        items = [item for item in self._items(sorted(ids, key=int)) if item is not None
+                 and (list_id is None or item["list_id"] == list_id)]
+        return sorted(items, key=_search_length)[:limit]
+
+    def _index(self, pipe, item: dict):
+        for term in set(tokenize(item["description"])):
+            pipe.sadd(self._key("term", term), item["id"])
+            pipe.zadd(self._key("terms"), {term: 0})
+
+    def _unindex(self, pipe, item: dict):
+        # Los términos que se quedan sin ítems siguen en el vocabulario: al expandir un prefijo no encuentran nada
+        for term in set(tokenize(item["description"])):
+            pipe.srem(self._key("term", term), item["id"])
+
+    def add_item(self, item: dict) -> dict:
+        return self.add_items([item])[0]
+
+    def add_items(self, items: list[dict]) -> list[dict]:
+        """Añade varios ítems en una transacción; si alguno es inválido no se añade ninguno."""
+        if not items:
+            return []
+        list_ids = sorted({item["list_id"] for item in items})
+        descriptions_keys = [self._key("list", list_id, "descriptions") for list_id in list_ids]
+        item_keys = [self._key("item", item["id"]) for item in items]
+        keys = [(item["list_id"], description_key(item["description"])) for item in items]
+        keys_by_list = {list_id: [key for item_list, key in keys if item_list == list_id] for list_id in list_ids}
+
+        def write(pipe):
+            existing_lists, existing_items, last_id, *existing_descriptions = self._read(
+                ("hmget", self._key("list_names"), list_ids),
+                ("mget", item_keys),
+                ("hget", self._key("sequences"), "items"),
+                *(("hmget", descriptions_key, keys_by_list[list_id])
+                  for list_id, descriptions_key in zip(list_ids, descriptions_keys)),
+            )
+            lists = dict(zip(list_ids, existing_lists))
+            taken = {(list_id, key) for list_id, owners in zip(list_ids, existing_descriptions)
+                     for key, owner in zip(keys_by_list[list_id], owners) if owner is not None}
+            ids = set()
+            for item, key, existing in zip(items, keys, existing_items):
+                if lists[item["list_id"]] is None:
+                    raise ValueError("La lista del ítem no existe")
+                if existing is not None or item["id"] in ids:
+                    raise ValueError("Ya existe un ítem con ese ID")
+                if key in taken:
+                    raise ValueError("Ya existe un ítem con esta descripción en la lista")
+                ids.add(item["id"])
+                taken.add(key)
+            next_id = self._observe(pipe, "items", max(ids), last_id)
+            version = self._new_version(pipe, *list_ids)
+            pipe.multi()
+            for item, (list_id, key) in zip(items, keys):
+                pipe.set(self._key("item", item["id"]), _dump(item))
+                pipe.zadd(self._key("list", list_id, "items"), {item["id"]: item["id"]})
+                pipe.hset(self._key("list", list_id, "descriptions"), key, item["id"])
+                if item["completed"]:
+                    pipe.hincrby(self._key("completed"), list_id, 1)
+                self._index(pipe, item)
+            if next_id is not None:
+                pipe.hset(self._key("sequences"), "items", next_id)
+            self._bump(pipe, version, *list_ids)
+            return items
+
+        return self._transaction(write, self._key("list_names"), *descriptions_keys, *item_keys)
+
+    def update_item(self, list_id: int, item_id: int, changes: dict):
+        """Aplica ``changes`` al ítem y devuelve el ítem actualizado."""
+        return self.update_items(list_id, [(item_id, changes)])[0]
+
+    def update_items(self, list_id: int, updates: list[tuple[int, dict]]) -> list[dict]:
+        """Aplica ``(item_id, cambios)`` en orden y devuelve los ítems actualizados."""
+        descriptions_key = self._key("list", list_id, "descriptions")
+        item_keys = [self._key("item", item_id) for item_id, _ in updates]
+
+        new_keys = list({description_key(changes["description"]) for _, changes in updates if "description" in changes})
+
+        def write(pipe):
+            values, owners = self._read(("mget", item_keys), ("hmget", descriptions_key, new_keys or [""]))
+            owners = dict(zip(new_keys, owners))
+            current = {}
+            for (item_id, _), value in zip(updates, values):
+                item = _load(value)
+                if item is not None and item["list_id"] == list_id:
+                    current[item_id] = item
+            descriptions = {}
+            updated = []
+            writes = []
+            for item_id, changes in updates:
+                item = current.get(item_id)
+                if item is None:
+                    updated.append(None)
+                    continue
+                new = {**item, **changes}
+                if "description" in changes:
+                    old_key, new_key = description_key(item["description"]), description_key(changes["description"])
+                    owner = descriptions.get(new_key, owners[new_key])
+                    if owner is not None and int(owner) != item_id:
+                        raise ValueError("Ya existe un ítem con esta descripción en la lista")
+                    if old_key != new_key:
+                        descriptions[old_key] = None
+                    descriptions[new_key] = item_id
+                writes.append((item, new))
+                current[item_id] = new
+                updated.append(new)
+            version = self._new_version(pipe, list_id)
+            pipe.multi()
+            for old, new in writes:
+                pipe.set(self._key("item", new["id"]), _dump(new))
+                if old["description"] != new["description"]:
+                    self._unindex(pipe, old)
+                    self._index(pipe, new)
+                if old["completed"] != new["completed"]:
+                    pipe.hincrby(self._key("completed"), list_id, 1 if new["completed"] else -1)
+            removed = [key for key, owner in descriptions.items() if owner is None]
+            if removed:
+                pipe.hdel(descriptions_key, *removed)
+            added = {key: owner for key, owner in descriptions.items() if owner is not None}
+            if added:
+                pipe.hset(descriptions_key, mapping=added)
+            self._bump(pipe, version, list_id)
+            return updated
+
+        return self._transaction(write, descriptions_key, *item_keys)
+
+    def delete_item(self, list_id: int, item_id: int):
+        return self.delete_items(list_id, [item_id])[0]
+
+    def delete_items(self, list_id: int, item_ids: list[int]) -> list[dict]:
+        descriptions_key = self._key("list", list_id, "descriptions")
+        item_keys = [self._key("item", item_id) for item_id in item_ids]
+
+        def write(pipe):
+            deleted = []
+            seen = set()
+            owners = {}
+            for item_id, value in zip(item_ids, pipe.mget(item_keys)):
+                item = _load(value)
+                if item is None or item["list_id"] != list_id or item_id in seen:
+                    deleted.append(None)
+                    continue
+                seen.add(item_id)
+                deleted.append(item)
+            keys = [description_key(item["description"]) for item in filter(None, deleted)]
+            if keys:
+                owners.update(zip(keys, pipe.hmget(descriptions_key, keys)))
+            version = self._new_version(pipe, list_id)
+            pipe.multi()
+            for item in filter(None, deleted):
+                key = description_key(item["description"])
+                pipe.delete(self._key("item", item["id"]))
+                pipe.zrem(self._key("list", list_id, "items"), item["id"])
+                if owners[key] is not None and int(owners[key]) == item["id"]:
+                    pipe.hdel(descriptions_key, key)
+                if item["completed"]:
+                    pipe.hincrby(self._key("completed"), list_id, -1)
+                self._unindex(pipe, item)
+            self._bump(pipe, version, list_id)
+            return deleted
+
+        return self._transaction(write, descriptions_key, *item_keys)
@@ -0,0 +1,43 @@
+from typing import Optional
+
+from fastapi import APIRouter, Query, Request, status
+from app import services
+from app.models import TodoItem, TodoItemBatchResult, TodoItemByName, TodoItemsByName
+from app.cache import cached_response, make_etag
+from app.pagination import serialize_page
+
+router = APIRouter(prefix="/by-name/items",
+                   tags=["By name"],
+                   responses={404: {"description": "Not found"}})
+
+@router.get("/", response_model=list[TodoItem], summary="Obtener los ítems de una lista por su nombre")
+async def get_items(request: Request,
+                    list_name: str = Query(..., min_length=1, description="Nombre de la lista, sin distinguir mayúsculas ni acentos"),
+                    completed: Optional[bool] = Query(None, description="Filtrar por estado de completado")):
+    """Como ``GET /lists/{list_id}/items`` pero resolviendo la lista por su nombre en el servidor.
+
+    El ETag cambia con cualquier escritura, porque también un cambio de
+    nombre puede cambiar qué lista corresponde a ``list_name``.
+    """
+    version = await services.run(services.get_data_version)
+
+    async def build():
+        rows = await services.run(services.get_items_by_name, list_name, completed=completed)
+        return serialize_page(rows, None, None, TodoItem)
+
+    return await cached_response(request, make_etag("byname", version, request), build)
+
+@router.post("/", response_model=list[TodoItemBatchResult], status_code=status.HTTP_201_CREATED, summary="Añadir ítems a una lista por su nombre")
+async def create_items(body: TodoItemsByName):
+    """Añade varios ítems a la lista ``list_name`` (con ``create_list``, la crea si no existe)."""
+    return await services.run(services.create_items_by_name, body.list_name, body.items, body.create_list)
+
+@router.patch("/complete", response_model=TodoItem, summary="Completar un ítem por su descripción")
+async def complete_item(body: TodoItemByName):
+    """Marca como completado el ítem con esa descripción en la lista ``list_name``."""
+    return await services.run(services.complete_item_by_name, body.list_name, body.description)
+
+@router.delete("/", response_model=TodoItem, summary="Eliminar un ítem por su descripción")
+async def delete_item(body: TodoItemByName):
+    """Elimina el ítem con esa descripción de la lista ``list_name`` y lo devuelve."""
+    return await services.run(services.delete_item_by_name, body.list_name, body.description)
@@ -0,0 +1,88 @@
+import json
+from typing import Optional
+
+from fastapi import APIRouter, Header, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from app.changes import feed
+from app.models import ChangePage
+from app.pagination import MAX_PAGE_SIZE
+
+router = APIRouter(prefix="/changes", tags=["Changes"])
+
+# Segundos sin eventos tras los que el stream envía un comentario para mantener viva la conexión
+HEARTBEAT_SECONDS = 15
+
+
+@router.get("/", response_model=ChangePage, summary="Obtener los cambios posteriores a una secuencia")
+async def get_changes(since: Optional[int] = Query(None, ge=0, description="Última secuencia recibida; sin ella devuelve solo la secuencia actual"),
+                      list_id: Optional[int] = Query(None, description="Solo los cambios de esta lista"),
+                      limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE, description="Máximo de cambios"),
+                      wait: float = Query(0, ge=0, le=30, description="Segundos a esperar si no hay cambios (long polling)"),
+                      epoch: Optional[str] = Query(None, description="Epoch recibida junto a la secuencia")):
+    """Devuelve los cambios posteriores a ``since`` y la secuencia desde la que continuar.
+
+    Para mantener una copia local: pedir la secuencia actual (sin ``since``),
+    descargar los datos y después pedir los cambios desde esa secuencia,
+    enviando también la ``epoch`` recibida. Si ``since`` es tan antigua que
+    sus cambios ya se descartaron, o ``epoch`` es de otro proceso (el
+    servidor se reinició u otro worker atiende la petición), responde 410.
+    """
+    if since is None:
+        return {"epoch": feed.epoch, "seq": feed.seq, "changes": []}
+    changes, seq = feed.since(since, list_id, limit, epoch)
+    if not changes and wait:
+        await feed.wait(since, wait)
+        changes, seq = feed.since(since, list_id, limit, epoch)
+    return {"epoch": feed.epoch, "seq": seq, "changes": changes}
+
+
+def _format_event(event: dict) -> str:
+    data = json.dumps(event, ensure_ascii=False, separators=(",", ":"))
+    return f"id: {feed.epoch}:{event['seq']}\nevent: {event['type']}\ndata: {data}\n\n"
+
+
+def _parse_event_id(last_event_id: str) -> tuple[Optional[str], Optional[int]]:
+    """``"epoch:seq"`` -> ``(epoch, seq)``; ``(None, None)`` si no tiene ese formato."""
+    epoch, _, seq = last_event_id.rpartition(":")
+    if not epoch or not seq.isdigit():
+        return None, None
+    return epoch, int(seq)
+
+
+@router.get("/stream", summary="Recibir los cambios en tiempo real (Server-Sent Events)")
+async def stream_changes(request: Request,
+                         since: Optional[int] = Query(None, ge=0, description="Última secuencia recibida"),
+                         list_id: Optional[int] = Query(None, description="Solo los cambios de esta lista"),
+                         epoch: Optional[str] = Query(None, description="Epoch recibida junto a la secuencia"),
+                         last_event_id: Optional[str] = Header(None, description="Reanudación automática de EventSource")):
+    """Envía cada cambio como un evento SSE cuyo ``id`` es ``epoch:secuencia``.
+
+    Sin ``since`` empieza por los cambios nuevos. Al reconectar, ``EventSource``
+    envía ``Last-Event-ID`` y el stream continúa donde se quedó. Si esos
+    cambios ya se descartaron o son de otro proceso responde 410 (o envía un
+    evento ``expired`` si se descartan durante el stream).
+    """
+    if since is None and last_event_id:
+        epoch, since = _parse_event_id(last_event_id)
+        if since is None:
+            raise HTTPException(status_code=410, detail="Last-Event-ID no es de este servidor; vuelve a descargar los datos")
+    if since is None:
+        since = feed.seq
+    # Valida la secuencia antes de empezar a responder: 410 si ya no está disponible
+    feed.since(since, list_id, limit=1, epoch=epoch)
+
+    async def events():
+        seq = since
+        while not await request.is_disconnected():
+            try:
+                changes, seq = feed.since(seq, list_id, MAX_PAGE_SIZE)
+            except HTTPException:
+                yield "event: expired\ndata: {}\n\n"
+                return
+            for event in changes:
+                yield _format_event(event)
+            if not changes and not await feed.wait(seq, HEARTBEAT_SECONDS):
+                yield ": ping\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
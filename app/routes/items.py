@@ -1,149 +1,80 @@
-from fastapi import APIRouter, HTTPException, status
-from app.models import TodoItem, TodoItemCreate, TodoItemUpdate
-from app.routes.lists import fake_lists_db
+from typing import Optional
+
+from fastapi import APIRouter, Query, Request, status
+from app import services
+from app.models import (TodoItem, TodoItemBatchResult, TodoItemBatchUpdate, TodoItemCreate, TodoItemIds,
+                        TodoItemUpdate)
+from app.cache import cached_response, make_etag
+from app.pagination import MAX_PAGE_SIZE, decode_cursor, parse_fields, serialize_page
 
 router = APIRouter(prefix="/lists/{list_id}/items",
                     tags=["Items"],
                     responses={404: {"description": "Not found"}})
 
-# Base de datos falsa para pruebas
-fake_items_db = [
-    {"id": 1,"list_id": 1, "description": "Portátil de 15 pulgadas", "completed": False},
-    {"id": 2,"list_id": 1,  "description": "Smartphone Android", "completed": True},
-    {"id": 3,"list_id": 2, "description": "Lavar los platos de la cena", "completed": False},
-    {"id": 4,"list_id": 2, "description": "Comprar frutas y verduras", "completed": True}
-]
+@router.get("/", response_model=list[TodoItem], summary="Obtener todos los ítems de una lista")
+async def get_items(list_id: int, request: Request,
+              limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Máximo de ítems por página"),
+              cursor: Optional[str] = Query(None, description="Cursor de la cabecera X-Next-Cursor de la página anterior"),
+              completed: Optional[bool] = Query(None, description="Filtrar por estado de completado"),
+              prefix: Optional[str] = Query(None, description="Filtrar por inicio de la descripción"),
+              contains: Optional[str] = Query(None, description="Filtrar por texto contenido en la descripción"),
+              fields: Optional[str] = Query(None, description="Campos a devolver separados por comas, p. ej. id,description")):
+    """Obtiene los ítems de una lista específica por su ID.
+
+    Sin ``limit`` devuelve todos los ítems. Con ``limit`` devuelve una página y,
+    si hay más, el cursor de la siguiente en la cabecera ``X-Next-Cursor``.
+    La respuesta lleva ``ETag``: con ``If-None-Match`` se responde 304 si la
+    lista no ha cambiado.
+    """
+    selected_fields = parse_fields(fields, TodoItem)
+    after_id = decode_cursor(cursor)
+    # La versión se lee antes que los datos: la caché nunca guarda datos más viejos que su ETag
+    version = await services.run(services.get_list_version, list_id)
 
-def get_next_id():
-    return max(item["id"] for item in fake_items_db) + 1 if fake_items_db else 1
+    async def build():
+        rows = await services.run(services.get_items, list_id, after_id=after_id,
+                                  limit=limit + 1 if limit else None,
+                                  completed=completed, prefix=prefix, contains=contains)
+        return serialize_page(rows, limit, selected_fields, TodoItem)
 
-@router.get("/", response_model=list[TodoItem], summary="Obtener todos los ítems de una lista")
-def get_items(list_id: int):
-    """Obtiene todos los ítems de una lista específica por su ID."""
-    # Verificar que la lista exista
-    if not any(lst["id"] == list_id for lst in fake_lists_db):
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Lista con ID {list_id} no encontrada"
-        )
-    return [item for item in fake_items_db if item["list_id"] == list_id]
+    return await cached_response(request, make_etag(f"items{list_id}", version, request), build)
 
 @router.post("/", response_model=TodoItem, status_code=status.HTTP_201_CREATED, summary="Crear un nuevo ítem en la lista")
-def create_item(list_id: int, item: TodoItemCreate):
+async def create_item(list_id: int, item: TodoItemCreate):
     """Crea un nuevo ítem con su descripcion y el bool completed en una lista específica por su ID."""
-    # Validar que la lista exista
-    if not any(lst["id"] == list_id for lst in fake_lists_db):
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Lista con ID {list_id} no encontrada"
-        )
-    
-    # Validar que no exista un ítem con la misma descripción en la lista
-    description = item.description.strip()
-    if any(i["list_id"] == list_id and i["description"].lower() == description.lower() for i in fake_items_db):
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Ya existe un ítem con esta descripción en la lista"
-        )
+    return await services.run(services.create_item, list_id, item)
 
-    new_item = {
-        "id": get_next_id(),
-        "list_id": list_id,
-        "description": description,
-        "completed": item.completed  # Usar el valor del modelo
-    }
-    fake_items_db.append(new_item)
-    return new_item
+@router.post("/batch", response_model=list[TodoItemBatchResult], status_code=status.HTTP_201_CREATED, summary="Crear varios ítems en la lista")
+async def create_items(list_id: int, items: list[TodoItemCreate]):
+    """Crea varios ítems de una vez. Si alguna fila es inválida no se crea ninguno y se devuelve el resultado de cada fila."""
+    return await services.run(services.create_items, list_id, items)
+
+@router.put("/batch", response_model=list[TodoItemBatchResult], summary="Actualizar varios ítems de la lista")
+async def update_items(list_id: int, updates: list[TodoItemBatchUpdate]):
+    """Actualiza varios ítems de una vez. Si alguna fila es inválida no se modifica ninguno."""
+    return await services.run(services.update_items, list_id, updates)
+
+@router.patch("/batch/complete", response_model=list[TodoItemBatchResult], summary="Marcar varios ítems como completados")
+async def complete_items(list_id: int, body: TodoItemIds):
+    """Marca varios ítems como completados. Si algún ID no existe no se modifica ninguno."""
+    return await services.run(services.complete_items, list_id, body.ids)
+
+@router.delete("/batch", response_model=list[TodoItemBatchResult], summary="Eliminar varios ítems de la lista")
+async def delete_items(list_id: int, body: TodoItemIds):
+    """Elimina varios ítems. Si algún ID no existe no se elimina ninguno."""
+    return await services.run(services.delete_items, list_id, body.ids)
 
 @router.put("/{item_id}", response_model=TodoItem, summary="Actualizar un ítem de la lista")
-def update_item(list_id: int, item_id: int, item_update: TodoItemUpdate):
+async def update_item(list_id: int, item_id: int, item_update: TodoItemUpdate):
     """Actualiza un ítem existente en una lista específica por su ID."""
-    # Verificar que la lista exista
-    if not any(lst["id"] == list_id for lst in fake_lists_db):
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Lista con ID {list_id} no encontrada"
-        )
-    # Buscar el ítem y su índice de una vez
-    item_index = None
-    item = None
-    for i, current_item in enumerate(fake_items_db):
-        if current_item["id"] == item_id and current_item["list_id"] == list_id:
-            item_index = i
-            item = current_item
-            break
-    
-    if item is None:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Ítem con ID {item_id} no encontrado en la lista {list_id}"
-        )
-    # Validar que al menos uno de los campos a actualizar esté presente
-    update_data = item_update.model_dump(exclude_unset=True)  
-    if not update_data:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Debe proporcionar al menos un campo para actualizar"
-        )
-    
-    # Validar descripción duplicada si se está actualizando
-    if "description" in update_data:
-        new_description = update_data["description"].strip()
-        # Verificar que no exista otro ítem con la misma descripción en la lista excluyendo el actual
-        if any(i["list_id"] == list_id and i["description"].lower() == new_description.lower() for i in fake_items_db if i["id"] != item_id):
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Ya existe un ítem con esta descripción en la lista"
-            )
-        update_data["description"] = new_description
-
-    # Actualizar el ítem
-    fake_items_db[item_index].update(update_data)
-    return fake_items_db[item_index] 
+    return await services.run(services.update_item, list_id, item_id, item_update)
 
 @router.delete("/{item_id}", status_code=status.HTTP_204_NO_CONTENT, summary="Eliminar un ítem de la lista")
-def delete_item(list_id: int, item_id: int):
+async def delete_item(list_id: int, item_id: int):
     """Elimina un ítem existente en una lista específica por su ID."""
-    # Verificar que la lista exista
-    if not any(lst["id"] == list_id for lst in fake_lists_db):
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Lista con ID {list_id} no encontrada"
-        )
-    # Buscar el ítem y su índice de una vez
-    item_index = None
-    for i, item in enumerate(fake_items_db):
-        if item["id"] == item_id and item["list_id"] == list_id:
-            item_index = i
-            break
-    if item_index is None:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Ítem con ID {item_id} no encontrado en la lista {list_id}"
-        )
-    # Eliminar el ítem
-    del fake_items_db[item_index]
+    await services.run(services.delete_item, list_id, item_id)
 
 @router.patch("/{item_id}/complete", response_model=TodoItem, summary="Marcar un ítem como completado")
-def complete_item(list_id: int, item_id: int):
+async def complete_item(list_id: int, item_id: int):
     """Marca un ítem existente como completado en una lista específica por su ID."""
-    # Verificar que la lista exista
-    if not any(lst["id"] == list_id for lst in fake_lists_db):
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Lista con ID {list_id} no encontrada"
-        )
-    # Buscar el ítem y su índice de una vez
-    item_index = None
-    for i, item in enumerate(fake_items_db):
-        if item["id"] == item_id and item["list_id"] == list_id:
-            item_index = i
-            break
-    if item_index is None:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Ítem con ID {item_id} no encontrado en la lista {list_id}"
-        )
-    # Marcar el ítem como completado
-    fake_items_db[item_index]["completed"] = True
-    return fake_items_db[item_index]
\ No newline at end of file
+    return await services.run(services.complete_item, list_id, item_id)
@@ -1,29 +1,78 @@
-from fastapi import APIRouter
-from app.models import TodoList, TodoListCreate
+from typing import Optional
+
+from fastapi import APIRouter, Query, Request, status
+from app import services
+from app.models import TodoList, TodoListCreate, TodoListSnapshot, TodoListStats, TodoListUpdate, TodoListWithCounts
+from app.cache import cached_response, make_etag
+from app.pagination import MAX_PAGE_SIZE, decode_cursor, dumps, parse_fields, serialize_page
 
 router = APIRouter(prefix="/lists", tags=["Lists"])
 
-# Base de datos falsa para pruebas
-fake_lists_db = [
-    {"id": 1, "name": "Trabajo"},
-    {"id": 2, "name": "Casa"}
-]
+@router.get("/", response_model=list[TodoList])
+async def get_lists(request: Request,
+              limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Máximo de listas por página"),
+              cursor: Optional[str] = Query(None, description="Cursor de la cabecera X-Next-Cursor de la página anterior"),
+              fields: Optional[str] = Query(None, description="Campos a devolver separados por comas, p. ej. id,name"),
+              include_counts: bool = Query(False, description="Añadir item_count y completed_count a cada lista")):
+    """Obtiene las listas. Con ``limit`` pagina por cursor y usa ETag igual que los ítems.
+
+    Con ``include_counts`` cada lista lleva sus contadores de ítems; el ETag
+    cambia entonces con cualquier escritura, no solo al crear listas.
+    """
+    model = TodoListWithCounts if include_counts else TodoList
+    selected_fields = parse_fields(fields, model)
+    after_id = decode_cursor(cursor)
+    if include_counts:
+        version = await services.run(services.get_data_version)
+    else:
+        version = await services.run(services.get_lists_version)
 
-def get_next_id():
-    return max(item["id"] for item in fake_lists_db) + 1 if fake_lists_db else 1
+    async def build():
+        rows = await services.run(services.get_lists, after_id=after_id, limit=limit + 1 if limit else None,
+                                  include_counts=include_counts)
+        return serialize_page(rows, limit, selected_fields, model)
 
-@router.get("/", response_model=list[TodoList])
-def get_lists():
-    return fake_lists_db
+    return await cached_response(request, make_etag("lists", version, request), build)
 
 @router.post("/", response_model=TodoList, status_code=201)
-def create_list(list: TodoListCreate):
+async def create_list(list: TodoListCreate):
     """Crea una nueva lista de tareas."""
-    new_list =  {
-        "id": get_next_id(),
-        "name": list.name.strip()
-    }
-    if any(l["name"].lower() == new_list["name"].lower() for l in fake_lists_db):
-        raise ValueError("Ya existe una lista con este nombre")
-    fake_lists_db.append(new_list)
-    return new_list
+    return await services.run(services.create_list, list)
+
+@router.get("/snapshot", response_model=list[TodoListSnapshot])
+async def get_snapshot(request: Request,
+                       include_open_items: bool = Query(False, description="Añadir los ítems pendientes de cada lista"),
+                       items_per_list: int = Query(50, ge=1, le=MAX_PAGE_SIZE, description="Máximo de ítems pendientes por lista")):
+    """Obtiene en una sola petición todas las listas con sus contadores y, si se pide, sus ítems pendientes.
+
+    Si ``item_count - completed_count`` es mayor que ``items_per_list``, la
+    lista tiene más pendientes de los devueltos. El ETag cambia con
+    cualquier escritura.
+    """
+    version = await services.run(services.get_data_version)
+
+    async def build():
+        rows = await services.run(services.get_snapshot, include_open_items, items_per_list)
+        return serialize_page(rows, None, None, TodoListSnapshot)
+
+    return await cached_response(request, make_etag("snapshot", version, request), build)
+
+@router.patch("/{list_id}", response_model=TodoList)
+async def rename_list(list_id: int, list: TodoListUpdate):
+    """Cambia el nombre de la lista (único sin distinguir mayúsculas)."""
+    return await services.run(services.rename_list, list_id, list)
+
+@router.delete("/{list_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_list(list_id: int):
+    """Elimina la lista y todos sus ítems."""
+    await services.run(services.delete_list, list_id)
+
+@router.get("/{list_id}/stats", response_model=TodoListStats)
+async def get_list_stats(list_id: int, request: Request):
+    """Obtiene cuántos ítems tiene la lista y cuántos están completados, sin descargarlos."""
+    version = await services.run(services.get_list_version, list_id)
+
+    async def build():
+        return dumps(await services.run(services.get_list_stats, list_id)), {}
+
+    return await cached_response(request, make_etag(f"stats{list_id}", version, request), build)
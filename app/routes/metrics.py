@@ -0,0 +1,11 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app import metrics
+
+router = APIRouter(tags=["Metrics"])
+
+@router.get("/metrics", response_class=PlainTextResponse, summary="Métricas en formato Prometheus")
+async def get_metrics():
+    """Latencias por ruta, peticiones por código de estado y tiempos de las operaciones del almacén."""
+    return PlainTextResponse(metrics.render(), media_type=metrics.CONTENT_TYPE)
@@ -0,0 +1,21 @@
+from typing import Optional
+
+from fastapi import APIRouter, Query, Response
+from app import services
+from app.models import TodoItem
+from app.pagination import MAX_PAGE_SIZE, serialize_page
+
+router = APIRouter(prefix="/search", tags=["Search"])
+
+@router.get("/", response_model=list[TodoItem], summary="Buscar ítems por su descripción")
+async def search_items(q: str = Query(..., min_length=1, description="Palabras a buscar"),
+                       list_id: Optional[int] = Query(None, description="Limitar la búsqueda a una lista"),
+                       limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE, description="Máximo de resultados")):
+    """Busca ítems en todas las listas, sin distinguir mayúsculas ni acentos.
+
+    Devuelve los ítems que contienen todas las palabras de ``q`` (la última
+    también como prefijo), del más al menos relevante.
+    """
+    rows = await services.run(services.search_items, q, list_id=list_id, limit=limit)
+    body, _ = serialize_page(rows, None, None, TodoItem)
+    return Response(content=body, media_type="application/json")
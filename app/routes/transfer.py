@@ -0,0 +1,117 @@
+import json
+import tempfile
+
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+
+from app import services
+from app.models import ImportResult, TodoItem, TodoList
+from app.ndjson import BATCH_SIZE, encode_batches, invalid_line, iter_records
+
+router = APIRouter(tags=["Export"])
+
+RECORD_MODELS = {"list": TodoList, "item": TodoItem}
+
+@router.get("/export", summary="Exportar todas las listas e ítems en NDJSON")
+async def export_data(gzip: bool = Query(False, description="Comprimir la exportación con gzip")):
+    """Devuelve un registro JSON por línea: primero las listas y luego los ítems.
+
+    La respuesta se genera por lotes mientras se envía, así que la memoria
+    usada no depende del tamaño de los datos.
+    """
+    filename = "todolist.ndjson.gz" if gzip else "todolist.ndjson"
+    return StreamingResponse(
+        encode_batches(services.export_records(BATCH_SIZE), compress=gzip),
+        media_type="application/gzip" if gzip else "application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+async def _validated_rows(records):
+    """Valida cada registro y genera ``(número de línea, tipo, fila)``."""
+    async for line_number, record in records:
+        record_type = record.get("type")
+        model = RECORD_MODELS.get(record_type)
+        if model is None:
+            raise invalid_line(line_number, "el campo type debe ser 'list' o 'item'")
+        try:
+            row = model.model_validate(record)
+        except ValidationError as e:
+            error = e.errors()[0]
+            raise invalid_line(line_number, f"{'.'.join(map(str, error['loc']))}: {error['msg']}")
+        yield line_number, record_type, row
+
+
+async def _insert(rows) -> dict:
+    """Inserta las filas por lotes del mismo tipo; devuelve cuántas listas e ítems insertó."""
+    counts = {"lists": 0, "items": 0}
+    batch = []
+    batch_type = None
+    first_line = None
+
+    async def flush():
+        if not batch:
+            return
+        operation = services.import_lists if batch_type == "list" else services.import_items
+        try:
+            counts[f"{batch_type}s"] += await services.run(operation, batch)
+        except HTTPException as e:
+            raise HTTPException(status_code=e.status_code,
+                                detail=f"Líneas {first_line}-{first_line + len(batch) - 1}: {e.detail}")
+
+    async for line_number, record_type, row in rows:
+        if record_type != batch_type or len(batch) >= BATCH_SIZE:
+            await flush()
+            batch, batch_type, first_line = [], record_type, line_number
+        batch.append(row)
+    await flush()
+    return counts
+
+
+def _spool(file, line_number: int, record_type: str, record: dict):
+    file.write(json.dumps([line_number, record_type, record], ensure_ascii=False).encode() + b"\n")
+
+
+async def _read_spool(file):
+    """Lee las filas guardadas con ``_spool`` (ya validadas: no se vuelven a validar)."""
+    file.seek(0)
+    for line in file:
+        line_number, record_type, record = json.loads(line)
+        yield line_number, record_type, RECORD_MODELS[record_type].model_construct(**record)
+
+
+def _backup(file):
+    for batch in services.export_records(BATCH_SIZE):
+        for record in batch:
+            record = dict(record)
+            _spool(file, 0, record.pop("type"), record)
+
+
+@router.post("/import", response_model=ImportResult, summary="Importar listas e ítems desde NDJSON")
+async def import_data(request: Request,
+                      replace: bool = Query(False, description="Vaciar el almacén antes de importar")):
+    """Importa un fichero generado por ``/export`` (NDJSON, opcionalmente gzip).
+
+    El cuerpo se lee y se inserta por lotes a medida que llega. Sin
+    ``replace`` la importación no es atómica: si una línea es inválida se
+    devuelve 400 y los lotes anteriores ya quedan guardados.
+
+    Con ``replace`` el cuerpo se valida entero antes de tocar el almacén,
+    guardando las filas en un fichero temporal (la memoria sigue sin
+    depender del tamaño). Si la inserción falla después de vaciarlo (IDs o
+    nombres repetidos en el fichero), se restaura el contenido anterior.
+    """
+    rows = _validated_rows(iter_records(request.stream()))
+    if not replace:
+        return await _insert(rows)
+    with tempfile.TemporaryFile() as staged, tempfile.TemporaryFile() as backup:
+        async for line_number, record_type, row in rows:
+            _spool(staged, line_number, record_type, row.model_dump())
+        await services.run(_backup, backup)
+        await services.run(services.clear_store)
+        try:
+            return await _insert(_read_spool(staged))
+        except HTTPException:
+            await services.run(services.clear_store)
+            await _insert(_read_spool(backup))
+            raise
@@ -0,0 +1,142 @@
+"""Índice invertido para buscar ítems por las palabras de su descripción."""
+import re
+import threading
+import unicodedata
+from bisect import bisect_left, insort
+
+_WORD = re.compile(r"[^\W_]+")
+
+
+def tokenize(text: str) -> list[str]:
+    """Divide un texto en palabras sin acentos y en minúsculas.
+
+    ``"Comprar LIMÓN"`` y ``"comprar limon"`` producen los mismos términos.
+    La ``ñ`` se normaliza a ``n``, igual que el tokenizador ``unicode61`` de
+    SQLite con ``remove_diacritics``.
+    """
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return _WORD.findall(stripped)
+
+
+def fold(text: str) -> str:
+    """Texto comparable sin mayúsculas, acentos ni puntuación: ``"¡Limón!"`` -> ``"limon"``."""
+    return " ".join(tokenize(text))
+
+
+class SearchIndex:
+    """Índice invertido que se actualiza en cada escritura.
+
+    La búsqueda exige todos los términos de la consulta; el último también
+    vale como prefijo (``"lec"`` encuentra ``"leche"``).
+
+    Orden de los resultados: las descripciones son cortas, así que cada
+    término cuenta una vez (BM25 con frecuencia binaria). Con todos los
+    términos exigidos, la puntuación BM25 solo depende de la longitud de la
+    descripción: primero las más cortas, que son las más específicas; a igual
+    longitud, en orden de indexación.
+
+    Para no puntuar todas las coincidencias, cada término guarda sus ítems
+    agrupados por longitud (``término -> {longitud: {item_id: None}}``). La
+    búsqueda recorre el término con menos ítems de la longitud menor a la
+    mayor y se detiene al llenar ``limit``: con términos frecuentes el coste
+    depende del tamaño de la página, no del número de coincidencias.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._postings = {}
+        self._lengths = {}
+        # Términos ordenados, agrupados por sus dos primeras letras, para
+        # resolver prefijos sin mantener un único vocabulario enorme ordenado
+        self._vocabulary = {}
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def add(self, item_id: int, text: str):
+        terms = tokenize(text)
+        length = len(terms)
+        with self._lock:
+            self._lengths[item_id] = length
+            for term in set(terms):
+                by_length = self._postings.get(term)
+                if by_length is None:
+                    by_length = self._postings[term] = {}
+                    insort(self._vocabulary.setdefault(term[:2], []), term)
+                by_length.setdefault(length, {})[item_id] = None
+
+    def remove(self, item_id: int, text: str):
+        with self._lock:
+            length = self._lengths.pop(item_id, None)
+            if length is None:
+                return
+            for term in set(tokenize(text)):
+                by_length = self._postings.get(term)
+                bucket = by_length.get(length) if by_length else None
+                if bucket is None:
+                    continue
+                bucket.pop(item_id, None)
+                if not bucket:
+                    del by_length[length]
+                if not by_length:
+                    del self._postings[term]
+                    terms = self._vocabulary[term[:2]]
+                    del terms[bisect_left(terms, term)]
+                    if not terms:
+                        del self._vocabulary[term[:2]]
+
+    def _expand(self, prefix: str) -> list[str]:
+        if len(prefix) < 2:
+            return [term for key, terms in self._vocabulary.items() if key.startswith(prefix) for term in terms]
+        terms = self._vocabulary.get(prefix[:2], [])
+        start = bisect_left(terms, prefix)
+        end = start
+        while end < len(terms) and terms[end].startswith(prefix):
+            end += 1
+        return terms[start:end]
+
+    def _size(self, group: list[str]) -> int:
+        return sum(len(bucket) for term in group for bucket in self._postings[term].values())
+
+    def search(self, query: str, limit: int = None, accept=None) -> list[int]:
+        """Devuelve los IDs de los ítems que coinciden, del más al menos relevante.
+
+        ``accept(item_id)`` permite descartar candidatos (por ejemplo, de otra lista).
+        """
+        terms = tokenize(query)
+        if not terms:
+            return []
+        with self._lock:
+            # Cada grupo es una lista de términos alternativos; solo el último tiene varios
+            groups = [[term] for term in dict.fromkeys(terms[:-1])] + [self._expand(terms[-1])]
+            groups = [[term for term in group if term in self._postings] for group in groups]
+            if not all(groups):
+                return []
+            groups.sort(key=self._size)
+            driver, others = groups[0], groups[1:]
+            lengths = sorted({length for term in driver for length in self._postings[term]})
+            results = []
+            seen = set() if len(driver) > 1 else None
+            for length in lengths:
+                for term in driver:
+                    for item_id in self._postings[term].get(length, ()):
+                        if seen is not None:
+                            if item_id in seen:
+                                continue
+                            seen.add(item_id)
+                        if not all(any(item_id in self._postings[other].get(length, ()) for other in group)
+                                   for group in others):
+                            continue
+                        if accept is not None and not accept(item_id):
+                            continue
+                        results.append(item_id)
+                        if limit is not None and len(results) >= limit:
+                            return results
+            return results
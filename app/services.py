@@ -0,0 +1,607 @@
+"""Reglas de negocio de listas e ítems, compartidas por los routers y el servidor MCP.
+
+Los errores se lanzan como ``HTTPException``: los routers los devuelven tal
+cual y el transporte en proceso del servidor MCP los convierte al mismo
+formato de error que ``async_safe_request``.
+
+Cada operación de escritura valida y escribe con el candado de su lista
+(``store.lock_list``), así dos peticiones concurrentes no pueden crear
+descripciones duplicadas en la misma lista.
+"""
+from functools import partial
+
+from anyio import to_thread
+from fastapi import HTTPException, status
+
+from app import metrics
+from app.changes import feed
+from app.database import store
+from app.models import (TodoItem, TodoItemBatchUpdate, TodoItemCreate, TodoItemUpdate, TodoList, TodoListCreate,
+                        TodoListUpdate)
+from app.search import fold
+from app.store import description_key
+
+# Mide las operaciones del camino caliente: lookup, duplicate_check, read, search y write
+timed = metrics.STORE_OPERATION_SECONDS.time
+
+
+def _run_and_sync(operation, *args, **kwargs):
+    try:
+        return operation(*args, **kwargs)
+    finally:
+        # Fuera de los candados de las listas: las esperas de fsync se agrupan
+        store.sync()
+
+
+async def run(operation, *args, **kwargs):
+    """Ejecuta una operación de este módulo desde código asíncrono.
+
+    Con un almacén bloqueante (SQLite, o en memoria con ``fsync`` en cada
+    escritura) la operación completa se ejecuta en un hilo de trabajo, en un
+    único salto; con el almacén en memoria se ejecuta directamente en el
+    bucle de eventos. Antes de responder espera a que sus escrituras sean
+    duraderas (``store.sync()``).
+    """
+    if store.blocking:
+        return await to_thread.run_sync(partial(_run_and_sync, operation, *args, **kwargs))
+    return _run_and_sync(operation, *args, **kwargs)
+
+
+def list_not_found(list_id: int) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail=f"Lista con ID {list_id} no encontrada"
+    )
+
+
+def ensure_list_exists(list_id: int):
+    with timed("lookup"):
+        exists = store.list_exists(list_id)
+    if not exists:
+        raise list_not_found(list_id)
+
+
+def item_not_found(list_id: int, item_id: int) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail=f"Ítem con ID {item_id} no encontrado en la lista {list_id}"
+    )
+
+
+def duplicate_description() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="Ya existe un ítem con esta descripción en la lista"
+    )
+
+
+def duplicate_list_name() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="Ya existe una lista con este nombre"
+    )
+
+
+def blank_list_name() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="El nombre de la lista no puede estar vacío"
+    )
+
+
+def publish_items(event_type: str, list_id: int, items: list[dict]):
+    """Publica un evento por ítem en el registro de cambios (con copias: los ítems en memoria son mutables)."""
+    for item in items:
+        feed.publish(event_type, list_id, item=dict(item))
+
+
+def publish_results(event_type: str, list_id: int, results: list[dict]):
+    publish_items(event_type, list_id, [result["item"] for result in results])
+
+
+# Versiones (para ETags y caché de lecturas)
+
+def get_lists_version() -> int:
+    return store.lists_version()
+
+
+def get_data_version() -> int:
+    return store.data_version()
+
+
+def get_list_version(list_id: int) -> int:
+    version = store.list_version(list_id)
+    if version is None:
+        raise list_not_found(list_id)
+    return version
+
+
+# Listas
+
+def get_lists(after_id: int = None, limit: int = None, include_counts: bool = False) -> list[dict]:
+    with timed("read"):
+        return store.page_lists(after_id=after_id, limit=limit, counts=include_counts)
+
+
+def get_list_stats(list_id: int) -> dict:
+    """Resumen de la lista a partir de los contadores del almacén, sin recorrer sus ítems."""
+    with timed("lookup"):
+        counts = store.list_counts(list_id)
+    if counts is None:
+        raise list_not_found(list_id)
+    item_count, completed_count = counts
+    return {
+        "list_id": list_id,
+        "item_count": item_count,
+        "completed_count": completed_count,
+        "pending_count": item_count - completed_count,
+    }
+
+
+def create_list(new_list: TodoListCreate) -> dict:
+    name = new_list.name.strip()
+    if not name:
+        raise blank_list_name()
+    with store.lock_lists():
+        # Índice de nombres normalizados del almacén: no recorre las listas
+        with timed("duplicate_check"):
+            duplicate = store.find_list_by_name(name)
+        if duplicate is not None:
+            raise duplicate_list_name()
+        try:
+            with timed("write"):
+                created = store.add_list({
+                    "id": store.next_list_id(),
+                    "name": name
+                })
+        except ValueError:
+            # Otro proceso usó el mismo nombre (índice único de SQLite o transacción de Redis)
+            raise duplicate_list_name()
+        feed.publish("list_created", created["id"], list=dict(created))
+        return created
+
+
+def rename_list(list_id: int, list_update: TodoListUpdate) -> dict:
+    name = list_update.name.strip()
+    if not name:
+        raise blank_list_name()
+    with store.lock_lists():
+        with timed("duplicate_check"):
+            duplicate = store.find_list_by_name(name)
+        if duplicate is not None and duplicate["id"] != list_id:
+            raise duplicate_list_name()
+        try:
+            with timed("write"):
+                renamed = store.rename_list(list_id, name)
+        except ValueError:
+            # Otro proceso usó el mismo nombre (índice único de SQLite o transacción de Redis)
+            raise duplicate_list_name()
+        if renamed is None:
+            raise list_not_found(list_id)
+        feed.publish("list_updated", list_id, list=dict(renamed))
+        return renamed
+
+
+def delete_list(list_id: int) -> dict:
+    """Elimina la lista con todos sus ítems; devuelve la lista con los contadores que tenía.
+
+    Un único evento ``list_deleted``: los clientes descartan los ítems de la lista.
+    """
+    with store.lock_lists(), store.lock_list(list_id):
+        with timed("write"):
+            deleted = store.delete_list(list_id)
+        if deleted is None:
+            raise list_not_found(list_id)
+        feed.publish("list_deleted", list_id, list=dict(deleted))
+        return deleted
+
+
+# Ítems
+
+def get_items(list_id: int, after_id: int = None, limit: int = None, completed: bool = None,
+              prefix: str = None, contains: str = None) -> list[dict]:
+    # Verificar que la lista exista
+    ensure_list_exists(list_id)
+    with timed("read"):
+        return store.page_items(list_id, after_id=after_id, limit=limit,
+                                completed=completed, prefix=prefix, contains=contains)
+
+
+def search_items(query: str, list_id: int = None, limit: int = None) -> list[dict]:
+    if list_id is not None:
+        ensure_list_exists(list_id)
+    with timed("search"):
+        return store.search_items(query, list_id=list_id, limit=limit)
+
+
+def create_item(list_id: int, item: TodoItemCreate) -> dict:
+    with store.lock_list(list_id):
+        # Validar que la lista exista
+        ensure_list_exists(list_id)
+
+        # Validar que no exista un ítem con la misma descripción en la lista
+        description = item.description.strip()
+        with timed("duplicate_check"):
+            duplicate = store.find_by_description(list_id, description)
+        if duplicate is not None:
+            raise duplicate_description()
+
+        new_item = {
+            "id": store.next_item_id(),
+            "list_id": list_id,
+            "description": description,
+            "completed": item.completed  # Usar el valor del modelo
+        }
+        try:
+            with timed("write"):
+                created = store.add_item(new_item)
+        except ValueError:
+            # Otro proceso insertó la misma descripción (índice único de SQLite)
+            raise duplicate_description()
+        publish_items("item_created", list_id, [created])
+        return created
+
+
+def update_item(list_id: int, item_id: int, item_update: TodoItemUpdate) -> dict:
+    with store.lock_list(list_id):
+        # Verificar que la lista exista
+        ensure_list_exists(list_id)
+        # Buscar el ítem por su ID en el índice de la lista
+        with timed("lookup"):
+            current = store.get_item(list_id, item_id)
+        if current is None:
+            raise item_not_found(list_id, item_id)
+        # Validar que al menos uno de los campos a actualizar esté presente
+        update_data = item_update.model_dump(exclude_unset=True)
+        if not update_data:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Debe proporcionar al menos un campo para actualizar"
+            )
+
+        # Validar descripción duplicada si se está actualizando
+        if "description" in update_data:
+            new_description = update_data["description"].strip()
+            # Verificar que no exista otro ítem con la misma descripción en la lista excluyendo el actual
+            with timed("duplicate_check"):
+                duplicate = store.find_by_description(list_id, new_description)
+            if duplicate is not None and duplicate["id"] != item_id:
+                raise duplicate_description()
+            update_data["description"] = new_description
+
+        # Actualizar el ítem
+        try:
+            with timed("write"):
+                updated = store.update_item(list_id, item_id, update_data)
+        except ValueError:
+            raise duplicate_description()
+        publish_items("item_updated", list_id, [updated])
+        return updated
+
+
+def delete_item(list_id: int, item_id: int) -> dict:
+    with store.lock_list(list_id):
+        # Verificar que la lista exista
+        ensure_list_exists(list_id)
+        # Eliminar el ítem
+        with timed("write"):
+            deleted = store.delete_item(list_id, item_id)
+        if deleted is None:
+            raise item_not_found(list_id, item_id)
+        publish_items("item_deleted", list_id, [deleted])
+        return deleted
+
+
+def complete_item(list_id: int, item_id: int) -> dict:
+    with store.lock_list(list_id):
+        # Verificar que la lista exista
+        ensure_list_exists(list_id)
+        # Marcar el ítem como completado
+        with timed("write"):
+            item = store.update_item(list_id, item_id, {"completed": True})
+        if item is None:
+            raise item_not_found(list_id, item_id)
+        publish_items("item_updated", list_id, [item])
+        return item
+
+
+# Operaciones en lote
+
+def check_batch(results: list[dict]):
+    """Rechaza el lote completo si alguna fila tiene errores."""
+    if any(result["detail"] for result in results):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=results
+        )
+
+
+def batch_result(index: int, result_status: int, item: dict = None, detail: str = None):
+    return {"index": index, "status": result_status, "item": item, "detail": detail}
+
+
+def validate_item_ids(list_id: int, item_ids: list[int]) -> list[dict]:
+    """Comprueba que cada ID exista en la lista y no se repita en el lote."""
+    results = []
+    seen = set()
+    for index, item_id in enumerate(item_ids):
+        if item_id in seen:
+            results.append(batch_result(index, status.HTTP_400_BAD_REQUEST, detail=f"Ítem con ID {item_id} repetido en el lote"))
+        elif store.get_item(list_id, item_id) is None:
+            results.append(batch_result(index, status.HTTP_404_NOT_FOUND, detail=f"Ítem con ID {item_id} no encontrado en la lista {list_id}"))
+        else:
+            results.append(batch_result(index, status.HTTP_200_OK))
+        seen.add(item_id)
+    return results
+
+
+def create_items(list_id: int, items: list[TodoItemCreate]) -> list[dict]:
+    with store.lock_list(list_id):
+        ensure_list_exists(list_id)
+
+        # Validar duplicados dentro del lote y contra la lista en una sola pasada
+        results = []
+        seen = set()
+        for index, item in enumerate(items):
+            key = description_key(item.description)
+            if key in seen:
+                results.append(batch_result(index, status.HTTP_400_BAD_REQUEST, detail="Descripción repetida en el lote"))
+            elif store.find_by_description(list_id, item.description) is not None:
+                results.append(batch_result(index, status.HTTP_400_BAD_REQUEST, detail="Ya existe un ítem con esta descripción en la lista"))
+            else:
+                results.append(batch_result(index, status.HTTP_201_CREATED))
+            seen.add(key)
+        check_batch(results)
+
+        with timed("write"):
+            new_items = store.add_items([
+                {"id": store.next_item_id(), "list_id": list_id, "description": item.description.strip(), "completed": item.completed}
+                for item in items
+            ])
+        for result, new_item in zip(results, new_items):
+            result["item"] = new_item
+        publish_results("item_created", list_id, results)
+        return results
+
+
+def update_items(list_id: int, updates: list[TodoItemBatchUpdate]) -> list[dict]:
+    with store.lock_list(list_id):
+        ensure_list_exists(list_id)
+
+        results = validate_item_ids(list_id, [update.id for update in updates])
+        changes = []
+        seen = {}
+        for result, update in zip(results, updates):
+            update_data = update.model_dump(exclude_unset=True, exclude={"id"})
+            changes.append((update.id, update_data))
+            if result["detail"]:
+                continue
+            if not update_data:
+                result.update(status=status.HTTP_400_BAD_REQUEST, detail="Debe proporcionar al menos un campo para actualizar")
+                continue
+            if "description" in update_data:
+                update_data["description"] = update_data["description"].strip()
+                key = description_key(update_data["description"])
+                duplicate = store.find_by_description(list_id, update_data["description"])
+                if key in seen or (duplicate is not None and duplicate["id"] != update.id):
+                    result.update(status=status.HTTP_400_BAD_REQUEST, detail="Ya existe un ítem con esta descripción en la lista")
+                seen[key] = update.id
+        check_batch(results)
+
+        with timed("write"):
+            updated = store.update_items(list_id, changes)
+        for result, item in zip(results, updated):
+            result["item"] = item
+        publish_results("item_updated", list_id, results)
+        return results
+
+
+def complete_items(list_id: int, item_ids: list[int]) -> list[dict]:
+    with store.lock_list(list_id):
+        ensure_list_exists(list_id)
+        results = validate_item_ids(list_id, item_ids)
+        check_batch(results)
+
+        with timed("write"):
+            updated = store.update_items(list_id, [(item_id, {"completed": True}) for item_id in item_ids])
+        for result, item in zip(results, updated):
+            result["item"] = item
+        publish_results("item_updated", list_id, results)
+        return results
+
+
+def delete_items(list_id: int, item_ids: list[int]) -> list[dict]:
+    with store.lock_list(list_id):
+        ensure_list_exists(list_id)
+        results = validate_item_ids(list_id, item_ids)
+        check_batch(results)
+
+        with timed("write"):
+            deleted = store.delete_items(list_id, item_ids)
+        for result, item in zip(results, deleted):
+            result["item"] = item
+        publish_results("item_deleted", list_id, results)
+        return results
+
+
+# Operaciones por nombre: resuelven la lista y el ítem en el servidor, en una sola llamada
+
+# Coincidencias de la búsqueda que se revisan al resolver una descripción sin acentos
+NAME_MATCH_CANDIDATES = 20
+# Sugerencias incluidas en el error cuando no se encuentra un ítem
+NAME_SUGGESTIONS = 5
+
+# ``(versión del conjunto de listas, nombre plegado -> [listas])``; se reconstruye
+# solo cuando cambia esa versión, compartida por todos los workers
+_folded_list_names = (None, {})
+
+
+def _lists_by_folded_name() -> dict:
+    global _folded_list_names
+    version, names = _folded_list_names
+    current = store.lists_version()
+    if version != current:
+        names = {}
+        for lst in store.page_lists():
+            names.setdefault(fold(lst["name"]), []).append(dict(lst))
+        _folded_list_names = (current, names)
+    return names
+
+
+def find_list(name: str) -> dict:
+    """Busca una lista por nombre sin distinguir mayúsculas ni acentos.
+
+    Primero usa el índice de nombres del almacén (sin mayúsculas); si no
+    hay coincidencia, el índice de nombres plegados (sin acentos ni
+    puntuación). Responde 400 si el nombre plegado es de varias listas.
+    """
+    with timed("lookup"):
+        lst = store.find_list_by_name(name.strip())
+        if lst is None:
+            matches = _lists_by_folded_name().get(fold(name), [])
+            if len(matches) > 1:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Varias listas coinciden con '{name}': {', '.join(m['name'] for m in matches)}"
+                )
+            lst = matches[0] if matches else None
+    if lst is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Lista con nombre '{name}' no encontrada"
+        )
+    return lst
+
+
+def find_item(lst: dict, description: str) -> dict:
+    """Busca un ítem de la lista ``lst`` por descripción sin distinguir mayúsculas ni acentos.
+
+    Primero usa el índice de descripciones de la lista; si no hay
+    coincidencia, busca las palabras en el índice de búsqueda y compara las
+    descripciones plegadas. Si no encuentra el ítem, el 404 sugiere los
+    ítems más parecidos.
+    """
+    with timed("lookup"):
+        item = store.find_by_description(lst["id"], description)
+    if item is not None:
+        return item
+    with timed("search"):
+        candidates = store.search_items(description, list_id=lst["id"], limit=NAME_MATCH_CANDIDATES)
+    key = fold(description)
+    matches = [item for item in candidates if fold(item["description"]) == key]
+    if len(matches) > 1:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Varios ítems coinciden con '{description}': {', '.join(m['description'] for m in matches)}"
+        )
+    if not matches:
+        detail = f"Ítem '{description}' no encontrado en la lista '{lst['name']}'"
+        if candidates:
+            detail += f"; parecidos: {', '.join(c['description'] for c in candidates[:NAME_SUGGESTIONS])}"
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=detail)
+    return matches[0]
+
+
+def get_items_by_name(list_name: str, completed: bool = None) -> list[dict]:
+    return get_items(find_list(list_name)["id"], completed=completed)
+
+
+def create_items_by_name(list_name: str, items: list[TodoItemCreate], create_missing: bool = False) -> list[dict]:
+    """Añade ítems a la lista ``list_name``; con ``create_missing`` la crea si no existe."""
+    try:
+        lst = find_list(list_name)
+    except HTTPException as e:
+        if not create_missing or e.status_code != status.HTTP_404_NOT_FOUND:
+            raise
+        lst = create_list(TodoListCreate(name=list_name))
+    return create_items(lst["id"], items)
+
+
+def complete_item_by_name(list_name: str, description: str) -> dict:
+    lst = find_list(list_name)
+    return complete_item(lst["id"], find_item(lst, description)["id"])
+
+
+def delete_item_by_name(list_name: str, description: str) -> dict:
+    lst = find_list(list_name)
+    return delete_item(lst["id"], find_item(lst, description)["id"])
+
+
+def get_snapshot(include_open_items: bool = False, items_per_list: int = None) -> list[dict]:
+    """Todas las listas con sus contadores y, opcionalmente, sus primeros ítems pendientes.
+
+    Sustituye a ``get_lists`` más un ``get_items`` por lista: los contadores
+    salen del almacén sin recorrer ítems y los pendientes se leen con el
+    filtro ``completed`` de cada lista.
+    """
+    with timed("read"):
+        lists = [dict(lst) for lst in store.page_lists(counts=True)]
+        for lst in lists:
+            lst["open_items"] = None
+            if include_open_items:
+                # Los contadores evitan leer las listas sin pendientes
+                pending = lst["item_count"] > lst["completed_count"]
+                lst["open_items"] = store.page_items(lst["id"], limit=items_per_list, completed=False) if pending else []
+    return lists
+
+
+# Exportación e importación
+
+def _iter_pages(read_page, batch_size: int):
+    """Recorre por cursor todas las filas de ``read_page(after_id, limit)``."""
+    after_id = None
+    while True:
+        page = read_page(after_id, batch_size)
+        yield from page
+        if len(page) < batch_size:
+            return
+        after_id = page[-1]["id"]
+
+
+def export_records(batch_size: int = 1000):
+    """Genera lotes de registros (primero las listas, luego los ítems) leyendo por páginas.
+
+    No carga todo el almacén en memoria: cada página se pide al almacén al
+    consumir el lote anterior. No es una instantánea: las escrituras que
+    ocurran durante la exportación pueden aparecer o no.
+    """
+    batch = []
+    read_lists = lambda after_id, limit: store.page_lists(after_id=after_id, limit=limit)
+    for lst in _iter_pages(read_lists, batch_size):
+        batch.append({"type": "list", **lst})
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    for lst in _iter_pages(read_lists, batch_size):
+        read_items = lambda after_id, limit: store.page_items(lst["id"], after_id=after_id, limit=limit)
+        for item in _iter_pages(read_items, batch_size):
+            batch.append({"type": "item", **item})
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+
+def clear_store():
+    store.reset()
+    feed.publish("reset")
+
+
+def import_lists(lists: list[TodoList]) -> int:
+    try:
+        store.add_lists([lst.model_dump() for lst in lists])
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    # Un solo evento por lote: los clientes vuelven a descargar en lugar de recibir miles de deltas
+    feed.publish("import", lists=len(lists))
+    return len(lists)
+
+
+def import_items(items: list[TodoItem]) -> int:
+    try:
+        store.add_items([item.model_dump() for item in items])
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    feed.publish("import", items=len(items))
+    return len(items)
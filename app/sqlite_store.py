@@ -0,0 +1,513 @@
+"""Almacén persistente en SQLite con la misma interfaz que ``InMemoryStore``."""
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from app.search import tokenize
+from app.store import ListLocks, description_key
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS lists (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    name_key TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS items (
+    id INTEGER PRIMARY KEY,
+    list_id INTEGER NOT NULL REFERENCES lists(id),
+    description TEXT NOT NULL,
+    description_key TEXT NOT NULL,
+    completed INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_items_list ON items(list_id);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_items_description ON items(list_id, description_key);
+CREATE TABLE IF NOT EXISTS sequences (
+    name TEXT PRIMARY KEY,
+    next_id INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS versions (
+    scope INTEGER PRIMARY KEY,
+    version INTEGER NOT NULL
+);
+"""
+
+# Índice de texto completo de las descripciones (FTS5), mantenido por triggers.
+# Va aparte de SCHEMA porque los triggers contienen ";"
+SEARCH_SCHEMA = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS items_fts USING fts5("
+    "description, content='items', content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER IF NOT EXISTS items_fts_insert AFTER INSERT ON items BEGIN "
+    "INSERT INTO items_fts (rowid, description) VALUES (new.id, new.description); END",
+    "CREATE TRIGGER IF NOT EXISTS items_fts_delete AFTER DELETE ON items BEGIN "
+    "INSERT INTO items_fts (items_fts, rowid, description) VALUES ('delete', old.id, old.description); END",
+    "CREATE TRIGGER IF NOT EXISTS items_fts_update AFTER UPDATE OF description ON items BEGIN "
+    "INSERT INTO items_fts (items_fts, rowid, description) VALUES ('delete', old.id, old.description); "
+    "INSERT INTO items_fts (rowid, description) VALUES (new.id, new.description); END",
+]
+
+# Contadores de ítems y completados por lista (``list_counts``), mantenidos por
+# triggers para que el resumen de las listas no tenga que recorrer sus ítems
+COUNTS_SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS list_counts ("
+    "list_id INTEGER PRIMARY KEY, item_count INTEGER NOT NULL, completed_count INTEGER NOT NULL)",
+    "CREATE TRIGGER IF NOT EXISTS list_counts_list_insert AFTER INSERT ON lists BEGIN "
+    "INSERT INTO list_counts (list_id, item_count, completed_count) VALUES (new.id, 0, 0); END",
+    "CREATE TRIGGER IF NOT EXISTS list_counts_list_delete AFTER DELETE ON lists BEGIN "
+    "DELETE FROM list_counts WHERE list_id = old.id; END",
+    "CREATE TRIGGER IF NOT EXISTS list_counts_item_insert AFTER INSERT ON items BEGIN "
+    "UPDATE list_counts SET item_count = item_count + 1, completed_count = completed_count + new.completed "
+    "WHERE list_id = new.list_id; END",
+    "CREATE TRIGGER IF NOT EXISTS list_counts_item_delete AFTER DELETE ON items BEGIN "
+    "UPDATE list_counts SET item_count = item_count - 1, completed_count = completed_count - old.completed "
+    "WHERE list_id = old.list_id; END",
+    "CREATE TRIGGER IF NOT EXISTS list_counts_item_update AFTER UPDATE OF completed ON items "
+    "WHEN new.completed != old.completed BEGIN "
+    "UPDATE list_counts SET completed_count = completed_count + new.completed - old.completed "
+    "WHERE list_id = new.list_id; END",
+]
+
+# Ámbito de la tabla versions para el conjunto de listas (los IDs de lista empiezan en 1)
+LISTS_SCOPE = 0
+
+ITEM_COLUMNS = "id, list_id, description, completed"
+
+
+def _fetch_one(conn, sql, params):
+    # Con RETURNING hay que consumir todas las filas para que la sentencia termine
+    rows = conn.execute(sql, params).fetchall()
+    return rows[0] if rows else None
+
+
+def _integrity_message(error: sqlite3.IntegrityError, kind: str) -> str:
+    """Traduce una violación de restricción al mismo mensaje que ``InMemoryStore``."""
+    message = str(error)
+    if "FOREIGN KEY" in message:
+        return "La lista del ítem no existe"
+    if message.endswith(f"{kind}.id"):
+        return f"Ya existe {'una lista' if kind == 'lists' else 'un ítem'} con ese ID"
+    if kind == "lists":
+        return "Ya existe una lista con este nombre"
+    return "Ya existe un ítem con esta descripción en la lista"
+
+
+def _item_from_row(row):
+    return {"id": row[0], "list_id": row[1], "description": row[2], "completed": bool(row[3])}
+
+
+class SQLiteStore:
+    """Guarda listas e ítems en un fichero SQLite compartido entre procesos.
+
+    - Modo WAL, para que las lecturas no bloqueen a las escrituras.
+    - Una conexión por hilo, reutilizada entre peticiones.
+    - Sentencias SQL constantes, que ``sqlite3`` prepara una vez y cachea.
+    - Las descripciones y los nombres se guardan también normalizados
+      (``description_key``/``name_key``) para indexar la comparación sin
+      distinguir mayúsculas, incluidos los caracteres acentuados.
+    - Los contadores de IDs se guardan en la tabla ``sequences``.
+    - ``items_fts`` indexa las palabras de las descripciones para ``search_items``.
+    - ``list_counts`` guarda los ítems y completados de cada lista.
+    - La tabla ``versions`` guarda la versión de cada lista (y del conjunto de
+      listas); las versiones salen de la secuencia ``versions`` y nunca se
+      repiten, así que sirven de clave de caché en todos los workers.
+
+    Los datos de ``seed_lists``/``seed_items`` solo se cargan al crear la base.
+    """
+
+    # Las operaciones hacen E/S: desde código asíncrono se ejecutan en un hilo
+    blocking = True
+
+    def __init__(self, path: str, seed_lists=(), seed_items=()):
+        self.path = path
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        # Serializa las escrituras de este proceso: esperar un Lock es mucho más
+        # barato que el reintento con esperas del busy handler de SQLite
+        self._write_lock = threading.Lock()
+        self._locks = ListLocks()
+        conn = self._connection()
+        with self._transaction(conn):
+            for statement in SCHEMA.split(";"):
+                if statement.strip():
+                    conn.execute(statement)
+            indexed = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'items_fts'").fetchone()
+            for statement in SEARCH_SCHEMA:
+                conn.execute(statement)
+            if not indexed:
+                # Bases creadas antes del índice de búsqueda
+                conn.execute("INSERT INTO items_fts (items_fts) VALUES ('rebuild')")
+            counted = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'list_counts'").fetchone()
+            for statement in COUNTS_SCHEMA:
+                conn.execute(statement)
+            if not counted:
+                # Bases creadas antes de los contadores
+                conn.execute(
+                    "INSERT INTO list_counts (list_id, item_count, completed_count) "
+                    "SELECT l.id, count(i.id), coalesce(sum(i.completed), 0) "
+                    "FROM lists l LEFT JOIN items i ON i.list_id = l.id GROUP BY l.id"
+                )
+            fresh = conn.execute("SELECT count(*) FROM sequences").fetchone()[0] == 0
+            conn.executemany("INSERT OR IGNORE INTO sequences (name, next_id) VALUES (?, 1)",
+                             [("lists",), ("items",), ("versions",)])
+            if fresh:
+                self._insert(conn, seed_lists, seed_items)
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False,
+                                   timeout=30, cached_statements=256)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    @contextmanager
+    def _transaction(self, conn):
+        with self._write_lock:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def lock_list(self, list_id: int) -> threading.RLock:
+        """Candado de este proceso para comprobar y escribir en una lista.
+
+        Entre procesos, los índices únicos siguen garantizando que no haya
+        descripciones ni nombres duplicados.
+        """
+        return self._locks.get(list_id)
+
+    def lock_lists(self) -> threading.RLock:
+        return self._locks.lists
+
+    def sync(self):
+        """Cada escritura ya se confirma en su propia transacción: no hay nada que esperar."""
+
+    def close(self):
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
+
+    def _insert(self, conn, lists, items):
+        conn.executemany(
+            "INSERT INTO lists (id, name, name_key) VALUES (?, ?, ?)",
+            [(lst["id"], lst["name"], description_key(lst["name"])) for lst in lists],
+        )
+        conn.executemany(
+            "INSERT INTO items (id, list_id, description, description_key, completed) VALUES (?, ?, ?, ?, ?)",
+            [(item["id"], item["list_id"], item["description"], description_key(item["description"]),
+              int(item["completed"])) for item in items],
+        )
+        conn.execute(
+            "UPDATE sequences SET next_id = max(next_id, (SELECT coalesce(max(id), 0) + 1 FROM lists)) "
+            "WHERE name = 'lists'"
+        )
+        conn.execute(
+            "UPDATE sequences SET next_id = max(next_id, (SELECT coalesce(max(id), 0) + 1 FROM items)) "
+            "WHERE name = 'items'"
+        )
+        self._bump(conn, LISTS_SCOPE)
+        for (list_id,) in conn.execute("SELECT id FROM lists").fetchall():
+            self._bump(conn, list_id)
+
+    def _bump(self, conn, scope):
+        conn.execute(
+            "INSERT INTO versions (scope, version) VALUES (?, (SELECT next_id FROM sequences WHERE name = 'versions')) "
+            "ON CONFLICT(scope) DO UPDATE SET version = excluded.version",
+            (scope,),
+        )
+        conn.execute("UPDATE sequences SET next_id = next_id + 1 WHERE name = 'versions'")
+
+    def _allocate(self, name):
+        conn = self._connection()
+        with self._write_lock:
+            row = _fetch_one(conn, "UPDATE sequences SET next_id = next_id + 1 WHERE name = ? RETURNING next_id - 1",
+                             (name,))
+        return row[0]
+
+    def _observe(self, conn, name, used_id):
+        conn.execute("UPDATE sequences SET next_id = max(next_id, ? + 1) WHERE name = ?", (used_id, name))
+
+    def reset(self, lists=(), items=()):
+        """Reemplaza todo el contenido del almacén."""
+        conn = self._connection()
+        with self._transaction(conn):
+            conn.execute("DELETE FROM items")
+            conn.execute("DELETE FROM lists")
+            conn.execute("DELETE FROM versions")
+            conn.execute("UPDATE sequences SET next_id = 1 WHERE name IN ('lists', 'items')")
+            self._insert(conn, lists, items)
+
+    def export(self):
+        """Devuelve copias de todas las listas e ítems, en orden de inserción."""
+        conn = self._connection()
+        lists = self.get_lists()
+        items = [_item_from_row(row) for row in conn.execute(f"SELECT {ITEM_COLUMNS} FROM items ORDER BY id")]
+        return lists, items
+
+    # Listas
+
+    def get_lists(self) -> list[dict]:
+        rows = self._connection().execute("SELECT id, name FROM lists ORDER BY id")
+        return [{"id": row[0], "name": row[1]} for row in rows]
+
+    def page_lists(self, after_id: int = None, limit: int = None, counts: bool = False) -> list[dict]:
+        """Devuelve hasta ``limit`` listas con ID mayor que ``after_id`` (con sus contadores si ``counts``)."""
+        params = (after_id if after_id is not None else 0, limit if limit is not None else -1)
+        if not counts:
+            rows = self._connection().execute("SELECT id, name FROM lists WHERE id > ? ORDER BY id LIMIT ?", params)
+            return [{"id": row[0], "name": row[1]} for row in rows]
+        rows = self._connection().execute(
+            "SELECT l.id, l.name, c.item_count, c.completed_count FROM lists l JOIN list_counts c ON c.list_id = l.id "
+            "WHERE l.id > ? ORDER BY l.id LIMIT ?",
+            params,
+        )
+        return [{"id": row[0], "name": row[1], "item_count": row[2], "completed_count": row[3]} for row in rows]
+
+    def list_counts(self, list_id: int):
+        """Devuelve ``(ítems, completados)`` de la lista, o ``None`` si no existe."""
+        row = self._connection().execute(
+            "SELECT item_count, completed_count FROM list_counts WHERE list_id = ?", (list_id,)
+        ).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def list_version(self, list_id: int):
+        """Versión actual de los ítems de la lista, o ``None`` si no existe."""
+        row = self._connection().execute(
+            "SELECT coalesce(v.version, 0) FROM lists l LEFT JOIN versions v ON v.scope = l.id WHERE l.id = ?",
+            (list_id,),
+        ).fetchone()
+        return row[0] if row else None
+
+    def lists_version(self) -> int:
+        """Versión actual del conjunto de listas."""
+        row = self._connection().execute("SELECT version FROM versions WHERE scope = ?", (LISTS_SCOPE,)).fetchone()
+        return row[0] if row else 0
+
+    def data_version(self) -> int:
+        """Versión de todo el almacén: cambia con cualquier escritura."""
+        row = self._connection().execute("SELECT next_id FROM sequences WHERE name = 'versions'").fetchone()
+        return row[0]
+
+    def get_list(self, list_id: int):
+        row = self._connection().execute("SELECT id, name FROM lists WHERE id = ?", (list_id,)).fetchone()
+        return {"id": row[0], "name": row[1]} if row else None
+
+    def find_list_by_name(self, name: str):
+        """Busca una lista por nombre, sin distinguir mayúsculas (índice único de ``name_key``)."""
+        row = self._connection().execute(
+            "SELECT id, name FROM lists WHERE name_key = ?", (description_key(name),)
+        ).fetchone()
+        return {"id": row[0], "name": row[1]} if row else None
+
+    def list_exists(self, list_id: int) -> bool:
+        return self._connection().execute("SELECT 1 FROM lists WHERE id = ?", (list_id,)).fetchone() is not None
+
+    def next_list_id(self) -> int:
+        return self._allocate("lists")
+
+    def add_list(self, new_list: dict) -> dict:
+        return self.add_lists([new_list])[0]
+
+    def add_lists(self, lists: list[dict]) -> list[dict]:
+        """Añade varias listas en una sola transacción."""
+        if not lists:
+            return []
+        conn = self._connection()
+        try:
+            with self._transaction(conn):
+                conn.executemany(
+                    "INSERT INTO lists (id, name, name_key) VALUES (?, ?, ?)",
+                    [(lst["id"], lst["name"], description_key(lst["name"])) for lst in lists],
+                )
+                self._observe(conn, "lists", max(lst["id"] for lst in lists))
+                for lst in lists:
+                    self._bump(conn, lst["id"])
+                self._bump(conn, LISTS_SCOPE)
+        except sqlite3.IntegrityError as e:
+            raise ValueError(_integrity_message(e, "lists"))
+        return lists
+
+    def rename_list(self, list_id: int, name: str):
+        """Cambia el nombre de la lista; devuelve la lista o ``None`` si no existe."""
+        conn = self._connection()
+        try:
+            with self._transaction(conn):
+                row = _fetch_one(conn, "UPDATE lists SET name = ?, name_key = ? WHERE id = ? RETURNING id, name",
+                                 (name, description_key(name), list_id))
+                if row is None:
+                    return None
+                self._bump(conn, list_id)
+                self._bump(conn, LISTS_SCOPE)
+        except sqlite3.IntegrityError:
+            raise ValueError("Ya existe una lista con este nombre")
+        return {"id": row[0], "name": row[1]}
+
+    def delete_list(self, list_id: int):
+        """Elimina la lista y sus ítems; devuelve la lista con sus contadores o ``None`` si no existe.
+
+        Borra los ítems por ``idx_items_list`` y los triggers limpian el índice
+        de búsqueda y los contadores: O(k) en el tamaño de la lista.
+        """
+        conn = self._connection()
+        with self._transaction(conn):
+            counts = conn.execute(
+                "SELECT item_count, completed_count FROM list_counts WHERE list_id = ?", (list_id,)
+            ).fetchone()
+            conn.execute("DELETE FROM items WHERE list_id = ?", (list_id,))
+            row = _fetch_one(conn, "DELETE FROM lists WHERE id = ? RETURNING id, name", (list_id,))
+            if row is None:
+                return None
+            conn.execute("DELETE FROM versions WHERE scope = ?", (list_id,))
+            self._bump(conn, LISTS_SCOPE)
+        return {"id": row[0], "name": row[1], "item_count": counts[0], "completed_count": counts[1]}
+
+    # Ítems
+
+    def next_item_id(self) -> int:
+        return self._allocate("items")
+
+    def get_items(self, list_id: int) -> list[dict]:
+        rows = self._connection().execute(
+            f"SELECT {ITEM_COLUMNS} FROM items WHERE list_id = ? ORDER BY id", (list_id,)
+        )
+        return [_item_from_row(row) for row in rows]
+
+    def page_items(self, list_id: int, after_id: int = None, limit: int = None, completed: bool = None,
+                   prefix: str = None, contains: str = None) -> list[dict]:
+        """Devuelve hasta ``limit`` ítems de la lista con ID mayor que ``after_id``.
+
+        Recorre el índice ``idx_items_list`` (``list_id``, ``id``) desde el cursor.
+        """
+        conditions = ["list_id = ?", "id > ?"]
+        params = [list_id, after_id if after_id is not None else 0]
+        if completed is not None:
+            conditions.append("completed = ?")
+            params.append(int(completed))
+        if prefix:
+            key = description_key(prefix)
+            conditions.append("substr(description_key, 1, ?) = ?")
+            params += [len(key), key]
+        if contains:
+            conditions.append("instr(description_key, ?) > 0")
+            params.append(description_key(contains))
+        params.append(limit if limit is not None else -1)
+        rows = self._connection().execute(
+            f"SELECT {ITEM_COLUMNS} FROM items WHERE {' AND '.join(conditions)} ORDER BY id LIMIT ?", params
+        )
+        return [_item_from_row(row) for row in rows]
+
+    def search_items(self, query: str, list_id: int = None, limit: int = None) -> list[dict]:
+        """Ítems cuya descripción contiene las palabras de ``query``, por relevancia (BM25).
+
+        Igual que en memoria, se exigen todas las palabras y la última vale como prefijo.
+        """
+        terms = tokenize(query)
+        if not terms:
+            return []
+        match = " ".join(f'"{term}"' for term in terms) + "*"
+        conditions = ["items_fts MATCH ?"]
+        params = [match]
+        if list_id is not None:
+            conditions.append("i.list_id = ?")
+            params.append(list_id)
+        params.append(limit if limit is not None else -1)
+        rows = self._connection().execute(
+            "SELECT i.id, i.list_id, i.description, i.completed FROM items_fts JOIN items i ON i.id = items_fts.rowid "
+            f"WHERE {' AND '.join(conditions)} ORDER BY items_fts.rank, i.id LIMIT ?",
+            params,
+        )
+        return [_item_from_row(row) for row in rows]
+
+    def get_item(self, list_id: int, item_id: int):
+        row = self._connection().execute(
+            f"SELECT {ITEM_COLUMNS} FROM items WHERE id = ? AND list_id = ?", (item_id, list_id)
+        ).fetchone()
+        return _item_from_row(row) if row else None
+
+    def find_by_description(self, list_id: int, description: str):
+        """Busca un ítem de la lista por descripción, sin distinguir mayúsculas."""
+        row = self._connection().execute(
+            f"SELECT {ITEM_COLUMNS} FROM items WHERE list_id = ? AND description_key = ?",
+            (list_id, description_key(description)),
+        ).fetchone()
+        return _item_from_row(row) if row else None
+
+    def add_item(self, item: dict) -> dict:
+        return self.add_items([item])[0]
+
+    def _update(self, conn, list_id, item_id, changes):
+        assignments = []
+        params = []
+        if "description" in changes:
+            assignments.append("description = ?, description_key = ?")
+            params += [changes["description"], description_key(changes["description"])]
+        if "completed" in changes:
+            assignments.append("completed = ?")
+            params.append(int(changes["completed"]))
+        if not assignments:
+            return self.get_item(list_id, item_id)
+        row = _fetch_one(
+            conn,
+            f"UPDATE items SET {', '.join(assignments)} WHERE id = ? AND list_id = ? RETURNING {ITEM_COLUMNS}",
+            (*params, item_id, list_id),
+        )
+        return _item_from_row(row) if row else None
+
+    def update_item(self, list_id: int, item_id: int, changes: dict):
+        """Aplica ``changes`` al ítem y devuelve el ítem actualizado."""
+        return self.update_items(list_id, [(item_id, changes)])[0]
+
+    def delete_item(self, list_id: int, item_id: int):
+        return self.delete_items(list_id, [item_id])[0]
+
+    # Operaciones en lote: cada una se aplica en una sola transacción
+
+    def add_items(self, items: list[dict]) -> list[dict]:
+        if not items:
+            return []
+        conn = self._connection()
+        try:
+            with self._transaction(conn):
+                conn.executemany(
+                    "INSERT INTO items (id, list_id, description, description_key, completed) VALUES (?, ?, ?, ?, ?)",
+                    [(item["id"], item["list_id"], item["description"], description_key(item["description"]),
+                      int(item["completed"])) for item in items],
+                )
+                self._observe(conn, "items", max(item["id"] for item in items))
+                for list_id in {item["list_id"] for item in items}:
+                    self._bump(conn, list_id)
+        except sqlite3.IntegrityError as e:
+            raise ValueError(_integrity_message(e, "items"))
+        return items
+
+    def update_items(self, list_id: int, updates: list[tuple[int, dict]]) -> list[dict]:
+        """Aplica ``(item_id, cambios)`` en orden y devuelve los ítems actualizados."""
+        conn = self._connection()
+        try:
+            with self._transaction(conn):
+                updated = [self._update(conn, list_id, item_id, changes) for item_id, changes in updates]
+                self._bump(conn, list_id)
+                return updated
+        except sqlite3.IntegrityError:
+            raise ValueError("Ya existe un ítem con esta descripción en la lista")
+
+    def delete_items(self, list_id: int, item_ids: list[int]) -> list[dict]:
+        conn = self._connection()
+        deleted = []
+        with self._transaction(conn):
+            for item_id in item_ids:
+                row = _fetch_one(conn, f"DELETE FROM items WHERE id = ? AND list_id = ? RETURNING {ITEM_COLUMNS}",
+                                 (item_id, list_id))
+                deleted.append(_item_from_row(row) if row else None)
+            self._bump(conn, list_id)
+        return deleted
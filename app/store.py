@@ -0,0 +1,489 @@
+"""Almacén en memoria de listas e ítems con índices."""
+import itertools
+import threading
+from contextlib import ExitStack
+from bisect import bisect_left, bisect_right, insort
+
+from app.search import SearchIndex
+
+
+# Contador de versiones compartido por todos los almacenes en memoria del
+# proceso: dos almacenes distintos nunca publican la misma versión
+_version_counter = itertools.count(1)
+
+
+def next_version() -> int:
+    return next(_version_counter)
+
+
+def advance_versions(minimum: int):
+    """Hace que las próximas versiones sean mayores o iguales que ``minimum``.
+
+    Al recuperar un almacén guardado evita repetir versiones (y ETags) que ya
+    se publicaron antes de reiniciar.
+    """
+    global _version_counter
+    current = next(_version_counter)
+    _version_counter = itertools.count(max(current, minimum))
+
+
+def description_key(description: str) -> str:
+    """Normaliza una descripción para compararla sin distinguir mayúsculas."""
+    return description.strip().casefold()
+
+
+def matches_description(description: str, prefix: str = None, contains: str = None) -> bool:
+    """Comprueba los filtros de descripción sin distinguir mayúsculas."""
+    key = description_key(description)
+    if prefix and not key.startswith(description_key(prefix)):
+        return False
+    if contains and description_key(contains) not in key:
+        return False
+    return True
+
+
+def _append_id(order: list, new_id: int):
+    # Los IDs nuevos casi siempre son los mayores: append en O(1)
+    if not order or new_id > order[-1]:
+        order.append(new_id)
+    else:
+        insort(order, new_id)
+
+
+def _remove_id(order: list, old_id: int):
+    index = bisect_left(order, old_id)
+    if index < len(order) and order[index] == old_id:
+        del order[index]
+
+
+class IdAllocator:
+    """Asigna IDs crecientes de forma segura entre hilos.
+
+    Nunca reutiliza los IDs de filas eliminadas: el contador solo avanza.
+    Los almacenes persistentes guardan ``next_id`` junto con los datos.
+    """
+
+    def __init__(self, next_id: int = 1):
+        self._lock = threading.Lock()
+        self._next_id = next_id
+
+    @property
+    def next_id(self) -> int:
+        return self._next_id
+
+    def allocate(self) -> int:
+        with self._lock:
+            allocated = self._next_id
+            self._next_id += 1
+            return allocated
+
+    def observe(self, used_id: int):
+        """Avanza el contador para que no vuelva a entregar ``used_id``."""
+        with self._lock:
+            if used_id >= self._next_id:
+                self._next_id = used_id + 1
+
+    def __getstate__(self):
+        return {"next_id": self._next_id}
+
+    def __setstate__(self, state):
+        self.__init__(state["next_id"])
+
+
+class ListLocks:
+    """Candados reentrantes por lista, creados bajo demanda.
+
+    Las escrituras sobre listas distintas usan candados distintos y no se
+    bloquean entre sí. ``lists`` protege las operaciones sobre el conjunto de
+    listas (crear, renombrar o eliminar una lista y comprobar su nombre).
+    Quien necesite los dos toma primero ``lists`` y después el de la lista.
+    """
+
+    def __init__(self):
+        self._guard = threading.Lock()
+        self._locks = {}
+        self.lists = threading.RLock()
+
+    def get(self, list_id: int) -> threading.RLock:
+        lock = self._locks.get(list_id)
+        if lock is None:
+            with self._guard:
+                lock = self._locks.setdefault(list_id, threading.RLock())
+        return lock
+
+
+class InMemoryStore:
+    """Guarda listas e ítems en diccionarios indexados.
+
+    Índices que se mantienen en cada escritura:
+
+    - ``_lists``: ``list_id -> lista``.
+    - ``_items``: índice primario ``item_id -> ítem``.
+    - ``_items_by_list``: ``list_id -> {item_id: ítem}``, conserva el orden de inserción.
+    - ``_descriptions``: ``list_id -> {descripción normalizada: item_id}`` para
+      detectar duplicados sin recorrer la lista.
+    - ``_names``: ``nombre normalizado -> list_id``.
+    - ``_list_order`` / ``_item_order``: IDs ordenados (globales y por lista)
+      para paginar por cursor con ``bisect``.
+    - ``_versions``: ``list_id -> versión``, cambia con cada escritura en la
+      lista; ``_lists_version`` cambia al crear, renombrar o eliminar listas.
+      Las versiones salen de un contador creciente del módulo, así que nunca
+      se repiten (ni tras ``reset``).
+    - ``_search``: índice invertido de las palabras de las descripciones.
+    - ``_completed_counts``: ``list_id -> ítems completados``; con el tamaño
+      de ``_item_order`` da el resumen de la lista sin recorrer sus ítems.
+
+    Todas las operaciones sobre ítems son O(1), salvo las que devuelven los
+    ítems de una lista y la eliminación de una lista, que son O(k) en el
+    tamaño de esa lista.
+
+    Es seguro usarlo desde varios hilos: cada escritura toma el candado de su
+    lista. Quien necesite comprobar y escribir de forma atómica (por ejemplo,
+    validar duplicados antes de insertar) debe envolver ambas cosas en
+    ``lock_list(list_id)``.
+    """
+
+    # Las operaciones no hacen E/S: se pueden llamar desde el bucle de eventos
+    blocking = False
+
+    def __init__(self, lists=(), items=()):
+        self._locks = ListLocks()
+        self.reset(lists, items)
+
+    def lock_list(self, list_id: int) -> threading.RLock:
+        """Candado de las escrituras sobre los ítems de una lista."""
+        return self._locks.get(list_id)
+
+    def lock_lists(self) -> threading.RLock:
+        """Candado de las escrituras sobre el conjunto de listas."""
+        return self._locks.lists
+
+    def sync(self):
+        """Espera a que las escrituras de este hilo sean duraderas (aquí no hay nada que esperar)."""
+
+    # Los candados no se copian: ``pickle`` guarda solo los datos y los índices
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_locks"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._locks = ListLocks()
+
+    def reset(self, lists=(), items=()):
+        """Reemplaza todo el contenido del almacén.
+
+        Toma ``lock_lists`` y el candado de cada lista, antigua o nueva: una
+        escritura concurrente ve el contenido anterior o el nuevo, nunca una
+        mezcla de índices.
+        """
+        lists = [dict(lst) for lst in lists]
+        with ExitStack() as stack:
+            stack.enter_context(self.lock_lists())
+            for list_id in sorted({*getattr(self, "_lists", {}), *(lst["id"] for lst in lists)}):
+                stack.enter_context(self.lock_list(list_id))
+            self._replace(lists, items)
+
+    def _replace(self, lists, items):
+        self._lists = {}
+        self._names = {}
+        self._list_order = []
+        self._versions = {}
+        self._completed_counts = {}
+        self._reset_items()
+        self._lists_version = self._data_version = next(_version_counter)
+        self._list_ids = IdAllocator()
+        self._item_ids = IdAllocator()
+        for lst in lists:
+            self.add_list(lst)
+        for item in items:
+            self.add_item(dict(item))
+
+    def _reset_items(self):
+        self._items = {}
+        self._items_by_list = {}
+        self._descriptions = {}
+        self._item_order = {}
+        self._search = SearchIndex()
+
+    def _add_list_indexes(self, list_id: int):
+        self._items_by_list.setdefault(list_id, {})
+        self._descriptions.setdefault(list_id, {})
+        self._item_order.setdefault(list_id, [])
+
+    def _bump(self, list_id: int):
+        self._versions[list_id] = self._data_version = next(_version_counter)
+
+    def _count_completed(self, list_id: int, delta: int):
+        self._completed_counts[list_id] += delta
+
+    def list_version(self, list_id: int):
+        """Versión actual de los ítems de la lista, o ``None`` si no existe."""
+        return self._versions.get(list_id)
+
+    def lists_version(self) -> int:
+        """Versión actual del conjunto de listas."""
+        return self._lists_version
+
+    def data_version(self) -> int:
+        """Versión de todo el almacén: cambia con cualquier escritura."""
+        return self._data_version
+
+    def export(self):
+        """Devuelve copias de todas las listas e ítems, en orden de inserción."""
+        lists = [dict(lst) for lst in self._lists.values()]
+        items = [dict(item) for item in self._items.values()]
+        return lists, items
+
+    # Listas
+
+    def get_lists(self) -> list[dict]:
+        return list(self._lists.values())
+
+    def page_lists(self, after_id: int = None, limit: int = None, counts: bool = False) -> list[dict]:
+        """Devuelve hasta ``limit`` listas con ID mayor que ``after_id``.
+
+        Con ``counts`` cada lista es una copia con ``item_count`` y
+        ``completed_count``, leídos de los contadores: O(listas de la página).
+        """
+        start = bisect_right(self._list_order, after_id) if after_id is not None else 0
+        end = start + limit if limit is not None else None
+        if not counts:
+            return [self._lists[list_id] for list_id in self._list_order[start:end]]
+        return [{**self._lists[list_id], "item_count": len(self._item_order[list_id]),
+                 "completed_count": self._completed_counts[list_id]}
+                for list_id in self._list_order[start:end]]
+
+    def list_counts(self, list_id: int):
+        """Devuelve ``(ítems, completados)`` de la lista, o ``None`` si no existe."""
+        if list_id not in self._lists:
+            return None
+        return len(self._item_order[list_id]), self._completed_counts[list_id]
+
+    def get_list(self, list_id: int):
+        return self._lists.get(list_id)
+
+    def find_list_by_name(self, name: str):
+        """Busca una lista por nombre, sin distinguir mayúsculas."""
+        list_id = self._names.get(description_key(name))
+        return self._lists.get(list_id) if list_id is not None else None
+
+    def list_exists(self, list_id: int) -> bool:
+        return list_id in self._lists
+
+    def next_list_id(self) -> int:
+        return self._list_ids.allocate()
+
+    def add_list(self, new_list: dict) -> dict:
+        """Añade una lista; como las restricciones de SQLite, rechaza IDs y nombres repetidos."""
+        with self.lock_lists():
+            if new_list["id"] in self._lists:
+                raise ValueError("Ya existe una lista con ese ID")
+            name_key = description_key(new_list["name"])
+            if name_key in self._names:
+                raise ValueError("Ya existe una lista con este nombre")
+            self._list_ids.observe(new_list["id"])
+            self._add_list_indexes(new_list["id"])
+            self._completed_counts[new_list["id"]] = 0
+            self._lists[new_list["id"]] = new_list
+            self._names[name_key] = new_list["id"]
+            _append_id(self._list_order, new_list["id"])
+            self._bump(new_list["id"])
+            self._lists_version = next(_version_counter)
+        return new_list
+
+    def add_lists(self, lists: list[dict]) -> list[dict]:
+        """Añade varias listas; si alguna es inválida no se añade ninguna."""
+        with self.lock_lists():
+            ids = set()
+            names = set()
+            for lst in lists:
+                name_key = description_key(lst["name"])
+                if lst["id"] in self._lists or lst["id"] in ids:
+                    raise ValueError("Ya existe una lista con ese ID")
+                if name_key in self._names or name_key in names:
+                    raise ValueError("Ya existe una lista con este nombre")
+                ids.add(lst["id"])
+                names.add(name_key)
+            return [self.add_list(lst) for lst in lists]
+
+    def rename_list(self, list_id: int, name: str):
+        """Cambia el nombre de la lista; devuelve la lista o ``None`` si no existe."""
+        with self.lock_lists():
+            lst = self._lists.get(list_id)
+            if lst is None:
+                return None
+            old_key, new_key = description_key(lst["name"]), description_key(name)
+            if self._names.get(new_key, list_id) != list_id:
+                raise ValueError("Ya existe una lista con este nombre")
+            del self._names[old_key]
+            self._names[new_key] = list_id
+            lst["name"] = name
+            self._bump(list_id)
+            self._lists_version = next(_version_counter)
+        return lst
+
+    def delete_list(self, list_id: int):
+        """Elimina la lista y sus ítems; devuelve la lista con sus contadores o ``None`` si no existe.
+
+        Recorre solo los ítems de la lista (``_items_by_list``): O(k) en su
+        tamaño, sin importar cuántos ítems haya en el almacén.
+        """
+        with self.lock_lists(), self.lock_list(list_id):
+            lst = self._lists.pop(list_id, None)
+            if lst is None:
+                return None
+            deleted = {**lst, "item_count": len(self._item_order[list_id]),
+                       "completed_count": self._completed_counts.pop(list_id)}
+            del self._names[description_key(lst["name"])]
+            _remove_id(self._list_order, list_id)
+            self._delete_list_items(list_id)
+            del self._versions[list_id]
+            self._data_version = self._lists_version = next(_version_counter)
+        return deleted
+
+    def _delete_list_items(self, list_id: int):
+        for item_id, item in self._items_by_list.pop(list_id).items():
+            del self._items[item_id]
+            self._search.remove(item_id, item["description"])
+        del self._descriptions[list_id]
+        del self._item_order[list_id]
+
+    # Ítems
+
+    def next_item_id(self) -> int:
+        return self._item_ids.allocate()
+
+    def get_items(self, list_id: int) -> list[dict]:
+        return list(self._items_by_list.get(list_id, {}).values())
+
+    def page_items(self, list_id: int, after_id: int = None, limit: int = None, completed: bool = None,
+                   prefix: str = None, contains: str = None) -> list[dict]:
+        """Devuelve hasta ``limit`` ítems de la lista con ID mayor que ``after_id``.
+
+        Empieza en el cursor con ``bisect`` y recorre solo hasta llenar la
+        página: sin filtros el coste es O(tamaño de página).
+        """
+        order = self._item_order.get(list_id, [])
+        items = self._items_by_list.get(list_id, {})
+        filtered = completed is not None or prefix or contains
+        page = []
+        with self.lock_list(list_id):
+            index = bisect_right(order, after_id) if after_id is not None else 0
+            while index < len(order) and (limit is None or len(page) < limit):
+                item = items[order[index]]
+                index += 1
+                if filtered:
+                    if completed is not None and item["completed"] != completed:
+                        continue
+                    if not matches_description(item["description"], prefix, contains):
+                        continue
+                page.append(item)
+        return page
+
+    def get_item(self, list_id: int, item_id: int):
+        return self._items_by_list.get(list_id, {}).get(item_id)
+
+    def find_by_description(self, list_id: int, description: str):
+        """Busca un ítem de la lista por descripción, sin distinguir mayúsculas."""
+        item_id = self._descriptions.get(list_id, {}).get(description_key(description))
+        return self._items.get(item_id) if item_id is not None else None
+
+    def _check_new_items(self, items: list[dict]):
+        """Rechaza, como las restricciones de SQLite, IDs repetidos, listas inexistentes y duplicados."""
+        ids = set()
+        keys = set()
+        for item in items:
+            if item["list_id"] not in self._lists:
+                raise ValueError("La lista del ítem no existe")
+            if item["id"] in self._items or item["id"] in ids:
+                raise ValueError("Ya existe un ítem con ese ID")
+            key = (item["list_id"], description_key(item["description"]))
+            if key[1] in self._descriptions[item["list_id"]] or key in keys:
+                raise ValueError("Ya existe un ítem con esta descripción en la lista")
+            ids.add(item["id"])
+            keys.add(key)
+
+    def _insert_item(self, item: dict) -> dict:
+        list_id = item["list_id"]
+        with self.lock_list(list_id):
+            self._item_ids.observe(item["id"])
+            self._items[item["id"]] = item
+            self._items_by_list[list_id][item["id"]] = item
+            _append_id(self._item_order[list_id], item["id"])
+            self._descriptions[list_id][description_key(item["description"])] = item["id"]
+            self._search.add(item["id"], item["description"])
+            if item["completed"]:
+                self._count_completed(list_id, 1)
+            self._bump(list_id)
+        return item
+
+    def add_item(self, item: dict) -> dict:
+        with self.lock_list(item["list_id"]):
+            self._check_new_items([item])
+            return self._insert_item(item)
+
+    def update_item(self, list_id: int, item_id: int, changes: dict):
+        """Aplica ``changes`` al ítem y mantiene el índice de descripciones."""
+        with self.lock_list(list_id):
+            item = self.get_item(list_id, item_id)
+            if item is None:
+                return None
+            if "description" in changes:
+                descriptions = self._descriptions[list_id]
+                old_key = description_key(item["description"])
+                if descriptions.get(old_key) == item_id:
+                    del descriptions[old_key]
+                descriptions[description_key(changes["description"])] = item_id
+                self._search.remove(item_id, item["description"])
+                self._search.add(item_id, changes["description"])
+            if "completed" in changes and changes["completed"] != item["completed"]:
+                self._count_completed(list_id, 1 if changes["completed"] else -1)
+            item.update(changes)
+            self._bump(list_id)
+        return item
+
+    def delete_item(self, list_id: int, item_id: int):
+        with self.lock_list(list_id):
+            item = self._items_by_list.get(list_id, {}).pop(item_id, None)
+            if item is None:
+                return None
+            del self._items[item_id]
+            _remove_id(self._item_order[list_id], item_id)
+            descriptions = self._descriptions[list_id]
+            key = description_key(item["description"])
+            if descriptions.get(key) == item_id:
+                del descriptions[key]
+            self._search.remove(item_id, item["description"])
+            if item["completed"]:
+                self._count_completed(list_id, -1)
+            self._bump(list_id)
+        return item
+
+    def search_items(self, query: str, list_id: int = None, limit: int = None) -> list[dict]:
+        """Ítems cuya descripción contiene las palabras de ``query``, por relevancia."""
+        accept = None
+        if list_id is not None:
+            accept = lambda item_id: self._items[item_id]["list_id"] == list_id
+        return [self._items[item_id] for item_id in self._search.search(query, limit, accept)]
+
+    # Operaciones en lote: el llamador valida antes, aquí solo se aplican
+
+    def add_items(self, items: list[dict]) -> list[dict]:
+        """Añade varios ítems; si alguno es inválido no se añade ninguno."""
+        with ExitStack() as stack:
+            for list_id in sorted({item["list_id"] for item in items}):
+                stack.enter_context(self.lock_list(list_id))
+            self._check_new_items(items)
+            return [self._insert_item(item) for item in items]
+
+    def update_items(self, list_id: int, updates: list[tuple[int, dict]]) -> list[dict]:
+        """Aplica ``(item_id, cambios)`` en orden y devuelve los ítems actualizados."""
+        with self.lock_list(list_id):
+            return [self.update_item(list_id, item_id, changes) for item_id, changes in updates]
+
+    def delete_items(self, list_id: int, item_ids: list[int]) -> list[dict]:
+        with self.lock_list(list_id):
+            return [self.delete_item(list_id, item_id) for item_id in item_ids]
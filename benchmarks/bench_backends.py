@@ -0,0 +1,84 @@
+"""Carga mixta de lecturas y escrituras contra cada backend de almacenamiento.
+
+Uso: python -m benchmarks.bench_backends
+
+Cada backend se mide en un subproceso propio, porque el almacén se elige al
+importar ``app.database`` (variable de entorno ``TODOLIST_BACKEND``).
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+LISTS = 200
+ITEMS_PER_LIST = 100
+THREADS = 8
+OPS_PER_THREAD = 500
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def worker(thread_number):
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    client = TestClient(app)
+    latencies = []
+    for n in range(OPS_PER_THREAD):
+        list_id = (thread_number * OPS_PER_THREAD + n) % LISTS + 1
+        start = time.perf_counter()
+        if n % 4 == 0:
+            client.post(f"/lists/{list_id}/items/", json={"description": f"Carga {thread_number}-{n}"})
+        elif n % 4 == 1:
+            client.put(f"/lists/{list_id}/items/{(list_id - 1) * ITEMS_PER_LIST + 1}", json={"completed": True})
+        else:
+            client.get(f"/lists/{list_id}/items/")
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def run_backend():
+    from app.database import store
+
+    store.reset(
+        [{"id": i, "name": f"Lista {i}"} for i in range(1, LISTS + 1)],
+        [
+            {"id": i, "list_id": (i - 1) // ITEMS_PER_LIST + 1, "description": f"Tarea {i}", "completed": False}
+            for i in range(1, LISTS * ITEMS_PER_LIST + 1)
+        ],
+    )
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=THREADS) as pool:
+        latencies = [value for result in pool.map(worker, range(THREADS)) for value in result]
+    elapsed = time.perf_counter() - start
+    print(json.dumps({
+        "ops_per_s": len(latencies) / elapsed,
+        "p50_ms": percentile(latencies, 0.50) * 1e3,
+        "p99_ms": percentile(latencies, 0.99) * 1e3,
+    }))
+
+
+def main():
+    print(f"{'backend':>8} {'ops/s':>10} {'p50 ms':>8} {'p99 ms':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for backend in ("memory", "sqlite"):
+            env = dict(os.environ, TODOLIST_BACKEND=backend, TODOLIST_DB_PATH=os.path.join(tmp, "bench.db"))
+            output = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_backends", "--child"],
+                env=env, capture_output=True, text=True, check=True,
+            ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            print(f"{backend:>8} {result['ops_per_s']:>10.0f} {result['p50_ms']:>8.2f} {result['p99_ms']:>8.2f}")
+
+
+if __name__ == "__main__":
+    if "--child" in sys.argv:
+        run_backend()
+    else:
+        main()
@@ -0,0 +1,36 @@
+"""Importar 5.000 ítems: una petición por ítem frente a una petición en lote.
+
+Uso: python -m benchmarks.bench_batch
+"""
+import time
+
+from fastapi.testclient import TestClient
+
+from app.database import store
+from app.main import app
+
+ITEMS = 5_000
+
+
+def main():
+    client = TestClient(app)
+    descriptions = [f"Importado {n}" for n in range(ITEMS)]
+
+    store.reset([{"id": 1, "name": "Bench"}], [])
+    start = time.perf_counter()
+    for description in descriptions:
+        client.post("/lists/1/items/", json={"description": description})
+    single = time.perf_counter() - start
+
+    store.reset([{"id": 1, "name": "Bench"}], [])
+    start = time.perf_counter()
+    response = client.post("/lists/1/items/batch", json=[{"description": d} for d in descriptions])
+    batch = time.perf_counter() - start
+    assert response.status_code == 201
+
+    print(f"uno a uno: {ITEMS} peticiones, {single:.2f} s")
+    print(f"en lote:   1 petición,  {batch:.3f} s ({single / batch:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
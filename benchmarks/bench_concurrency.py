@@ -0,0 +1,87 @@
+"""Rendimiento de la API con 1.000 clientes concurrentes.
+
+Uso: python -m benchmarks.bench_concurrency [--backend sqlite] [--clients 1000] [--app-dir DIR ...]
+
+Levanta uvicorn con el backend indicado y lanza ``CLIENTS`` clientes
+asíncronos que hacen lecturas y escrituras a la vez. Con varios ``--app-dir``
+(por ejemplo un ``git worktree`` de una versión anterior) compara varias
+versiones del código con la misma carga.
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+from benchmarks.bench_backends import percentile
+from benchmarks.bench_mcp_http import wait_until_ready
+from tests.helpers import free_port
+
+CLIENTS = 1_000
+REQUESTS_PER_CLIENT = 10
+
+
+async def client_session(client, base_url, number, latencies, errors):
+    list_id = number % 2 + 1
+    for n in range(REQUESTS_PER_CLIENT):
+        start = time.perf_counter()
+        try:
+            if n % 5 == 0:
+                await client.post(f"{base_url}/lists/{list_id}/items/", json={"description": f"Cliente {number}-{n}"})
+            else:
+                await client.get(f"{base_url}/lists/{list_id}/items/", params={"limit": 20})
+        except httpx.HTTPError:
+            errors.append(n)
+            continue
+        latencies.append(time.perf_counter() - start)
+
+
+async def load(base_url, clients):
+    latencies = []
+    errors = []
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    async with httpx.AsyncClient(limits=limits, timeout=120) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(client_session(client, base_url, n, latencies, errors) for n in range(clients)))
+        elapsed = time.perf_counter() - start
+    return len(latencies) / elapsed, percentile(latencies, 0.50), percentile(latencies, 0.99), len(errors)
+
+
+def run(app_dir, backend, clients):
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, TODOLIST_BACKEND=backend, TODOLIST_DB_PATH=os.path.join(tmp, "bench.db"))
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--app-dir", app_dir, "--port", str(port),
+             "--log-level", "warning", "--backlog", str(clients * 2)],
+            env=env,
+        )
+        try:
+            wait_until_ready(f"{base_url}/lists/")
+            return asyncio.run(load(base_url, clients))
+        finally:
+            server.terminate()
+            server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--backend", default="sqlite")
+    parser.add_argument("--clients", type=int, default=CLIENTS)
+    parser.add_argument("--app-dir", action="append", default=None)
+    args = parser.parse_args()
+
+    print(f"{args.clients} clientes x {REQUESTS_PER_CLIENT} peticiones, backend {args.backend}")
+    print(f"{'código':>30} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'errores':>8}")
+    for app_dir in args.app_dir or ["."]:
+        throughput, p50, p99, errors = run(app_dir, args.backend, args.clients)
+        print(f"{app_dir[-30:]:>30} {throughput:>8.0f} {p50 * 1e3:>8.1f} {p99 * 1e3:>8.1f} {errors:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Coste de eliminar una lista (con sus ítems) según el número total de ítems.
+
+Uso: python -m benchmarks.bench_delete_list [--sizes 10000 100000 1000000] [--backends memory columnar sqlite]
+
+Cada almacén elimina listas de ``ITEMS_PER_LIST`` ítems: como recorre solo
+el índice de la lista, el tiempo por lista debe mantenerse plano aunque el
+almacén tenga un millón de ítems. La columna ``lista plana`` mide, como
+referencia, reconstruir una lista Python con todos los ítems salvo los de la
+lista borrada, que es lo que costaría sin el índice ``list_id -> ítems``.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from app.columnar_store import ColumnarStore
+from app.sqlite_store import SQLiteStore
+from app.store import InMemoryStore
+from benchmarks import bench_memory
+
+ITEMS_PER_LIST = bench_memory.ITEMS_PER_LIST
+# Listas eliminadas por medida
+REPEAT = 50
+
+
+def data(size: int):
+    # Mismas descripciones que bench_memory: vocabulario pequeño, como una lista de tareas real
+    lists = [{"id": i, "name": f"Lista {i}"} for i in range(1, size // ITEMS_PER_LIST + 1)]
+    return lists, list(bench_memory.items(size))
+
+
+def open_store(backend: str, directory: str, lists, items):
+    if backend == "memory":
+        return InMemoryStore(lists, items)
+    if backend == "columnar":
+        return ColumnarStore(lists, items)
+    store = SQLiteStore(os.path.join(directory, f"bench-{len(items)}.db"))
+    store.reset(lists, items)
+    return store
+
+
+def measure_store(store, list_ids) -> float:
+    """Microsegundos por lista eliminada."""
+    start = time.perf_counter()
+    for list_id in list_ids:
+        store.delete_list(list_id)
+    return (time.perf_counter() - start) / len(list_ids) * 1e6
+
+
+def measure_flat(items, list_ids) -> float:
+    start = time.perf_counter()
+    for list_id in list_ids:
+        items = [item for item in items if item["list_id"] != list_id]
+    return (time.perf_counter() - start) / len(list_ids) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--backends", nargs="+", choices=["memory", "columnar", "sqlite"],
+                        default=["memory", "columnar", "sqlite"])
+    args = parser.parse_args()
+
+    print(f"Eliminando listas de {ITEMS_PER_LIST} ítems (µs por lista)")
+    print(f"{'ítems':>10} " + " ".join(f"{backend:>10}" for backend in args.backends) + f" {'lista plana':>12}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            lists, items = data(size)
+            # Listas repartidas por todo el almacén, no solo las primeras
+            step = max(1, len(lists) // REPEAT)
+            list_ids = [lst["id"] for lst in lists[::step][:REPEAT]]
+            row = []
+            for backend in args.backends:
+                store = open_store(backend, tmp, lists, items)
+                row.append(measure_store(store, list_ids))
+                if backend == "sqlite":
+                    store.close()
+                del store
+            flat = measure_flat(items, list_ids[:5])
+            print(f"{size:>10} " + " ".join(f"{value:>10.0f}" for value in row) + f" {flat:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
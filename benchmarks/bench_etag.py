@@ -0,0 +1,45 @@
+"""Coste de releer una lista que no ha cambiado.
+
+Uso: python -m benchmarks.bench_etag
+
+Compara la primera lectura (filtra y serializa), la lectura repetida (sale de
+la caché de respuestas) y la revalidación con ``If-None-Match`` (304 sin cuerpo).
+"""
+import time
+
+from fastapi.testclient import TestClient
+
+from app.cache import response_cache
+from app.database import store
+from app.main import app
+
+SIZES = [100, 1_000, 10_000]
+REPEAT = 50
+
+
+def measure(client, headers=None, clear=False):
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        if clear:
+            response_cache.clear()
+        client.get("/lists/1/items/", headers=headers)
+    return (time.perf_counter() - start) / REPEAT * 1e3
+
+
+def main():
+    client = TestClient(app)
+    print(f"{'ítems':>8} {'sin caché ms':>13} {'con caché ms':>13} {'304 ms':>8}")
+    for size in SIZES:
+        store.reset(
+            [{"id": 1, "name": "Bench"}],
+            [{"id": i, "list_id": 1, "description": f"Tarea {i}", "completed": False} for i in range(1, size + 1)],
+        )
+        etag = client.get("/lists/1/items/").headers["etag"]
+        uncached = measure(client, clear=True)
+        cached = measure(client)
+        not_modified = measure(client, {"If-None-Match": etag})
+        print(f"{size:>8} {uncached:>13.2f} {cached:>13.2f} {not_modified:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
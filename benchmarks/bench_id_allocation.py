@@ -0,0 +1,32 @@
+"""Coste de insertar 100k ítems en una misma lista.
+
+Uso: python -m benchmarks.bench_id_allocation
+
+Cada bloque de 10k inserciones debe tardar lo mismo: con el asignador de IDs
+el coste total crece linealmente con el número de ítems.
+"""
+import time
+
+from app.database import store
+from app.models import TodoItemCreate
+from app.routes import items
+
+TOTAL = 100_000
+CHUNK = 10_000
+
+
+def main():
+    store.reset([{"id": 1, "name": "Bench"}], [])
+    print(f"{'insertados':>10} {'ms/bloque':>10} {'µs/ítem':>10}")
+    start_total = time.perf_counter()
+    for chunk_start in range(0, TOTAL, CHUNK):
+        start = time.perf_counter()
+        for n in range(chunk_start, chunk_start + CHUNK):
+            items.create_item(1, TodoItemCreate(description=f"Tarea {n}"))
+        elapsed = time.perf_counter() - start
+        print(f"{chunk_start + CHUNK:>10} {elapsed * 1e3:>10.1f} {elapsed / CHUNK * 1e6:>10.2f}")
+    print(f"total: {time.perf_counter() - start_total:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Coste de la cabecera ``Idempotency-Key`` en las escrituras y de responder un reintento.
+
+Uso: python -m benchmarks.bench_idempotency [--backend memory] [--requests 500]
+
+Levanta la API con uvicorn y mide la latencia media de crear un ítem sin
+clave, con una clave nueva (reserva y guarda la respuesta) y de repetir una
+petición ya hecha (el reintento se responde desde la caché sin ejecutar la ruta).
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+
+import httpx
+
+from benchmarks.bench_mcp_http import wait_until_ready
+from tests.helpers import free_port
+
+
+def measure(client, requests) -> float:
+    """Milisegundos por petición."""
+    start = time.perf_counter()
+    for url, body, headers in requests:
+        response = client.post(url, json=body, headers=headers)
+        assert response.status_code == 201, response.text
+    return (time.perf_counter() - start) / len(requests) * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--backend", choices=["memory", "sqlite"], default="memory")
+    parser.add_argument("--requests", type=int, default=500)
+    args = parser.parse_args()
+
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {**os.environ, "TODOLIST_BACKEND": args.backend, "TODOLIST_DB_PATH": os.path.join(tmp, "bench.db")}
+        server = subprocess.Popen([sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port),
+                                   "--log-level", "warning"], env=env)
+        try:
+            wait_until_ready(f"{base_url}/lists")
+            url = f"{base_url}/lists/1/items/"
+            n = args.requests
+            plain = [(url, {"description": f"Sin clave {i}"}, None) for i in range(n)]
+            keyed = [(url, {"description": f"Con clave {i}"}, {"Idempotency-Key": uuid.uuid4().hex}) for i in range(n)]
+            with httpx.Client() as client:
+                measure(client, [(url, {"description": f"Calentamiento {i}"}, None) for i in range(50)])
+                results = {
+                    "sin clave": measure(client, plain),
+                    "clave nueva": measure(client, keyed),
+                    "reintento": measure(client, keyed),
+                }
+        finally:
+            server.terminate()
+            server.wait()
+
+    print(f"POST /lists/1/items/ con backend {args.backend} (ms por petición)")
+    for name, value in results.items():
+        print(f"{name:<12} {value:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
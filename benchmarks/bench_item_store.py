@@ -0,0 +1,63 @@
+"""Latencia de los endpoints de ítems según el número total de ítems.
+
+Uso: python -m benchmarks.bench_item_store
+
+Con el almacén indexado la latencia debe mantenerse plana aunque crezca el
+total de ítems, porque cada operación solo toca la lista destino.
+"""
+import time
+
+from fastapi.testclient import TestClient
+
+from app.database import store
+from app.main import app
+
+SIZES = [1_000, 10_000, 100_000, 300_000]
+ITEMS_PER_LIST = 50
+REPEAT = 200
+
+
+def seed(total_items):
+    lists_count = total_items // ITEMS_PER_LIST
+    lists = [{"id": i, "name": f"Lista {i}"} for i in range(1, lists_count + 1)]
+    items = [
+        {"id": i, "list_id": (i - 1) // ITEMS_PER_LIST + 1, "description": f"Tarea {i}", "completed": False}
+        for i in range(1, total_items + 1)
+    ]
+    store.reset(lists, items)
+    return lists_count
+
+
+def measure(fn):
+    start = time.perf_counter()
+    for n in range(REPEAT):
+        fn(n)
+    return (time.perf_counter() - start) / REPEAT * 1e6
+
+
+def main():
+    client = TestClient(app)
+    print(f"{'ítems':>10} {'GET µs':>10} {'POST µs':>10} {'PUT µs':>10} {'DELETE µs':>10}")
+    for size in SIZES:
+        list_id = seed(size)
+        created = []
+
+        def get(n):
+            client.get(f"/lists/{list_id}/items/")
+
+        def post(n):
+            response = client.post(f"/lists/{list_id}/items/", json={"description": f"Nueva {n}"})
+            created.append(response.json()["id"])
+
+        def put(n):
+            client.put(f"/lists/{list_id}/items/{created[n]}", json={"completed": True})
+
+        def delete(n):
+            client.delete(f"/lists/{list_id}/items/{created[n]}")
+
+        row = [measure(get), measure(post), measure(put), measure(delete)]
+        print(f"{size:>10} " + " ".join(f"{value:>10.1f}" for value in row))
+
+
+if __name__ == "__main__":
+    main()
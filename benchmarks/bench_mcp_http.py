@@ -0,0 +1,67 @@
+"""Latencia por llamada del cliente HTTP del servidor MCP.
+
+Uso: python -m benchmarks.bench_mcp_http
+
+Levanta la API con uvicorn en un puerto libre y compara una conexión nueva
+por llamada (``httpx.get``) con el cliente keep-alive de ``async_safe_request``.
+"""
+import asyncio
+import subprocess
+import sys
+import time
+
+import httpx
+
+from app import mcp_server
+from tests.helpers import free_port
+
+CALLS = 500
+
+
+def wait_until_ready(url, timeout=15):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(url, timeout=1)
+            return
+        except httpx.TransportError:
+            time.sleep(0.05)
+    raise RuntimeError(f"La API no respondió en {url}")
+
+
+def measure(call):
+    start = time.perf_counter()
+    for _ in range(CALLS):
+        call()
+    return (time.perf_counter() - start) / CALLS * 1e3
+
+
+async def measure_pooled(url):
+    # Sin la caché de ETag: cada llamada transfiere la respuesta completa, como httpx.get
+    mcp_server.CONDITIONAL_CACHE_SIZE = 0
+    start = time.perf_counter()
+    for _ in range(CALLS):
+        await mcp_server.async_safe_request("GET", url)
+    return (time.perf_counter() - start) / CALLS * 1e3
+
+
+def main():
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"]
+    )
+    try:
+        wait_until_ready(f"{base_url}/lists")
+        url = f"{base_url}/lists/1/items/"
+        fresh = measure(lambda: httpx.get(url))
+        pooled = asyncio.run(measure_pooled(url))
+        print(f"conexión nueva por llamada: {fresh:.3f} ms")
+        print(f"cliente keep-alive:         {pooled:.3f} ms ({fresh / pooled:.1f}x)")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
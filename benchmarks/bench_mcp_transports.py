@@ -0,0 +1,65 @@
+"""Latencia por herramienta MCP: transporte HTTP frente a transporte en proceso.
+
+Uso: python -m benchmarks.bench_mcp_transports
+
+El transporte HTTP necesita la API en marcha, así que se levanta uvicorn en
+un puerto libre. Los dos transportes trabajan sobre almacenes distintos
+(el del proceso de uvicorn y el de este proceso) con los mismos datos.
+"""
+import asyncio
+import subprocess
+import sys
+import time
+
+from app.inprocess import InProcessTransport
+from app.mcp_server import HttpTransport
+from benchmarks.bench_mcp_http import wait_until_ready
+from tests.helpers import free_port
+
+CALLS = 300
+
+
+async def run_tools(transport):
+    """Devuelve la latencia media en µs de cada herramienta."""
+    results = {}
+    created = []
+
+    async def timed(name, call):
+        start = time.perf_counter()
+        for n in range(CALLS):
+            await call(n)
+        results[name] = (time.perf_counter() - start) / CALLS * 1e6
+
+    async def create(n):
+        created.append((await transport.create_item(1, f"Bench {n}"))["id"])
+
+    await timed("get_lists", lambda n: transport.get_lists())
+    await timed("get_items", lambda n: transport.get_items(1))
+    await timed("create_item", create)
+    await timed("update_item", lambda n: transport.update_item(1, created[n], {"description": f"Bench editado {n}"}))
+    await timed("complete_item", lambda n: transport.complete_item(1, created[n]))
+    await timed("delete_item", lambda n: transport.delete_item(1, created[n]))
+    return results
+
+
+def main():
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"]
+    )
+    try:
+        wait_until_ready(f"{base_url}/lists/")
+        http = asyncio.run(run_tools(HttpTransport(base_url)))
+    finally:
+        server.terminate()
+        server.wait()
+    inprocess = asyncio.run(run_tools(InProcessTransport()))
+
+    print(f"{'herramienta':>14} {'HTTP µs':>10} {'en proceso µs':>14} {'mejora':>8}")
+    for name in http:
+        print(f"{name:>14} {http[name]:>10.1f} {inprocess[name]:>14.1f} {http[name] / inprocess[name]:>7.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""Peticiones a la API y latencia de los flujos de ejemplo del README con las herramientas MCP.
+
+Uso: python -m benchmarks.bench_mcp_workflows [--lists 20] [--items 200] [--repeat 50]
+
+Levanta la API con uvicorn en un puerto libre, crea ``--lists`` listas de
+``--items`` ítems y ejecuta cada flujo como lo haría un agente: con las
+herramientas por ID (primero ``get_lists`` y ``get_items`` para averiguar los
+IDs) y con las herramientas por nombre, que los resuelven en el servidor.
+Cuenta las peticiones HTTP, los bytes recibidos y la latencia de cada flujo.
+"""
+import argparse
+import asyncio
+import subprocess
+import sys
+import time
+
+import httpx
+
+from app import mcp_server
+from benchmarks.bench_mcp_http import wait_until_ready
+from tests.helpers import free_port
+
+LIST_NAME = "Compras"
+
+
+class Counter:
+    """Cuenta las peticiones y los bytes de respuesta del cliente HTTP del servidor MCP."""
+
+    def __init__(self):
+        self.requests = 0
+        self.bytes = 0
+
+    async def on_response(self, response):
+        await response.aread()
+        self.requests += 1
+        self.bytes += len(response.content)
+
+
+def find(rows, key, value):
+    return next(row for row in rows if row[key] == value)
+
+
+# Flujos por ID: el agente descubre los IDs con get_lists y get_items
+
+async def view_by_id(n):
+    list_id = find(await mcp_server.get_lists(), "name", LIST_NAME)["id"]
+    await mcp_server.get_items(list_id)
+
+
+async def add_by_id(n):
+    list_id = find(await mcp_server.get_lists(), "name", LIST_NAME)["id"]
+    await mcp_server.create_item(list_id, f"Comprar leche {n}")
+
+
+async def complete_by_id(n):
+    list_id = find(await mcp_server.get_lists(), "name", LIST_NAME)["id"]
+    item = find(await mcp_server.get_items(list_id), "description", f"Comprar leche {n}")
+    await mcp_server.complete_item(list_id, item["id"])
+
+
+async def delete_by_id(n):
+    list_id = find(await mcp_server.get_lists(), "name", LIST_NAME)["id"]
+    item = find(await mcp_server.get_items(list_id), "description", f"Comprar leche {n}")
+    await mcp_server.delete_item(list_id, item["id"])
+
+
+async def summary_by_id(n):
+    for lst in await mcp_server.get_lists():
+        await mcp_server.get_items(lst["id"])
+
+
+# Flujos por nombre
+
+async def view_by_name(n):
+    await mcp_server.get_items_by_name(LIST_NAME.lower())
+
+
+async def add_by_name(n):
+    await mcp_server.add_items_to_list_by_name(LIST_NAME.lower(), [f"Comprar leche {n}"])
+
+
+async def complete_by_name(n):
+    await mcp_server.complete_item_by_name(LIST_NAME.lower(), f"comprar leche {n}")
+
+
+async def delete_by_name(n):
+    await mcp_server.delete_item_by_name(LIST_NAME.lower(), f"comprar leche {n}")
+
+
+async def summary_by_name(n):
+    await mcp_server.get_snapshot(include_open_items=True)
+
+
+WORKFLOWS = [
+    ("Ver items de una lista", view_by_id, view_by_name),
+    ("Agregar item", add_by_id, add_by_name),
+    ("Completar item", complete_by_id, complete_by_name),
+    ("Eliminar item", delete_by_id, delete_by_name),
+    ("Resumen de pendientes", summary_by_id, summary_by_name),
+]
+
+
+async def seed(base_url, lists, items):
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        for n in range(lists):
+            name = LIST_NAME if n == lists - 1 else f"Lista {n}"
+            list_id = (await client.post("/lists/", json={"name": name})).json()["id"]
+            await client.post(f"/lists/{list_id}/items/batch",
+                              json=[{"description": f"Tarea {k}", "completed": k % 2 == 0} for k in range(items)])
+
+
+async def measure(counter, step, repeat):
+    """Devuelve ``(peticiones, KB recibidos, ms)`` medios por ejecución del flujo."""
+    requests, received = counter.requests, counter.bytes
+    start = time.perf_counter()
+    for n in range(repeat):
+        await step(n)
+    elapsed = time.perf_counter() - start
+    return (counter.requests - requests) / repeat, (counter.bytes - received) / repeat / 1024, elapsed / repeat * 1e3
+
+
+async def run(base_url, lists, items, repeat):
+    counter = Counter()
+    mcp_server.async_client = httpx.AsyncClient(event_hooks={"response": [counter.on_response]})
+    mcp_server.transport = mcp_server.HttpTransport(base_url)
+    await seed(base_url, lists, items)
+    results = {}
+    # Cada variante completa el ciclo añadir, completar y eliminar sobre sus propios ítems
+    for column in (1, 2):
+        for name, *steps in WORKFLOWS:
+            results[name, column] = await measure(counter, steps[column - 1], repeat)
+    await mcp_server.async_client.aclose()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--lists", type=int, default=20)
+    parser.add_argument("--items", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"]
+    )
+    try:
+        wait_until_ready(f"{base_url}/lists")
+        results = asyncio.run(run(base_url, args.lists, args.items, args.repeat))
+    finally:
+        server.terminate()
+        server.wait()
+
+    print(f"{args.lists} listas de {args.items} ítems, media de {args.repeat} ejecuciones")
+    print(f"{'flujo':<24} {'peticiones':>16} {'KB recibidos':>18} {'ms':>16}")
+    print(f"{'':<24} {'ID':>7} {'nombre':>8} {'ID':>8} {'nombre':>9} {'ID':>7} {'nombre':>8}")
+    for name, *_ in WORKFLOWS:
+        (by_id_requests, by_id_kb, by_id_ms), (by_name_requests, by_name_kb, by_name_ms) = (
+            results[name, 1], results[name, 2])
+        print(f"{name:<24} {by_id_requests:>7.0f} {by_name_requests:>8.0f} {by_id_kb:>8.1f} {by_name_kb:>9.1f} "
+              f"{by_id_ms:>7.2f} {by_name_ms:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Memoria por ítem: diccionarios (``InMemoryStore``) frente a columnas (``ColumnarStore``).
+
+Uso: python -m benchmarks.bench_memory [ítems ...]
+
+Carga el mismo conjunto de ítems en cada almacén y mide con ``tracemalloc``
+los bytes reservados por ítem. Como los dos comparten el índice de búsqueda,
+también se mide ese índice por separado para ver cuánto ocupan los ítems y
+sus demás índices. Las descripciones combinan palabras de un vocabulario
+pequeño, como las de una lista de tareas real.
+"""
+import gc
+import sys
+import time
+import tracemalloc
+
+from app.columnar_store import ColumnarStore
+from app.search import SearchIndex
+from app.store import InMemoryStore
+
+SIZES = [100_000, 1_000_000]
+ITEMS_PER_LIST = 100
+VERBS = ["Comprar", "Revisar", "Llamar a", "Preparar", "Enviar", "Limpiar", "Pagar", "Reservar"]
+OBJECTS = ["leche", "el informe", "la factura", "el coche", "pan", "la presentación", "el jardín", "entradas"]
+DETAILS = ["mañana", "el lunes", "antes de las 10", "para el equipo", "sin falta", "con Ana", "en el centro", "online"]
+
+
+def items(size: int):
+    # Las descripciones se repiten entre listas pero no dentro de una lista
+    for item_id in range(1, size + 1):
+        n = item_id % ITEMS_PER_LIST
+        description = f"{VERBS[n % 8]} {OBJECTS[n // 8 % 8]} {DETAILS[(item_id // ITEMS_PER_LIST + n) % 8]} {n}"
+        yield {"id": item_id, "list_id": (item_id - 1) // ITEMS_PER_LIST + 1,
+               "description": description, "completed": item_id % 3 == 0}
+
+
+def measure(build):
+    """Devuelve ``(objeto, bytes reservados, segundos)`` al ejecutar ``build``."""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    allocated = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, allocated, elapsed
+
+
+def load(store_class, size: int):
+    lists = [{"id": n, "name": f"Lista {n}"} for n in range(1, size // ITEMS_PER_LIST + 1)]
+    store = store_class(lists)
+    batch = []
+    for item in items(size):
+        batch.append(item)
+        if len(batch) == ITEMS_PER_LIST:
+            store.add_items(batch)
+            batch = []
+    return store
+
+
+def index_only(size: int):
+    index = SearchIndex()
+    for item in items(size):
+        index.add(item["id"], item["description"])
+    return index
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or SIZES
+    print(f"{'ítems':>9} {'almacén':>10} {'bytes/ítem':>11} {'sin búsqueda':>13} {'carga s':>8}")
+    for size in sizes:
+        _, index_bytes, _ = measure(lambda: index_only(size))
+        for store_class in (InMemoryStore, ColumnarStore):
+            store, allocated, elapsed = measure(lambda: load(store_class, size))
+            name = "dicts" if store_class is InMemoryStore else "columnas"
+            print(f"{size:>9} {name:>10} {allocated / size:>11.0f} {(allocated - index_bytes) / size:>13.0f} {elapsed:>8.1f}")
+            del store
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Coste de las métricas sobre el rendimiento de la API.
+
+Uso: python -m benchmarks.bench_metrics [--rounds 30]
+
+Llama a la aplicación ASGI en el mismo proceso (sin red) en rondas por
+parejas, una con las métricas activadas y otra desactivadas, en orden
+alterno. Mide tiempo de CPU del proceso y compara la mediana de las
+parejas, que es mucho menos sensible al ruido de la máquina que el caudal
+de una sola ronda. El objetivo es un coste menor del 2%.
+
+Como en una máquina ruidosa incluso la mediana varía en torno a un 1-2%,
+también estima el coste de forma determinista: observaciones registradas por
+petición multiplicadas por lo que cuesta una observación medida aparte.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import timeit
+
+import httpx
+
+from app import metrics
+from app.database import store
+from app.main import app
+
+REQUESTS_PER_ROUND = 500
+
+
+async def round_cpu_time(client):
+    start = time.process_time()
+    for n in range(REQUESTS_PER_ROUND):
+        if n % 10 == 0:
+            await client.put("/lists/1/items/1", json={"completed": n % 20 == 0})
+        else:
+            await client.get("/lists/1/items/", params={"limit": 20})
+    return time.process_time() - start
+
+
+async def run(rounds):
+    transport = httpx.ASGITransport(app=app)
+    ratios = []
+    totals = {True: 0.0, False: 0.0}
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await round_cpu_time(client)
+        for number in range(rounds):
+            elapsed = {}
+            # Alternar el orden para que ninguno de los dos modos vaya siempre primero
+            for enabled in ((True, False) if number % 2 else (False, True)):
+                metrics.enabled = enabled
+                elapsed[enabled] = await round_cpu_time(client)
+                totals[enabled] += elapsed[enabled]
+            ratios.append(elapsed[True] / elapsed[False])
+    metrics.enabled = True
+    return ratios, totals
+
+
+def observe_once():
+    with metrics.STORE_OPERATION_SECONDS.time("bench"):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=30)
+    args = parser.parse_args()
+    store.reset(
+        [{"id": 1, "name": "Bench"}],
+        [{"id": i, "list_id": 1, "description": f"Tarea {i}", "completed": False} for i in range(1, 201)],
+    )
+    metrics.reset()
+    ratios, totals = asyncio.run(run(args.rounds))
+    requests = REQUESTS_PER_ROUND * args.rounds
+    observations = sum(
+        value[-1] if isinstance(value, list) else value
+        for shard in metrics._all_shards() for value in shard.values()
+    )
+    per_observation = min(timeit.repeat(observe_once, number=10_000, repeat=5)) / 10_000
+    print(f"sin métricas: {requests / totals[False]:,.0f} peticiones por segundo de CPU")
+    print(f"con métricas: {requests / totals[True]:,.0f} peticiones por segundo de CPU")
+    print(f"coste (mediana de {args.rounds} parejas): {(statistics.median(ratios) - 1) * 100:.2f}%")
+    estimated = observations * per_observation / totals[True] * 100
+    print(f"coste estimado: {observations / requests:.1f} observaciones por petición "
+          f"x {per_observation * 1e6:.2f} µs = {estimated:.2f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""Coste de leer una página de 50 ítems según el tamaño de la lista.
+
+Uso: python -m benchmarks.bench_pagination
+
+Con la paginación por cursor la página cuesta lo mismo aunque la lista crezca;
+la lectura completa crece con el tamaño de la lista.
+"""
+import time
+
+from fastapi.testclient import TestClient
+
+from app.database import store
+from app.main import app
+from app.pagination import encode_cursor
+
+SIZES = [1_000, 10_000, 100_000]
+PAGE = 50
+REPEAT = 50
+
+
+def measure(client, url, params=None):
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        client.get(url, params=params)
+    return (time.perf_counter() - start) / REPEAT * 1e3
+
+
+def main():
+    client = TestClient(app)
+    print(f"{'ítems':>8} {'completa ms':>12} {'página ms':>10} {'página final ms':>16}")
+    for size in SIZES:
+        store.reset(
+            [{"id": 1, "name": "Bench"}],
+            [{"id": i, "list_id": 1, "description": f"Tarea {i}", "completed": False} for i in range(1, size + 1)],
+        )
+        full = measure(client, "/lists/1/items/") if size <= 10_000 else float("nan")
+        first = measure(client, "/lists/1/items/", {"limit": PAGE})
+        last_cursor = encode_cursor(size - PAGE)
+        last = measure(client, "/lists/1/items/", {"limit": PAGE, "cursor": last_cursor})
+        print(f"{size:>8} {full:>12.2f} {first:>10.2f} {last:>16.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Coste de buscar ítems por descripción con el índice invertido.
+
+Uso: python -m benchmarks.bench_search [--items N]
+
+Carga N ítems (1.000.000 por defecto) en el almacén en memoria y mide
+consultas con términos raros, frecuentes y con prefijo, frente a recorrer
+las descripciones de una sola de las 100 listas como haría un cliente sin búsqueda.
+"""
+import argparse
+import random
+import time
+
+from app.search import tokenize
+from app.store import InMemoryStore
+
+WORDS = ["comprar", "leche", "pan", "limón", "café", "huevos", "llamar", "médico", "revisar", "informe",
+         "pagar", "factura", "lavar", "coche", "regar", "plantas", "enviar", "correo", "reservar", "mesa"]
+QUERIES = ["zanahoria", "limon cafe", "LLAMAR medico", "factu", "comprar"]
+REPEAT = 100
+
+
+def build_store(size: int) -> InMemoryStore:
+    rng = random.Random(42)
+    lists = [{"id": n, "name": f"Lista {n}"} for n in range(1, 101)]
+    items = [
+        {"id": i, "list_id": i % 100 + 1, "completed": False,
+         "description": " ".join(rng.sample(WORDS, 3)) + f" {i}" + (" zanahoria" if i % 100_000 == 0 else "")}
+        for i in range(1, size + 1)
+    ]
+    return InMemoryStore(lists, items)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    store = build_store(args.items)
+    print(f"carga de {args.items} ítems: {time.perf_counter() - start:.1f} s")
+    print(f"{'consulta':>16} {'resultados':>11} {'índice ms':>10} {'recorrido de una lista ms':>26}")
+    for query in QUERIES:
+        results = store.search_items(query, limit=20)
+        start = time.perf_counter()
+        for _ in range(REPEAT):
+            store.search_items(query, limit=20)
+        indexed = (time.perf_counter() - start) / REPEAT * 1e3
+        terms = set(tokenize(query))
+        start = time.perf_counter()
+        scanned = [item for item in store.get_items(1) if terms <= set(tokenize(item["description"]))]
+        scan = (time.perf_counter() - start) * 1e3
+        print(f"{query:>16} {len(results):>11} {indexed:>10.3f} {scan:>26.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Coste de serializar una lista grande: validación con pydantic frente a la ruta rápida.
+
+Uso: python -m benchmarks.bench_serialize
+
+Mide ``serialize_page`` (validar y codificar la página) y la petición completa
+``GET /lists/1/items/`` sin caché de respuestas, con ``TODOLIST_FAST_JSON``
+desactivado y activado. La ruta rápida usa orjson si está instalado.
+"""
+import time
+
+from fastapi.testclient import TestClient
+
+from app import pagination
+from app.cache import response_cache
+from app.database import store
+from app.main import app
+from app.models import TodoItem
+
+SIZES = [1_000, 10_000, 50_000]
+REPEAT = 10
+
+
+def measure(function):
+    function()
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        function()
+    return (time.perf_counter() - start) / REPEAT * 1e3
+
+
+def main():
+    client = TestClient(app)
+    encoder = "orjson" if pagination.orjson is not None else "json"
+    print(f"ruta rápida con {encoder}")
+    print(f"{'ítems':>8} {'serializar ms':>14} {'rápida ms':>10} {'GET ms':>8} {'GET rápida ms':>14} {'mejora GET':>11}")
+    for size in SIZES:
+        store.reset(
+            [{"id": 1, "name": "Bench"}],
+            [{"id": i, "list_id": 1, "description": f"Tarea número {i}", "completed": i % 2 == 0}
+             for i in range(1, size + 1)],
+        )
+        rows = store.page_items(1)
+
+        def serialize():
+            pagination.serialize_page(rows, None, None, TodoItem)
+
+        def request():
+            response_cache.clear()
+            client.get("/lists/1/items/")
+
+        timings = []
+        for fast in (False, True):
+            pagination.fast_json = fast
+            timings += [measure(serialize), measure(request)]
+        pagination.fast_json = False
+        slow, fast, slow_get, fast_get = timings[0], timings[2], timings[1], timings[3]
+        print(f"{size:>8} {slow:>14.2f} {fast:>10.2f} {slow_get:>8.2f} {fast_get:>14.2f} {slow_get / fast_get:>10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""Tiempo hasta la primera petición correcta de la API y del servidor MCP.
+
+Uso: python -m benchmarks.bench_startup [--repeat 5] [--items 100000]
+
+Cada medida arranca un proceso nuevo y cuenta desde el lanzamiento hasta la
+primera respuesta válida: ``GET /lists/`` para la API y la herramienta
+``get_lists`` (tras el ``initialize`` de MCP por stdio, como Claude Desktop)
+para el servidor MCP; para este también se muestra cuándo respondió a
+``initialize``. Se muestra la mediana de ``--repeat`` arranques.
+
+Las filas ``WAL`` arrancan con ``TODOLIST_WAL_DIR`` apuntando a una
+instantánea de ``--items`` ítems, es decir, con la recuperación del almacén
+incluida en el arranque.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+from mcp import ClientSession
+from mcp.client.stdio import StdioServerParameters, stdio_client
+
+from benchmarks import bench_memory
+from benchmarks.bench_mcp_http import wait_until_ready
+from tests.helpers import free_port
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def api_commands(port: int) -> dict:
+    return {
+        "run.py --serve": [sys.executable, "run.py", "--serve", "--port", str(port)],
+        "uvicorn --reload": [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--reload"],
+    }
+
+
+def time_api(command: list[str], port: int, env: dict) -> float:
+    """Segundos desde lanzar ``command`` hasta el primer ``GET /lists/`` con 200."""
+    start = time.perf_counter()
+    server = subprocess.Popen(command, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        with httpx.Client() as client:
+            while True:
+                try:
+                    if client.get(f"http://127.0.0.1:{port}/lists/").status_code == 200:
+                        return time.perf_counter() - start
+                except httpx.TransportError:
+                    pass
+                if server.poll() is not None:
+                    raise RuntimeError(f"La API terminó al arrancar: {' '.join(command)}")
+                time.sleep(0.005)
+    finally:
+        server.terminate()
+        server.wait()
+
+
+async def time_mcp(env: dict) -> tuple[float, float]:
+    """Segundos desde lanzar el servidor MCP hasta ``initialize`` y hasta el primer ``get_lists`` correcto."""
+    params = StdioServerParameters(command=sys.executable, args=[os.path.join("app", "mcp_server.py")],
+                                   env=env, cwd=ROOT)
+    start = time.perf_counter()
+    with open(os.devnull, "w") as devnull:
+        async with stdio_client(params, errlog=devnull) as (read, write):
+            async with ClientSession(read, write) as session:
+                await session.initialize()
+                initialized = time.perf_counter() - start
+                result = await session.call_tool("get_lists", {})
+                elapsed = time.perf_counter() - start
+    if result.isError or "error" in result.content[0].text:
+        raise RuntimeError(f"get_lists falló: {result.content[0].text}")
+    return initialized, elapsed
+
+
+def write_snapshot(directory: str, items: int):
+    """Crea una instantánea del WAL con ``items`` ítems para medir la recuperación."""
+    from app.store import InMemoryStore
+    from app.wal import DurableStore
+    lists = [{"id": i, "name": f"Lista {i}"} for i in range(1, items // bench_memory.ITEMS_PER_LIST + 1)]
+    store = DurableStore(InMemoryStore(), directory, fsync="never")
+    store.reset(lists, list(bench_memory.items(items)))
+    store.snapshot()
+    store.close()
+
+
+def median(measure, repeat: int) -> float:
+    return statistics.median(measure() for _ in range(repeat)) * 1e3
+
+
+def print_mcp(name: str, env: dict, repeat: int):
+    runs = [asyncio.run(time_mcp(env)) for _ in range(repeat)]
+    initialized = statistics.median(run[0] for run in runs) * 1e3
+    elapsed = statistics.median(run[1] for run in runs) * 1e3
+    print(f"{name:<40} {elapsed:>14.0f} {initialized:>16.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--items", type=int, default=100_000)
+    args = parser.parse_args()
+    env = {**os.environ, "TODOLIST_BACKEND": "memory"}
+    env.pop("TODOLIST_WAL_DIR", None)
+
+    print(f"{'arranque (ms)':<40} {'1.ª respuesta':>14} {'initialize':>16}")
+    port = free_port()
+    for name, command in api_commands(port).items():
+        print(f"{'API ' + name:<40} {median(lambda: time_api(command, port, env), args.repeat):>14.0f}")
+    with tempfile.TemporaryDirectory() as wal_dir:
+        write_snapshot(wal_dir, args.items)
+        wal_env = {**env, "TODOLIST_WAL_DIR": wal_dir, "TODOLIST_WAL_FSYNC": "never"}
+        command = api_commands(port)["run.py --serve"]
+        print(f"{f'API run.py --serve, WAL {args.items} ítems':<40} "
+              f"{median(lambda: time_api(command, port, wal_env), args.repeat):>14.0f}")
+        print_mcp(f"MCP inprocess, WAL {args.items} ítems", {**wal_env, "TODOLIST_MCP_TRANSPORT": "inprocess"},
+                  args.repeat)
+
+    api = subprocess.Popen([sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port),
+                            "--log-level", "warning"], cwd=ROOT, env=env)
+    try:
+        wait_until_ready(f"http://127.0.0.1:{port}/lists")
+        for transport in ("http", "inprocess"):
+            mcp_env = {**env, "TODOLIST_API_URL": f"http://127.0.0.1:{port}", "TODOLIST_MCP_TRANSPORT": transport}
+            print_mcp(f"MCP {transport}", mcp_env, args.repeat)
+    finally:
+        api.terminate()
+        api.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Rendimiento y memoria de /export y /import en streaming.
+
+Uso: python -m benchmarks.bench_transfer [--items N] [--gzip]
+
+Crea una base SQLite con N ítems (500.000 por defecto), levanta la API sobre
+ella y descarga /export a un fichero; después levanta otra API sobre una base
+vacía y le envía ese fichero a /import. Para cada paso muestra el caudal y el
+pico de memoria residente (VmHWM) del proceso servidor, que debe mantenerse
+estable aunque crezca N.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+from app.sqlite_store import SQLiteStore
+from benchmarks.bench_mcp_http import wait_until_ready
+from tests.helpers import free_port
+
+LISTS = 100
+CHUNK = 1 << 16
+
+
+def populate(path, size):
+    store = SQLiteStore(path)
+    store.add_lists([{"id": n, "name": f"Lista {n}"} for n in range(1, LISTS + 1)])
+    for start in range(1, size + 1, 10_000):
+        store.add_items([
+            {"id": i, "list_id": i % LISTS + 1, "description": f"Tarea número {i} de la exportación", "completed": i % 3 == 0}
+            for i in range(start, min(start + 10_000, size + 1))
+        ])
+    store.close()
+
+
+def peak_rss_mb(pid):
+    with open(f"/proc/{pid}/status") as status:
+        for line in status:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    return float("nan")
+
+
+def start_server(db_path):
+    port = free_port()
+    env = dict(os.environ, TODOLIST_BACKEND="sqlite", TODOLIST_DB_PATH=db_path)
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"], env=env
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    wait_until_ready(f"{base_url}/lists")
+    return server, base_url
+
+
+def read_chunks(path):
+    with open(path, "rb") as source:
+        while chunk := source.read(CHUNK):
+            yield chunk
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=500_000)
+    parser.add_argument("--gzip", action="store_true")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source_db = os.path.join(tmp, "source.db")
+        dump = os.path.join(tmp, "dump.ndjson" + (".gz" if args.gzip else ""))
+        populate(source_db, args.items)
+
+        server, base_url = start_server(source_db)
+        try:
+            idle = peak_rss_mb(server.pid)
+            start = time.perf_counter()
+            with httpx.stream("GET", f"{base_url}/export", params={"gzip": args.gzip}, timeout=None) as response:
+                with open(dump, "wb") as target:
+                    for chunk in response.iter_raw(CHUNK):
+                        target.write(chunk)
+            elapsed = time.perf_counter() - start
+            print(f"export: {args.items / elapsed:,.0f} ítems/s, {os.path.getsize(dump) / 2**20:.1f} MiB, "
+                  f"RSS pico {peak_rss_mb(server.pid):.0f} MiB (al arrancar {idle:.0f} MiB)")
+        finally:
+            server.terminate()
+            server.wait()
+
+        server, base_url = start_server(os.path.join(tmp, "target.db"))
+        try:
+            idle = peak_rss_mb(server.pid)
+            start = time.perf_counter()
+            response = httpx.post(f"{base_url}/import", params={"replace": True}, content=read_chunks(dump), timeout=None)
+            elapsed = time.perf_counter() - start
+            response.raise_for_status()
+            print(f"import: {args.items / elapsed:,.0f} ítems/s, {response.json()}, "
+                  f"RSS pico {peak_rss_mb(server.pid):.0f} MiB (al arrancar {idle:.0f} MiB)")
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
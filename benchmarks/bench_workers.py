@@ -0,0 +1,129 @@
+"""Escalado del caudal de la API con el número de workers.
+
+Uso: python -m benchmarks.bench_workers [--backend sqlite|redis] [--workers 1 2 4] [--seconds 10]
+                                       [--clients 64] [--load-processes 4] [--redis-url URL]
+
+Para cada número de workers arranca ``python run.py --serve --workers N``
+con el backend indicado y lanza durante ``--seconds`` segundos una carga
+mixta (4 lecturas paginadas por cada escritura) desde ``--load-processes``
+procesos con ``--clients`` clientes asíncronos cada uno. Muestra las
+peticiones por segundo y la aceleración respecto a un worker.
+
+El escalado está limitado por los núcleos libres: los workers y los procesos
+de carga compiten por la misma CPU, así que conviene lanzar la carga desde
+otra máquina o tener al menos ``workers + load-processes`` núcleos. Con
+``--backend redis`` y sin ``--redis-url`` se usa el Redis simulado de
+``tests.helpers``, que es un único proceso Python y se convierte enseguida en
+el cuello de botella: para medir el escalado con Redis hay que usar un
+servidor real.
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+from benchmarks.bench_backends import percentile
+from benchmarks.bench_mcp_http import wait_until_ready
+from tests import helpers
+from tests.helpers import free_port
+
+LISTS = 2
+
+
+async def client_session(client, base_url, number, deadline, latencies, errors):
+    n = 0
+    while time.monotonic() < deadline:
+        list_id = (number + n) % LISTS + 1
+        start = time.perf_counter()
+        try:
+            if n % 5 == 0:
+                response = await client.post(f"{base_url}/lists/{list_id}/items/",
+                                             json={"description": f"Carga {os.getpid()}-{number}-{n}"})
+            else:
+                response = await client.get(f"{base_url}/lists/{list_id}/items/", params={"limit": 20})
+            if response.status_code >= 500:
+                errors.append(response.status_code)
+        except httpx.HTTPError:
+            errors.append(n)
+        latencies.append(time.perf_counter() - start)
+        n += 1
+
+
+async def load(base_url, clients, seconds):
+    latencies = []
+    errors = []
+    deadline = time.monotonic() + seconds
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    async with httpx.AsyncClient(limits=limits, timeout=60) as client:
+        await asyncio.gather(*(client_session(client, base_url, n, deadline, latencies, errors)
+                               for n in range(clients)))
+    return latencies, len(errors)
+
+
+def load_process(args):
+    return asyncio.run(load(*args))
+
+
+def run(workers, env, clients, seconds, load_processes):
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    server = subprocess.Popen(
+        [sys.executable, "run.py", "--serve", "--workers", str(workers), "--port", str(port)],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_until_ready(f"{base_url}/lists/", timeout=30)
+        with multiprocessing.Pool(load_processes) as pool:
+            results = pool.map(load_process, [(base_url, clients, seconds)] * load_processes)
+    finally:
+        server.terminate()
+        server.wait()
+    latencies = [latency for process_latencies, _ in results for latency in process_latencies]
+    errors = sum(process_errors for _, process_errors in results)
+    return len(latencies) / seconds, percentile(latencies, 0.50), percentile(latencies, 0.99), errors
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--backend", choices=["sqlite", "redis"], default="sqlite")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--clients", type=int, default=64, help="clientes por proceso de carga")
+    parser.add_argument("--load-processes", type=int, default=4)
+    parser.add_argument("--redis-url", default=None)
+    args = parser.parse_args()
+
+    print(f"{os.cpu_count()} núcleos, backend {args.backend}, "
+          f"{args.load_processes} procesos x {args.clients} clientes, {args.seconds:.0f} s por medida")
+    print(f"{'workers':>8} {'req/s':>8} {'x1':>6} {'p50 ms':>8} {'p99 ms':>8} {'errores':>8}")
+    redis_server = None
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, TODOLIST_BACKEND=args.backend, TODOLIST_DB_PATH=os.path.join(tmp, "bench.db"),
+                   TODOLIST_METRICS="0")
+        if args.backend == "redis":
+            if args.redis_url is None:
+                port = free_port()
+                redis_server = helpers.start(port)
+                args.redis_url = f"redis://127.0.0.1:{port}/0"
+            env["TODOLIST_REDIS_URL"] = args.redis_url
+        try:
+            baseline = None
+            for workers in args.workers:
+                throughput, p50, p99, errors = run(workers, env, args.clients, args.seconds, args.load_processes)
+                baseline = baseline or throughput
+                print(f"{workers:>8} {throughput:>8.0f} {throughput / baseline:>6.2f} "
+                      f"{p50 * 1e3:>8.1f} {p99 * 1e3:>8.1f} {errors:>8}")
+        finally:
+            if redis_server is not None:
+                redis_server.terminate()
+                redis_server.wait()
+
+
+if __name__ == "__main__":
+    main()
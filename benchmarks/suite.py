@@ -0,0 +1,350 @@
+"""Suite de benchmarks con línea base: rutas REST, almacén y herramientas MCP.
+
+Uso: python -m benchmarks.suite [--sizes 1k,100k,1M] [--modes testclient,uvicorn,mcp-inprocess,mcp-http]
+                                [--iterations 200] [--baseline benchmarks/baseline.json]
+                                [--update-baseline] [--threshold 0.25] [--output resultados.json]
+
+Para cada tamaño de datos (ítems repartidos en listas de 100) y cada modo:
+
+- ``testclient``: cada ruta de ``app/routes`` con ``TestClient``, en el mismo proceso.
+- ``uvicorn``: las mismas rutas contra un proceso uvicorn real (``--backend``
+  elige el almacén); los datos se cargan con ``POST /import``.
+- ``mcp-inprocess``: cada herramienta MCP con el transporte en proceso.
+- ``mcp-http``: cada herramienta MCP con el transporte HTTP contra uvicorn.
+
+Guarda p50, p99 y caudal de cada caso. Con una línea base (``--baseline``)
+compara y termina con código 1 si algún caso empeora más que ``--threshold``
+(0.25 = un 25%) en las métricas de ``--gate``. ``--update-baseline`` escribe
+los resultados como nueva línea base. Las cifras dependen de la máquina: la
+línea base debe generarse en la misma máquina que la ejecución que se compara.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+from benchmarks.bench_backends import percentile
+from benchmarks.bench_mcp_http import wait_until_ready
+from tests.helpers import free_port
+
+ITEMS_PER_LIST = 100
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+MODES = ["testclient", "uvicorn", "mcp-inprocess", "mcp-http"]
+# Ejecuciones de los casos caros (exportar todo el almacén)
+HEAVY_ITERATIONS = 3
+BATCH = 10
+
+_unique = itertools.count()
+
+
+def parse_size(text: str) -> int:
+    multipliers = {"k": 1_000, "m": 1_000_000}
+    text = text.strip().lower()
+    if text[-1] in multipliers:
+        return int(float(text[:-1]) * multipliers[text[-1]])
+    return int(text)
+
+
+def dataset(size: int):
+    """Listas e ítems de prueba: ``size`` ítems en listas de ``ITEMS_PER_LIST``."""
+    list_count = max(3, size // ITEMS_PER_LIST)
+    lists = [{"id": n, "name": f"Lista {n}"} for n in range(1, list_count + 1)]
+    items = (
+        {"id": i, "list_id": (i - 1) // ITEMS_PER_LIST % list_count + 1,
+         "description": f"Tarea {i} de la lista", "completed": i % 3 == 0}
+        for i in range(1, size + 1)
+    )
+    return lists, items
+
+
+def ndjson_dataset(size: int):
+    lists, items = dataset(size)
+    batch = []
+    for record in itertools.chain(({"type": "list", **lst} for lst in lists),
+                                  ({"type": "item", **item} for item in items)):
+        batch.append(json.dumps(record, ensure_ascii=False))
+        if len(batch) == 5_000:
+            yield ("\n".join(batch) + "\n").encode()
+            batch = []
+    if batch:
+        yield ("\n".join(batch) + "\n").encode()
+
+
+def summarize(latencies, elapsed):
+    return {
+        "p50_ms": round(percentile(latencies, 0.50) * 1e3, 4),
+        "p99_ms": round(percentile(latencies, 0.99) * 1e3, 4),
+        "ops_per_s": round(len(latencies) / elapsed, 1),
+    }
+
+
+# Casos REST: (nombre, iteraciones, preparar(client, n) -> estado, ejecutar(client, estado, i))
+
+def _create_items(client, list_id, count):
+    ids = []
+    for start in range(0, count, 1000):
+        descriptions = [{"description": f"Bench {next(_unique)}"} for _ in range(min(1000, count - start))]
+        response = client.post(f"/lists/{list_id}/items/batch", json=descriptions)
+        response.raise_for_status()
+        ids += [result["item"]["id"] for result in response.json()]
+    return ids
+
+
+def _import_payloads(client, n):
+    first_id = 10_000_000 + next(_unique) * 100_000
+    return [
+        "".join(json.dumps({"type": "item", "id": first_id + i * 100 + k, "list_id": 3,
+                            "description": f"Importada {first_id + i * 100 + k}", "completed": False}) + "\n"
+                for k in range(100)).encode()
+        for i in range(n)
+    ]
+
+
+def rest_cases(iterations):
+    no_state = lambda client, n: None
+    return [
+        ("GET /lists/?limit=50", iterations, no_state, lambda c, s, i: c.get("/lists/", params={"limit": 50})),
+        ("POST /lists/", iterations, no_state, lambda c, s, i: c.post("/lists/", json={"name": f"Bench {next(_unique)}"})),
+        ("GET /lists/{id}/items/", iterations, no_state, lambda c, s, i: c.get("/lists/1/items/")),
+        ("GET /lists/{id}/items/?limit=20&completed=false", iterations, no_state,
+         lambda c, s, i: c.get("/lists/1/items/", params={"limit": 20, "completed": False})),
+        ("POST /lists/{id}/items/", iterations, no_state,
+         lambda c, s, i: c.post("/lists/2/items/", json={"description": f"Bench {next(_unique)}"})),
+        ("PUT /lists/{id}/items/{item_id}", iterations, no_state,
+         lambda c, s, i: c.put("/lists/1/items/1", json={"completed": i % 2 == 0})),
+        ("PATCH /lists/{id}/items/{item_id}/complete", iterations, no_state,
+         lambda c, s, i: c.patch("/lists/1/items/2/complete")),
+        ("DELETE /lists/{id}/items/{item_id}", iterations, lambda c, n: _create_items(c, 3, n),
+         lambda c, s, i: c.delete(f"/lists/3/items/{s[i]}")),
+        ("POST /lists/{id}/items/batch", iterations, no_state,
+         lambda c, s, i: c.post("/lists/2/items/batch", json=[{"description": f"Bench {next(_unique)}"} for _ in range(BATCH)])),
+        ("PUT /lists/{id}/items/batch", iterations, no_state,
+         lambda c, s, i: c.put("/lists/1/items/batch", json=[{"id": n, "completed": i % 2 == 0} for n in range(1, BATCH + 1)])),
+        ("PATCH /lists/{id}/items/batch/complete", iterations, no_state,
+         lambda c, s, i: c.patch("/lists/1/items/batch/complete", json={"ids": list(range(1, BATCH + 1))})),
+        ("DELETE /lists/{id}/items/batch", iterations, lambda c, n: _create_items(c, 3, n * BATCH),
+         lambda c, s, i: c.request("DELETE", "/lists/3/items/batch", json={"ids": s[i * BATCH:(i + 1) * BATCH]})),
+        ("GET /search/?q=tarea lis", iterations, no_state,
+         lambda c, s, i: c.get("/search/", params={"q": "tarea lis", "limit": 20})),
+        ("GET /search/?q=<id>", iterations, no_state, lambda c, s, i: c.get("/search/", params={"q": str(i + 1)})),
+        ("POST /import (100 ítems)", iterations, _import_payloads, lambda c, s, i: c.post("/import", content=s[i])),
+        ("GET /export", HEAVY_ITERATIONS, no_state, lambda c, s, i: c.get("/export")),
+        ("GET /metrics", iterations, no_state, lambda c, s, i: c.get("/metrics")),
+    ]
+
+
+def run_rest(client, iterations):
+    results = {}
+    for name, count, prepare, execute in rest_cases(iterations):
+        state = prepare(client, count)
+        latencies = []
+        start = time.perf_counter()
+        for i in range(count):
+            call_start = time.perf_counter()
+            response = execute(client, state, i)
+            latencies.append(time.perf_counter() - call_start)
+            if response.status_code >= 400:
+                raise RuntimeError(f"{name}: {response.status_code} {response.text[:200]}")
+        results[name] = summarize(latencies, time.perf_counter() - start)
+    return results
+
+
+# Casos MCP: cada herramienta registrada, con el transporte activo en app.mcp_server
+
+async def run_tools(iterations):
+    from app import mcp_server as tools
+
+    async def create_batch(n):
+        results = await tools.create_items(3, [f"Bench {next(_unique)}" for _ in range(n)])
+        return [result["item"]["id"] for result in results]
+
+    async def prepare_items(n):
+        ids = []
+        for start in range(0, n, 1000):
+            ids += await create_batch(min(1000, n - start))
+        return ids
+
+    cases = [
+        ("get_lists", None, lambda s, i: tools.get_lists()),
+        ("create_list", None, lambda s, i: tools.create_list(f"Bench {next(_unique)}")),
+        ("get_items", None, lambda s, i: tools.get_items(1)),
+        ("search_items", None, lambda s, i: tools.search_items("tarea lis")),
+        ("create_item", None, lambda s, i: tools.create_item(2, f"Bench {next(_unique)}")),
+        ("update_item", None, lambda s, i: tools.update_item(1, 1, completed=i % 2 == 0)),
+        ("complete_item", None, lambda s, i: tools.complete_item(1, 2)),
+        ("delete_item", lambda n: prepare_items(n), lambda s, i: tools.delete_item(3, s[i])),
+        ("create_items", None, lambda s, i: tools.create_items(2, [f"Bench {next(_unique)}" for _ in range(BATCH)])),
+        ("update_items", None, lambda s, i: tools.update_items(1, [{"id": n, "completed": i % 2 == 0} for n in range(1, BATCH + 1)])),
+        ("complete_items", None, lambda s, i: tools.complete_items(1, list(range(1, BATCH + 1)))),
+        ("delete_items", lambda n: prepare_items(n * BATCH), lambda s, i: tools.delete_items(3, s[i * BATCH:(i + 1) * BATCH])),
+    ]
+    results = {}
+    for name, prepare, execute in cases:
+        state = await prepare(iterations) if prepare else None
+        latencies = []
+        start = time.perf_counter()
+        for i in range(iterations):
+            call_start = time.perf_counter()
+            result = await execute(state, i)
+            latencies.append(time.perf_counter() - call_start)
+            if isinstance(result, dict) and "error" in result:
+                raise RuntimeError(f"{name}: {result['error'][:200]}")
+        results[name] = summarize(latencies, time.perf_counter() - start)
+    return results
+
+
+def seed_local(size):
+    from app.database import store
+    lists, items = dataset(size)
+    store.reset(lists, items)
+
+
+def start_server(backend, db_path):
+    port = free_port()
+    env = dict(os.environ, TODOLIST_BACKEND=backend, TODOLIST_DB_PATH=db_path, TODOLIST_MCP_TRANSPORT="http")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"], env=env
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    wait_until_ready(f"{base_url}/lists/")
+    return server, base_url
+
+
+def run_size(size, modes, iterations, backend):
+    from fastapi.testclient import TestClient
+    from app import mcp_server
+    from app.main import app
+
+    results = {}
+    if "testclient" in modes or "mcp-inprocess" in modes:
+        seed_local(size)
+        if "testclient" in modes:
+            results["testclient"] = run_rest(TestClient(app), iterations)
+            seed_local(size)
+        if "mcp-inprocess" in modes:
+            from app.inprocess import InProcessTransport
+            mcp_server.transport = InProcessTransport()
+            results["mcp-inprocess"] = asyncio.run(run_tools(iterations))
+    if "uvicorn" in modes or "mcp-http" in modes:
+        with tempfile.TemporaryDirectory() as tmp:
+            server, base_url = start_server(backend, os.path.join(tmp, "bench.db"))
+            try:
+                with httpx.Client(base_url=base_url, timeout=None, follow_redirects=True) as client:
+                    client.post("/import", params={"replace": True}, content=ndjson_dataset(size)).raise_for_status()
+                    if "uvicorn" in modes:
+                        results["uvicorn"] = run_rest(client, iterations)
+                if "mcp-http" in modes:
+                    mcp_server.transport = mcp_server.HttpTransport(base_url)
+                    mcp_server.async_client = None
+                    mcp_server.conditional_cache.clear()
+                    results["mcp-http"] = asyncio.run(run_tools(iterations))
+            finally:
+                server.terminate()
+                server.wait()
+    return results
+
+
+def flatten(results_by_size):
+    """``{tamaño: {modo: {caso: métricas}}}`` -> ``{"modo/tamaño/caso": métricas}``."""
+    return {
+        f"{mode}/{size}/{case}": values
+        for size, by_mode in results_by_size.items()
+        for mode, cases in by_mode.items()
+        for case, values in cases.items()
+    }
+
+
+def find_regressions(current: dict, baseline: dict, threshold: float, gate=("p50_ms", "ops_per_s")) -> list[str]:
+    """Casos que empeoran más que ``threshold`` respecto a la línea base.
+
+    Las latencias (``*_ms``) empeoran al subir y el caudal al bajar. Los casos
+    que no están en los dos resultados se ignoran.
+    """
+    regressions = []
+    for key, values in current.items():
+        base = baseline.get(key)
+        if base is None:
+            continue
+        for metric in gate:
+            if metric not in values or metric not in base or not base[metric]:
+                continue
+            if metric.endswith("_ms"):
+                change = values[metric] / base[metric] - 1
+            else:
+                change = base[metric] / values[metric] - 1 if values[metric] else float("inf")
+            if change > threshold:
+                regressions.append(f"{key} {metric}: {base[metric]} -> {values[metric]} (+{change:.0%})")
+    return regressions
+
+
+def print_results(flat, baseline):
+    print(f"{'caso':<75} {'p50 ms':>9} {'p99 ms':>9} {'ops/s':>10} {'base p50':>9}")
+    for key, values in flat.items():
+        base = baseline.get(key, {}).get("p50_ms")
+        base_text = f"{base:>9.3f}" if base is not None else f"{'-':>9}"
+        print(f"{key:<75} {values['p50_ms']:>9.3f} {values['p99_ms']:>9.3f} {values['ops_per_s']:>10.1f} {base_text}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Suite de benchmarks con comparación contra una línea base")
+    parser.add_argument("--sizes", default="1k,100k,1M", help="Tamaños de datos separados por comas (1k, 100k, 1M...)")
+    parser.add_argument("--modes", default=",".join(MODES), help=f"Modos separados por comas: {', '.join(MODES)}")
+    parser.add_argument("--iterations", type=int, default=200, help="Llamadas por caso")
+    parser.add_argument("--backend", default="memory", choices=["memory", "columnar", "sqlite"], help="Almacén del proceso uvicorn")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Fichero JSON de la línea base")
+    parser.add_argument("--update-baseline", action="store_true", help="Guardar los resultados como línea base")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Empeoramiento tolerado (0.25 = 25%%)")
+    parser.add_argument("--gate", default="p50_ms,ops_per_s", help="Métricas que cuentan como regresión")
+    parser.add_argument("--output", help="Guardar también los resultados en este fichero JSON")
+    args = parser.parse_args()
+
+    # FastMCP activa el nivel INFO: sin esto cada petición del benchmark escribiría una línea de log
+    logging.disable(logging.INFO)
+    modes = [mode.strip() for mode in args.modes.split(",") if mode.strip()]
+    unknown = set(modes) - set(MODES)
+    if unknown:
+        parser.error(f"Modos desconocidos: {', '.join(sorted(unknown))}")
+    sizes = [parse_size(size) for size in args.sizes.split(",")]
+
+    results_by_size = {}
+    for size in sizes:
+        print(f"== {size} ítems ==", file=sys.stderr)
+        results_by_size[size] = run_size(size, modes, args.iterations, args.backend)
+    flat = flatten(results_by_size)
+
+    baseline = {}
+    if os.path.exists(args.baseline) and not args.update_baseline:
+        with open(args.baseline) as source:
+            baseline = json.load(source)["results"]
+    print_results(flat, baseline)
+
+    document = {
+        "meta": {"python": platform.python_version(), "machine": platform.machine(), "node": platform.node(),
+                 "iterations": args.iterations, "backend": args.backend},
+        "results": flat,
+    }
+    for path in filter(None, [args.output, args.baseline if args.update_baseline else None]):
+        with open(path, "w") as target:
+            json.dump(document, target, indent=2, ensure_ascii=False)
+            target.write("\n")
+        print(f"Resultados guardados en {path}", file=sys.stderr)
+
+    regressions = find_regressions(flat, baseline, args.threshold, tuple(args.gate.split(",")))
+    if regressions:
+        print(f"\n{len(regressions)} regresiones por encima del {args.threshold:.0%}:")
+        for regression in regressions:
+            print(f"  {regression}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,26 +1,113 @@
+"""Arranque del proyecto.
+
+- ``python run.py``: instala las dependencias (solo si ``requirements.txt``
+  cambió desde la última instalación), ejecuta los tests y arranca la API
+  REST y el servidor MCP (desarrollo).
+- ``python run.py --serve``: arranca solo la API (producción), sin recarga y
+  con ``TODOLIST_WORKERS`` procesos, en este mismo proceso.
+
+Dirección, puerto, workers y recarga salen de ``app.config`` (variables
+``TODOLIST_HOST``, ``TODOLIST_PORT``, ``TODOLIST_WORKERS`` y
+``TODOLIST_RELOAD``) y se pueden cambiar con las opciones de la línea de comandos.
+"""
+import argparse
+import hashlib
+import os
 import subprocess
 import sys
 
+from app import config
+
+# Backends cuyos datos comparten varios procesos: los únicos válidos con más de un worker
+SHARED_BACKENDS = ("sqlite", "redis")
+# Huella del requirements.txt instalado y del entorno de Python donde se instaló,
+# dentro del proyecto: nunca se escribe en el directorio del Python del sistema
+REQUIREMENTS_STAMP = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".todolist-requirements.sha256")
+
+
 def run_command(cmd):
     result = subprocess.run(cmd, shell=True)
     if result.returncode != 0:
         sys.exit(result.returncode)
 
-def main():
+
+def api_command(host: str, port: int, workers: int, reload: bool) -> list[str]:
+    """Comando de uvicorn para la API; rechaza combinaciones que perderían o mezclarían datos."""
+    if reload and workers > 1:
+        sys.exit("La recarga automática (--reload) solo funciona con un worker")
+    if workers > 1 and config.STORE_BACKEND not in SHARED_BACKENDS:
+        sys.exit(f"Con varios workers el backend debe ser compartido ({', '.join(SHARED_BACKENDS)}): "
+                 f"con TODOLIST_BACKEND={config.STORE_BACKEND} cada worker tendría sus propios datos")
+    command = [sys.executable, "-m", "uvicorn", "app.main:app", "--host", host, "--port", str(port)]
+    if reload:
+        command.append("--reload")
+    else:
+        command += ["--workers", str(workers)]
+    return command
+
+
+def serve(host: str, port: int, workers: int, reload: bool):
+    """Arranca uvicorn dentro de este proceso, sin lanzar un segundo intérprete."""
+    api_command(host, port, workers, reload)
+    import uvicorn
+    uvicorn.run("app.main:app", host=host, port=port, workers=workers, reload=reload)
+
+
+def install_requirements(path: str = "requirements.txt"):
+    """Instala ``path`` solo si su contenido cambió desde la última instalación en este entorno."""
+    with open(path, "rb") as file:
+        digest = f"{hashlib.sha256(file.read()).hexdigest()} {sys.prefix}"
+    try:
+        with open(REQUIREMENTS_STAMP) as file:
+            if file.read().strip() == digest:
+                print("▶ Dependencias al día")
+                return
+    except OSError:
+        pass
     print("▶ Instalando dependencias...")
     run_command(f"{sys.executable} -m pip install --upgrade pip")
-    run_command(f"{sys.executable} -m pip install -r requirements.txt")
+    run_command(f"{sys.executable} -m pip install -r {path}")
+    try:
+        with open(REQUIREMENTS_STAMP, "w") as file:
+            file.write(digest)
+    except OSError:
+        # Entorno de solo lectura: se reinstalará en el próximo arranque
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Arranca la API REST de TodoList (y el servidor MCP en desarrollo)")
+    parser.add_argument("--serve", action="store_true",
+                        help="solo la API, sin instalar dependencias, ejecutar tests ni arrancar el servidor MCP")
+    parser.add_argument("--host", default=config.HOST)
+    parser.add_argument("--port", type=int, default=config.PORT)
+    parser.add_argument("--workers", type=int, default=config.WORKERS)
+    parser.add_argument("--reload", action="store_true", default=config.RELOAD,
+                        help="recargar al cambiar el código (solo desarrollo)")
+    parser.add_argument("--skip-tests", action="store_true",
+                        help="no ejecutar los tests antes de arrancar (desarrollo)")
+    args = parser.parse_args()
+
+    if args.serve:
+        # uvicorn corre en este proceso: recibe directamente las señales del gestor de servicios
+        serve(args.host, args.port, args.workers, args.reload)
+        return
 
-    print("▶ Iniciando pruebas unitarias...")
-    run_command(f"{sys.executable} -m pytest tests --disable-warnings -q")
+    api_cmd = api_command(args.host, args.port, args.workers, args.reload)
+    install_requirements()
 
-    print("▶ Iniciando API REST (puerto 8000)...")
-    api_cmd = f"{sys.executable} -m uvicorn app.main:app --reload"
-    subprocess.Popen(api_cmd, shell=True)
+    if not args.skip_tests:
+        print("▶ Iniciando pruebas unitarias...")
+        run_command(f"{sys.executable} -m pytest tests --disable-warnings -q")
+
+    print(f"▶ Iniciando API REST (puerto {args.port})...")
+    subprocess.Popen(api_cmd)
 
     print("▶ Iniciando Servidor MCP (esperando conexiones MCP)...")
-    mcp_cmd = f"{sys.executable} app/mcp_server.py"
-    subprocess.run(mcp_cmd, shell=True)    
+    env = dict(os.environ)
+    env.setdefault("TODOLIST_API_URL", f"http://localhost:{args.port}")
+    subprocess.run([sys.executable, "app/mcp_server.py"], env=env)
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,16 @@
+import pytest
+
+from tests import helpers
+from tests.helpers import free_port
+
+
+@pytest.fixture(scope="session")
+def redis_url():
+    """Servidor local compatible con el protocolo de Redis (fakeredis) para el backend ``redis``"""
+    pytest.importorskip("fakeredis")
+    pytest.importorskip("redis")
+    port = free_port()
+    server = helpers.start(port)
+    yield f"redis://127.0.0.1:{port}/0"
+    server.terminate()
+    server.wait()
@@ -0,0 +1,71 @@
+"""Utilidades compartidas por los tests y los benchmarks.
+
+Incluye un servidor local compatible con el protocolo de Redis, para probar
+el backend ``redis`` sin instalar Redis:
+
+Uso: python -m tests.helpers [--port 6379]
+
+Usa ``fakeredis`` (``pip install fakeredis``): guarda los datos en memoria y
+atiende cada conexión en un hilo, así que sirve para tests y pruebas de
+varios workers, no para medir el rendimiento de Redis.
+"""
+import argparse
+import socket
+import subprocess
+import sys
+import time
+
+
+def free_port() -> int:
+    """Puerto TCP libre en ``127.0.0.1``."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def serve(port: int, host: str = "127.0.0.1"):
+    import fakeredis
+
+    class Server(fakeredis.TcpFakeServer):
+        daemon_threads = True
+
+        def get_request(self):
+            # Responde cada comando de un pipeline sin esperar al ACK del anterior (algoritmo de Nagle)
+            conn, address = super().get_request()
+            conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            return conn, address
+
+    Server((host, port)).serve_forever()
+
+
+def start(port: int, timeout: float = 10) -> subprocess.Popen:
+    """Arranca el servidor en un subproceso y espera a que responda a ``PING``."""
+    import redis
+
+    server = subprocess.Popen([sys.executable, "-m", "tests.helpers", "--port", str(port)])
+    client = redis.Redis(port=port)
+    deadline = time.monotonic() + timeout
+    try:
+        while True:
+            try:
+                client.ping()
+                return server
+            except redis.ConnectionError:
+                if time.monotonic() > deadline:
+                    server.kill()
+                    raise
+                time.sleep(0.05)
+    finally:
+        client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6379)
+    args = parser.parse_args()
+    serve(args.port, args.host)
+
+
+if __name__ == "__main__":
+    main()
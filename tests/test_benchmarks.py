@@ -0,0 +1,37 @@
+from benchmarks.suite import find_regressions, parse_size
+
+BASELINE = {
+    "testclient/1000/GET /lists/": {"p50_ms": 2.0, "p99_ms": 5.0, "ops_per_s": 400.0},
+    "mcp-http/1000/get_items": {"p50_ms": 1.0, "p99_ms": 3.0, "ops_per_s": 900.0},
+}
+
+
+class TestBenchmarkSuite:
+    def test_parse_size(self):
+        assert parse_size("1k") == 1_000
+        assert parse_size("100K") == 100_000
+        assert parse_size("1M") == 1_000_000
+        assert parse_size("2500") == 2_500
+
+    def test_no_regression_within_threshold(self):
+        current = {
+            "testclient/1000/GET /lists/": {"p50_ms": 2.4, "p99_ms": 9.0, "ops_per_s": 350.0},
+            "mcp-http/1000/get_items": {"p50_ms": 0.8, "p99_ms": 3.0, "ops_per_s": 1000.0},
+        }
+        assert find_regressions(current, BASELINE, threshold=0.25) == []
+
+    def test_slower_latency_and_lower_throughput_are_regressions(self):
+        current = {
+            "testclient/1000/GET /lists/": {"p50_ms": 3.0, "p99_ms": 5.0, "ops_per_s": 400.0},
+            "mcp-http/1000/get_items": {"p50_ms": 1.0, "p99_ms": 3.0, "ops_per_s": 600.0},
+            "uvicorn/1000/GET /lists/": {"p50_ms": 50.0, "p99_ms": 90.0, "ops_per_s": 10.0},
+        }
+        regressions = find_regressions(current, BASELINE, threshold=0.25)
+        assert len(regressions) == 2
+        assert regressions[0].startswith("testclient/1000/GET /lists/ p50_ms")
+        assert regressions[1].startswith("mcp-http/1000/get_items ops_per_s")
+
+    def test_gate_selects_metrics(self):
+        current = {"testclient/1000/GET /lists/": {"p50_ms": 2.0, "p99_ms": 50.0, "ops_per_s": 400.0}}
+        assert find_regressions(current, BASELINE, threshold=0.25) == []
+        assert len(find_regressions(current, BASELINE, threshold=0.25, gate=("p99_ms",))) == 1
@@ -0,0 +1,167 @@
+import random
+import sys
+import threading
+
+import pytest
+from fastapi import HTTPException
+
+from app import services
+from app.columnar_store import ColumnarStore
+from app.models import TodoItemCreate, TodoItemUpdate
+from app.sqlite_store import SQLiteStore
+from app.store import InMemoryStore, description_key
+
+LISTS = [{"id": n, "name": f"Lista {n}"} for n in range(1, 5)]
+THREADS = 8
+OPERATIONS = 300
+# Pocas descripciones posibles para provocar colisiones entre hilos
+DESCRIPTIONS = [f"Tarea {n}" for n in range(15)]
+
+
+def open_shared_store(backend, request, tmp_path):
+    """Abre un almacén compartible entre procesos; cada llamada equivale a un worker distinto"""
+    if backend == "sqlite":
+        return SQLiteStore(str(tmp_path / "todolist.db"), LISTS)
+    from app.redis_store import RedisStore
+    return RedisStore(request.getfixturevalue("redis_url"), seed_lists=LISTS)
+
+
+@pytest.fixture(params=["memory", "sqlite", "redis"])
+def store(request, tmp_path, monkeypatch):
+    if request.param == "memory":
+        test_store = InMemoryStore(LISTS)
+    else:
+        if request.param == "redis":
+            import redis
+            redis.Redis.from_url(request.getfixturevalue("redis_url")).flushall()
+        test_store = open_shared_store(request.param, request, tmp_path)
+    monkeypatch.setattr(services, "store", test_store)
+    yield test_store
+    if request.param != "memory":
+        test_store.close()
+
+
+@pytest.fixture(autouse=True)
+def frequent_thread_switches():
+    """Cambiar de hilo muy a menudo para forzar intercalados"""
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    yield
+    sys.setswitchinterval(interval)
+
+
+def hammer(seed, created_ids, errors):
+    rng = random.Random(seed)
+    mine = []
+    for _ in range(OPERATIONS):
+        list_id = rng.choice(LISTS)["id"]
+        description = rng.choice(DESCRIPTIONS)
+        description = description.upper() if rng.random() < 0.5 else description
+        try:
+            operation = rng.random()
+            if operation < 0.5 or not mine:
+                item = services.create_item(list_id, TodoItemCreate(description=description))
+                created_ids.append(item["id"])
+                mine.append((list_id, item["id"]))
+            elif operation < 0.8:
+                target_list, item_id = rng.choice(mine)
+                services.update_item(target_list, item_id, TodoItemUpdate(description=description))
+            else:
+                target = mine.pop(rng.randrange(len(mine)))
+                services.delete_item(*target)
+        except HTTPException as e:
+            if e.status_code not in (400, 404):
+                errors.append(e)
+        except Exception as e:
+            errors.append(e)
+
+
+class TestConcurrentWrites:
+    def test_ids_unique_and_no_duplicate_descriptions(self, store):
+        created_ids = []
+        errors = []
+        threads = [threading.Thread(target=hammer, args=(seed, created_ids, errors)) for seed in range(THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert errors == []
+        assert len(created_ids) == len(set(created_ids))
+        for lst in LISTS:
+            items = store.get_items(lst["id"])
+            keys = [description_key(item["description"]) for item in items]
+            assert len(keys) == len(set(keys))
+            # Los índices siguen apuntando a los ítems correctos
+            for item in items:
+                assert store.find_by_description(lst["id"], item["description"])["id"] == item["id"]
+            assert [item["id"] for item in store.page_items(lst["id"])] == sorted(item["id"] for item in items)
+
+    def test_writers_to_different_lists_do_not_share_locks(self, store):
+        assert store.lock_list(1) is store.lock_list(1)
+        assert store.lock_list(1) is not store.lock_list(2)
+
+    @pytest.mark.parametrize("store_class", [InMemoryStore, ColumnarStore])
+    def test_reset_waits_for_writers(self, store_class):
+        memory_store = store_class(LISTS)
+        writing = threading.Event()
+        finish = threading.Event()
+
+        def writer():
+            with memory_store.lock_list(2):
+                writing.set()
+                finish.wait()
+
+        thread = threading.Thread(target=writer)
+        thread.start()
+        writing.wait()
+        resetter = threading.Thread(target=memory_store.reset, args=([{"id": 9, "name": "Nueva"}],))
+        try:
+            resetter.start()
+            resetter.join(0.2)
+            # La escritura en curso todavía ve el contenido anterior
+            assert resetter.is_alive()
+            assert memory_store.find_list_by_name("Lista 2")["id"] == 2
+        finally:
+            finish.set()
+            thread.join()
+            resetter.join()
+        assert [lst["id"] for lst in memory_store.get_lists()] == [9]
+
+
+class TestSharedBackend:
+    """Dos instancias del almacén sobre los mismos datos, como dos workers con candados independientes"""
+
+    @pytest.mark.parametrize("backend", ["sqlite", "redis"])
+    def test_workers_do_not_create_duplicates(self, backend, request, tmp_path):
+        if backend == "redis":
+            import redis
+            redis.Redis.from_url(request.getfixturevalue("redis_url")).flushall()
+        workers = [open_shared_store(backend, request, tmp_path) for _ in range(2)]
+        created = []
+        errors = []
+
+        def create(worker, seed):
+            for description in DESCRIPTIONS:
+                try:
+                    item = worker.add_item({"id": worker.next_item_id(), "list_id": seed % 2 + 1,
+                                            "description": description, "completed": False})
+                    created.append(item["id"])
+                except ValueError:
+                    pass
+                except Exception as e:
+                    errors.append(e)
+
+        threads = [threading.Thread(target=create, args=(workers[seed % 2], seed)) for seed in range(THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert errors == []
+        assert len(created) == len(set(created)) == 2 * len(DESCRIPTIONS)
+        for list_id in (1, 2):
+            assert len(workers[1].get_items(list_id)) == len(DESCRIPTIONS)
+            assert workers[0].list_counts(list_id) == (len(DESCRIPTIONS), 0)
+        for worker in workers:
+            worker.close()
@@ -0,0 +1,228 @@
+import asyncio
+import time
+import uuid
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from app import idempotency, mcp_server, metrics, services
+from app.idempotency import IdempotencyCache, IdempotencyMiddleware, RedisIdempotencyCache, SQLiteIdempotencyCache
+from app.main import app
+
+client = TestClient(app)
+
+
+def new_key() -> dict:
+    return {"Idempotency-Key": uuid.uuid4().hex}
+
+
+@pytest.fixture(autouse=True)
+def reset_db():
+    from app.database import store
+    original_lists, original_items = store.export()
+    yield
+    store.reset(original_lists, original_items)
+
+
+class TestIdempotencyMiddleware:
+    def test_retry_returns_the_first_response(self):
+        headers = new_key()
+        first = client.post("/lists/1/items/", json={"description": "Comprar pan"}, headers=headers)
+        retry = client.post("/lists/1/items/", json={"description": "Comprar pan"}, headers=headers)
+        assert first.status_code == retry.status_code == 201
+        assert retry.json() == first.json()
+        assert retry.headers["idempotent-replayed"] == "true"
+        assert "idempotent-replayed" not in first.headers
+        assert [item["description"] for item in client.get("/lists/1/items/").json()].count("Comprar pan") == 1
+
+    def test_retried_create_list_is_not_a_duplicate(self):
+        headers = new_key()
+        first = client.post("/lists/", json={"name": "Compras"}, headers=headers)
+        assert client.post("/lists/", json={"name": "Compras"}, headers=headers).json() == first.json()
+        # Sin clave, el mismo nombre es un 400 (antes un 500)
+        assert client.post("/lists/", json={"name": "Compras"}).status_code == 400
+
+    def test_validation_errors_are_replayed(self, monkeypatch):
+        headers = new_key()
+        assert client.post("/lists/1/items/", json={"description": "Hi"}, headers=headers).status_code == 422
+        calls = []
+        monkeypatch.setattr(services, "create_item", lambda *args: calls.append(args))
+        retry = client.post("/lists/1/items/", json={"description": "Hi"}, headers=headers)
+        assert retry.status_code == 422
+        assert retry.headers["idempotent-replayed"] == "true"
+        assert calls == []
+
+    def test_same_key_with_another_body_is_rejected(self):
+        headers = new_key()
+        client.post("/lists/1/items/", json={"description": "Comprar pan"}, headers=headers)
+        response = client.post("/lists/1/items/", json={"description": "Comprar leche"}, headers=headers)
+        assert response.status_code == 422
+        assert "otro cuerpo" in response.json()["detail"]
+
+    def test_key_is_scoped_to_the_route(self):
+        headers = new_key()
+        assert client.post("/lists/1/items/", json={"description": "Comprar pan"}, headers=headers).status_code == 201
+        assert client.post("/lists/2/items/", json={"description": "Comprar pan"}, headers=headers).status_code == 201
+
+    def test_server_errors_are_not_stored(self, monkeypatch):
+        headers = new_key()
+        original = services.create_item
+
+        def failing(*args):
+            raise RuntimeError("fallo del almacén")
+
+        monkeypatch.setattr(services, "create_item", failing)
+        failing_client = TestClient(app, raise_server_exceptions=False)
+        assert failing_client.post("/lists/1/items/", json={"description": "Comprar pan"},
+                                   headers=headers).status_code == 500
+        monkeypatch.setattr(services, "create_item", original)
+        retry = client.post("/lists/1/items/", json={"description": "Comprar pan"}, headers=headers)
+        assert retry.status_code == 201
+        assert "idempotent-replayed" not in retry.headers
+
+    def test_invalid_key(self):
+        response = client.post("/lists/", json={"name": "Compras"}, headers={"Idempotency-Key": "x" * 256})
+        assert response.status_code == 400
+
+    def test_streaming_import_is_not_buffered(self):
+        produced = []
+        received = []
+
+        async def upload():
+            for n in range(3):
+                produced.append(n)
+                yield {"type": "http.request", "body": b"x" * 1024, "more_body": n < 2}
+
+        chunks = upload()
+
+        async def receive():
+            return await chunks.__anext__()
+
+        async def streaming_app(scope, receive, send):
+            while True:
+                message = await receive()
+                # Cada trozo llega antes de que se lea el siguiente: nada se acumula
+                received.append((len(message["body"]), len(produced)))
+                if not message["more_body"]:
+                    break
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b"{}"})
+
+        async def send(message):
+            pass
+
+        middleware = IdempotencyMiddleware(streaming_app, cache=IdempotencyCache(ttl=60, max_entries=10))
+        scope = {"type": "http", "method": "POST", "path": "/import", "query_string": b"",
+                 "headers": [(b"idempotency-key", b"clave")]}
+        asyncio.run(middleware(scope, receive, send))
+        assert received == [(1024, 1), (1024, 2), (1024, 3)]
+        assert len(middleware.cache) == 0
+
+    def test_keyed_import_runs_every_time(self):
+        export = client.get("/export").content
+        headers = new_key()
+        for _ in range(2):
+            response = client.post("/import?replace=true", content=export, headers=headers)
+            assert response.status_code == 200
+            assert "idempotent-replayed" not in response.headers
+
+    def test_large_responses_are_not_stored(self):
+        calls = []
+
+        async def large_app(scope, receive, send):
+            calls.append(scope["path"])
+            await receive()
+            await send({"type": "http.response.start", "status": 201, "headers": []})
+            await send({"type": "http.response.body", "body": b"x" * 100, "more_body": True})
+            await send({"type": "http.response.body", "body": b"x" * 100})
+
+        middleware = IdempotencyMiddleware(large_app, cache=IdempotencyCache(ttl=60, max_entries=10),
+                                           max_response=150)
+        large_client = TestClient(middleware)
+        headers = new_key()
+        for _ in range(2):
+            response = large_client.post("/grande", json={}, headers=headers)
+            assert response.status_code == 201
+            assert len(response.content) == 200
+            assert "idempotent-replayed" not in response.headers
+        # No se guardó: la clave se liberó y el reintento volvió a ejecutarse
+        assert calls == ["/grande", "/grande"]
+        assert len(middleware.cache) == 0
+
+
+class TestIdempotencyCache:
+    def test_entries_expire(self, monkeypatch):
+        cache = IdempotencyCache(ttl=10, max_entries=100)
+        now = time.monotonic()
+        assert cache.reserve("a", "f") is None
+        assert cache.reserve("a", "f") == {"fingerprint": "f", "status": None}
+        cache.complete("a", {"fingerprint": "f", "status": 201})
+        monkeypatch.setattr(idempotency.time, "monotonic", lambda: now + 11)
+        assert cache.reserve("a", "f") is None
+
+    def test_size_is_bounded(self):
+        cache = IdempotencyCache(ttl=60, max_entries=3)
+        for key in "abcde":
+            cache.reserve(key, "f")
+            cache.complete(key, {"fingerprint": "f", "status": 201})
+        assert len(cache) == 3
+        assert cache.reserve("a", "f") is None
+        assert cache.reserve("e", "f")["status"] == 201
+
+    @pytest.mark.parametrize("backend", ["sqlite", "redis"])
+    def test_shared_between_workers(self, backend, request, tmp_path):
+        if backend == "sqlite":
+            workers = [SQLiteIdempotencyCache(str(tmp_path / "todolist.db"), ttl=60, max_entries=100)
+                       for _ in range(2)]
+        else:
+            pytest.importorskip("redis")
+            url = request.getfixturevalue("redis_url")
+            workers = [RedisIdempotencyCache(url, "{test}", ttl=60) for _ in range(2)]
+        key = uuid.uuid4().hex
+        assert workers[0].reserve(key, "f") is None
+        # El otro worker ve la petición en curso y no la ejecuta
+        assert workers[1].reserve(key, "f") == {"fingerprint": "f", "status": None}
+        workers[0].complete(key, {"fingerprint": "f", "status": 201, "headers": [], "body": "{}"})
+        assert workers[1].reserve(key, "f")["status"] == 201
+        workers[0].release(key)
+        assert workers[1].reserve(key, "f") is None
+
+
+class LostResponses(httpx.AsyncBaseTransport):
+    """Ejecuta cada petición en la API pero pierde la respuesta de las ``failures`` primeras"""
+
+    def __init__(self, failures: int):
+        self.api = httpx.ASGITransport(app=app)
+        self.failures = failures
+        self.requests = 0
+
+    async def handle_async_request(self, request):
+        self.requests += 1
+        response = await self.api.handle_async_request(request)
+        await response.aread()
+        if self.requests <= self.failures:
+            raise httpx.ReadError("conexión cerrada antes de recibir la respuesta", request=request)
+        return response
+
+
+class TestMCPRetries:
+    def test_retries_under_lost_responses_write_exactly_once(self, monkeypatch):
+        monkeypatch.setattr(mcp_server, "HTTP_BACKOFF", 0)
+        monkeypatch.setattr(mcp_server, "transport", mcp_server.HttpTransport("http://api"))
+        writes = []
+        original = services.create_item
+        monkeypatch.setattr(services, "create_item", lambda *args: writes.append(args) or original(*args))
+        lost = LostResponses(failures=mcp_server.HTTP_RETRIES)
+        monkeypatch.setattr(mcp_server, "async_client", httpx.AsyncClient(transport=lost))
+        metrics.reset()
+
+        item = asyncio.run(mcp_server.create_item(1, "Comprar pan"))
+
+        # Cada intento llegó a la API, pero solo el primero escribió
+        assert lost.requests == mcp_server.HTTP_RETRIES + 1
+        assert len(writes) == 1
+        assert f'todolist_idempotent_requests_total{{outcome="replayed"}} {mcp_server.HTTP_RETRIES}' in metrics.render()
+        assert item["description"] == "Comprar pan"
+        items = client.get("/lists/1/items/").json()
+        assert [row for row in items if row["description"] == "Comprar pan"] == [item]
@@ -1,3 +1,4 @@
+import json
 import pytest
 from fastapi.testclient import TestClient
 from app.main import app
@@ -26,6 +27,90 @@ class TestLists:
         assert data["name"] == "Nueva Lista"
         assert "id" in data
 
+    def test_create_list_duplicate_name(self):
+        """Test crear una lista con un nombre en uso devuelve 400, no 500"""
+        response = client.post("/lists/", json={"name": " trabajo "})
+        assert response.status_code == 400
+        assert response.json()["detail"] == "Ya existe una lista con este nombre"
+
+    def test_blank_list_name(self):
+        """Test un nombre de lista solo con espacios devuelve 400, no 500"""
+        response = client.post("/lists/", json={"name": "   "})
+        assert response.status_code == 400
+        assert response.json()["detail"] == "El nombre de la lista no puede estar vacío"
+        assert client.patch("/lists/2", json={"name": "   "}).status_code == 400
+        assert client.get("/lists/").json()[1]["name"] == "Casa"
+        response = client.post("/by-name/items/", json={"list_name": "  ", "items": [{"description": "Leche"}],
+                                                        "create_list": True})
+        assert response.status_code == 400
+
+    def test_get_lists_with_counts(self):
+        """Test incluir los contadores de ítems en las listas"""
+        client.patch("/lists/1/items/1/complete")
+        response = client.get("/lists/?include_counts=true")
+        assert response.status_code == 200
+        assert response.json()[:2] == [
+            {"id": 1, "name": "Trabajo", "item_count": 2, "completed_count": 2},
+            {"id": 2, "name": "Casa", "item_count": 2, "completed_count": 1},
+        ]
+        assert "item_count" not in client.get("/lists/").json()[0]
+        response = client.get("/lists/?include_counts=true&fields=id,completed_count")
+        assert response.json()[0] == {"id": 1, "completed_count": 2}
+
+    def test_counts_etag_changes_with_items(self):
+        """Test el ETag de las listas con contadores cambia al escribir ítems"""
+        etag = client.get("/lists/?include_counts=true").headers["etag"]
+        plain_etag = client.get("/lists/").headers["etag"]
+        client.post("/lists/2/items/", json={"description": "Barrer"})
+        response = client.get("/lists/?include_counts=true", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.json()[1]["item_count"] == 3
+        assert client.get("/lists/", headers={"If-None-Match": plain_etag}).status_code == 304
+
+    def test_get_list_stats(self):
+        """Test obtener el resumen de una lista"""
+        client.patch("/lists/2/items/3/complete")
+        response = client.get("/lists/2/stats")
+        assert response.status_code == 200
+        assert response.json() == {"list_id": 2, "item_count": 2, "completed_count": 2, "pending_count": 0}
+        assert client.get("/lists/2/stats", headers={"If-None-Match": response.headers["etag"]}).status_code == 304
+        client.delete("/lists/2/items/3")
+        assert client.get("/lists/2/stats").json() == {"list_id": 2, "item_count": 1, "completed_count": 1,
+                                                       "pending_count": 0}
+        assert client.get("/lists/999/stats").status_code == 404
+
+    def test_rename_list(self):
+        """Test renombrar una lista"""
+        etag = client.get("/lists/").headers["etag"]
+        response = client.patch("/lists/2", json={"name": "  Hogar "})
+        assert response.status_code == 200
+        assert response.json() == {"id": 2, "name": "Hogar"}
+        assert client.get("/lists/", headers={"If-None-Match": etag}).json()[1]["name"] == "Hogar"
+        assert client.post("/lists/", json={"name": "Casa"}).status_code == 201
+
+    def test_rename_list_invalid(self):
+        """Test renombrar con un nombre en uso o una lista inexistente"""
+        response = client.patch("/lists/2", json={"name": "TRABAJO"})
+        assert response.status_code == 400
+        assert response.json()["detail"] == "Ya existe una lista con este nombre"
+        assert client.patch("/lists/2", json={"name": "casa"}).status_code == 200
+        assert client.patch("/lists/999", json={"name": "Otra"}).status_code == 404
+        assert client.patch("/lists/2", json={"name": ""}).status_code == 422
+
+    def test_delete_list_with_items(self):
+        """Test eliminar una lista elimina también sus ítems"""
+        seq = client.get("/changes/").json()["seq"]
+        response = client.delete("/lists/1")
+        assert response.status_code == 204
+        assert [lst["id"] for lst in client.get("/lists/").json()] == [2]
+        assert client.get("/lists/1/items/").status_code == 404
+        assert client.get("/lists/1/stats").status_code == 404
+        assert client.get("/search/?q=portatil").json() == []
+        assert client.delete("/lists/1").status_code == 404
+        change = client.get(f"/changes/?since={seq}").json()["changes"][0]
+        assert change["type"] == "list_deleted"
+        assert change["list"] == {"id": 1, "name": "Trabajo", "item_count": 2, "completed_count": 1}
+
 class TestItems:
     def test_get_items_valid_list(self):
         """Test obtener ítems de una lista válida"""
@@ -157,13 +242,439 @@ class TestItems:
         response = client.delete("/lists/1/items/999")
         assert response.status_code == 404
 
+class TestPagination:
+    def test_get_items_paginated(self):
+        """Test recorrer los ítems de una lista página a página"""
+        client.post("/lists/1/items/batch", json=[{"description": f"Página {n}"} for n in range(5)])
+        seen = []
+        cursor = None
+        while True:
+            params = {"limit": 3}
+            if cursor:
+                params["cursor"] = cursor
+            response = client.get("/lists/1/items/", params=params)
+            assert response.status_code == 200
+            assert len(response.json()) <= 3
+            seen += [item["id"] for item in response.json()]
+            cursor = response.headers.get("X-Next-Cursor")
+            if cursor is None:
+                break
+        all_items = client.get("/lists/1/items/").json()
+        assert seen == [item["id"] for item in all_items]
+
+    def test_get_items_filters(self):
+        """Test filtrar por completado y por descripción"""
+        response = client.get("/lists/1/items/", params={"completed": True})
+        assert [item["description"] for item in response.json()] == ["Smartphone Android"]
+        response = client.get("/lists/1/items/", params={"prefix": "PORTÁTIL"})
+        assert [item["id"] for item in response.json()] == [1]
+        response = client.get("/lists/1/items/", params={"contains": "android"})
+        assert [item["id"] for item in response.json()] == [2]
+
+    def test_get_items_fields(self):
+        """Test devolver solo los campos pedidos"""
+        response = client.get("/lists/1/items/", params={"fields": "id,completed"})
+        assert response.status_code == 200
+        assert response.json()[0] == {"id": 1, "completed": False}
+        assert client.get("/lists/1/items/", params={"fields": "secreto"}).status_code == 400
+
+    def test_get_lists_paginated(self):
+        """Test paginar listas y cursor inválido"""
+        response = client.get("/lists/", params={"limit": 1, "fields": "name"})
+        assert response.json() == [{"name": "Trabajo"}]
+        cursor = response.headers["X-Next-Cursor"]
+        response = client.get("/lists/", params={"limit": 1, "cursor": cursor})
+        assert response.json()[0]["name"] == "Casa"
+        assert client.get("/lists/", params={"cursor": "???"}).status_code == 400
+
+    @pytest.mark.parametrize("use_orjson", [True, False])
+    def test_fast_json_matches_model_serialization(self, monkeypatch, use_orjson):
+        """Test que la serialización rápida devuelva lo mismo que la validada con el modelo"""
+        from app import pagination
+        from app.cache import response_cache
+        client.post("/lists/1/items/", json={"description": "Café con leche ☕"})
+        paths = ["/lists/1/items/", "/lists/1/items/?limit=2", "/lists/", "/search/?q=cafe"]
+        expected = [client.get(path) for path in paths]
+        monkeypatch.setattr(pagination, "fast_json", True)
+        if not use_orjson:
+            monkeypatch.setattr(pagination, "orjson", None)
+        response_cache.clear()
+        for path, slow in zip(paths, expected):
+            fast = client.get(path)
+            assert fast.json() == slow.json()
+            assert fast.headers.get("X-Next-Cursor") == slow.headers.get("X-Next-Cursor")
+
+class TestSearch:
+    def test_search_across_lists(self):
+        """Test buscar ítems en todas las listas sin distinguir mayúsculas ni acentos"""
+        client.post("/lists/2/items/", json={"description": "Comprar leche"})
+        response = client.get("/search/", params={"q": "COMPRAR"})
+        assert response.status_code == 200
+        descriptions = [item["description"] for item in response.json()]
+        assert set(descriptions) == {"Comprar leche", "Comprar frutas y verduras"}
+        response = client.get("/search/", params={"q": "portatil"})
+        assert [item["id"] for item in response.json()] == [1]
+
+    def test_search_by_list(self):
+        """Test limitar la búsqueda a una lista"""
+        assert client.get("/search/", params={"q": "platos", "list_id": 1}).json() == []
+        assert client.get("/search/", params={"q": "platos", "list_id": 999}).status_code == 404
+
+    def test_search_requires_query(self):
+        """Test que la búsqueda sin texto sea inválida"""
+        assert client.get("/search/").status_code == 422
+
+
+class TestExportImport:
+    def test_export_ndjson(self):
+        """Test exportar listas e ítems como un registro JSON por línea"""
+        response = client.get("/export")
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-ndjson"
+        records = [json.loads(line) for line in response.text.splitlines()]
+        assert records[0] == {"type": "list", "id": 1, "name": "Trabajo"}
+        assert [record["type"] for record in records] == ["list"] * 2 + ["item"] * 4
+
+    def test_export_import_round_trip_gzip(self):
+        """Test restaurar una exportación comprimida con gzip"""
+        exported = client.get("/export", params={"gzip": True})
+        assert exported.content.startswith(b"\x1f\x8b")
+        client.post("/lists/1/items/", json={"description": "Se perderá"})
+        response = client.post("/import", params={"replace": True}, content=exported.content)
+        assert response.status_code == 200
+        assert response.json() == {"lists": 2, "items": 4}
+        descriptions = [item["description"] for item in client.get("/lists/1/items/").json()]
+        assert "Se perderá" not in descriptions
+        assert len(descriptions) == 2
+
+    def test_import_merges_new_records(self):
+        """Test importar listas e ítems nuevos sin borrar los existentes"""
+        body = "\n".join([
+            json.dumps({"type": "list", "id": 10, "name": "Importada"}),
+            "",
+            json.dumps({"type": "item", "id": 100, "list_id": 10, "description": "Tarea importada", "completed": True}),
+        ])
+        response = client.post("/import", content=body.encode())
+        assert response.json() == {"lists": 1, "items": 1}
+        assert client.get("/lists/10/items/").json() == [
+            {"id": 100, "list_id": 10, "description": "Tarea importada", "completed": True}
+        ]
+        assert len(client.get("/lists/").json()) == 3
+
+    def test_import_reports_invalid_lines(self):
+        """Test que una línea inválida devuelva 400 con su número"""
+        response = client.post("/import", content=b'{"type": "list", "id": 5, "name": "Ok"}\n{no es json')
+        assert response.status_code == 400
+        assert response.json()["detail"] == "Línea 2: JSON inválido"
+        response = client.post("/import", content=b'{"type": "item", "id": 50, "list_id": 1, "description": "x"}')
+        assert response.status_code == 400
+        assert response.json()["detail"].startswith("Línea 1: description")
+        response = client.post("/import", content=b'{"type": "list", "id": 1, "name": "Otra"}')
+        assert response.status_code == 400
+        assert response.json()["detail"] == "Líneas 1-1: Ya existe una lista con ese ID"
+
+    def test_failed_replace_keeps_the_store(self):
+        """Test que un import con replace inválido no vacíe el almacén"""
+        import gzip
+        export = lambda: [json.loads(line) for line in client.get("/export").text.splitlines()]
+        before = export()
+        valid = json.dumps({"type": "list", "id": 7, "name": "Nueva"}).encode()
+        for body in (b'{no es json\n' + valid, valid + b'\n{"type": "nada"}', gzip.compress(valid * 50)[:-20]):
+            assert client.post("/import?replace=true", content=body).status_code == 400
+            assert export() == before
+        # Falla al insertar, con el almacén ya vacío: se restaura el contenido anterior
+        duplicated = valid + b"\n" + valid
+        response = client.post("/import?replace=true", content=duplicated)
+        assert response.status_code == 400
+        assert response.json()["detail"].startswith("Líneas 1-2: Ya existe una lista")
+        assert export() == before
+
+
+class TestConditionalGet:
+    def test_items_not_modified(self):
+        """Test responder 304 si la lista no ha cambiado"""
+        response = client.get("/lists/1/items/")
+        etag = response.headers["etag"]
+        response = client.get("/lists/1/items/", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.headers["etag"] == etag
+
+    def test_items_etag_changes_after_write(self):
+        """Test que cualquier escritura en la lista cambie su ETag"""
+        etag = client.get("/lists/1/items/").headers["etag"]
+        client.post("/lists/1/items/", json={"description": "Nueva tarea"})
+        response = client.get("/lists/1/items/", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["etag"] != etag
+        assert any(item["description"] == "Nueva tarea" for item in response.json())
+
+    def test_etag_depends_on_query(self):
+        """Test que cada combinación de parámetros tenga su propio ETag"""
+        full = client.get("/lists/1/items/")
+        page = client.get("/lists/1/items/?limit=1")
+        assert full.headers["etag"] != page.headers["etag"]
+        assert len(page.json()) == 1
+        assert "x-next-cursor" in page.headers
+        cached = client.get("/lists/1/items/?limit=1")
+        assert cached.json() == page.json()
+        assert cached.headers["x-next-cursor"] == page.headers["x-next-cursor"]
+
+    def test_other_list_keeps_etag(self):
+        """Test que escribir en una lista no invalide las demás"""
+        etag = client.get("/lists/2/items/").headers["etag"]
+        client.post("/lists/1/items/", json={"description": "Otra tarea"})
+        response = client.get("/lists/2/items/", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+
+    def test_lists_etag_changes_after_create(self):
+        """Test que crear una lista cambie el ETag de GET /lists"""
+        etag = client.get("/lists/").headers["etag"]
+        assert client.get("/lists/", headers={"If-None-Match": etag}).status_code == 304
+        client.post("/lists/", json={"name": "Compras"})
+        response = client.get("/lists/", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.json()[-1]["name"] == "Compras"
+
+    def test_items_unknown_list(self):
+        """Test que la lectura condicional de una lista inexistente devuelva 404"""
+        assert client.get("/lists/999/items/").status_code == 404
+
+
+class TestBatchItems:
+    def test_create_items_batch(self):
+        """Test crear varios ítems en una sola petición"""
+        response = client.post("/lists/1/items/batch", json=[
+            {"description": "Lote uno"},
+            {"description": "Lote dos", "completed": True}
+        ])
+        assert response.status_code == 201
+        data = response.json()
+        assert [row["status"] for row in data] == [201, 201]
+        assert data[1]["item"]["completed"] == True
+        assert data[0]["item"]["id"] != data[1]["item"]["id"]
+
+    def test_create_items_batch_is_atomic(self):
+        """Test un lote con duplicados no crea ningún ítem"""
+        response = client.post("/lists/1/items/batch", json=[
+            {"description": "Lote nuevo"},
+            {"description": "LOTE NUEVO"},
+            {"description": "Smartphone Android"}
+        ])
+        assert response.status_code == 400
+        rows = response.json()["detail"]
+        assert [row["status"] for row in rows] == [201, 400, 400]
+        items = client.get("/lists/1/items/").json()
+        assert not any(item["description"] == "Lote nuevo" for item in items)
+
+    def test_update_items_batch(self):
+        """Test actualizar varios ítems en una sola petición"""
+        response = client.put("/lists/1/items/batch", json=[
+            {"id": 1, "description": "Portátil de 17 pulgadas"},
+            {"id": 2, "completed": False}
+        ])
+        assert response.status_code == 200
+        data = response.json()
+        assert data[0]["item"]["description"] == "Portátil de 17 pulgadas"
+        assert data[1]["item"]["completed"] == False
+
+    def test_update_items_batch_missing_item(self):
+        """Test un lote con un ítem inexistente no modifica nada"""
+        response = client.put("/lists/1/items/batch", json=[
+            {"id": 1, "completed": True},
+            {"id": 999, "completed": True}
+        ])
+        assert response.status_code == 400
+        assert [row["status"] for row in response.json()["detail"]] == [200, 404]
+
+    def test_complete_and_delete_items_batch(self):
+        """Test completar y eliminar varios ítems"""
+        response = client.patch("/lists/2/items/batch/complete", json={"ids": [3, 4]})
+        assert response.status_code == 200
+        assert all(row["item"]["completed"] for row in response.json())
+
+        response = client.request("DELETE", "/lists/2/items/batch", json={"ids": [3, 4]})
+        assert response.status_code == 200
+        assert client.get("/lists/2/items/").json() == []
+
+    def test_batch_invalid_list(self):
+        """Test lote sobre una lista inexistente"""
+        response = client.post("/lists/999/items/batch", json=[{"description": "Lote uno"}])
+        assert response.status_code == 404
+
+class TestChanges:
+    def test_changes_since_sequence(self):
+        """Test recibir solo los cambios posteriores a la última secuencia"""
+        seq = client.get("/changes/").json()["seq"]
+        item = client.post("/lists/1/items/", json={"description": "Cambio uno"}).json()
+        client.patch(f"/lists/1/items/{item['id']}/complete")
+        client.delete(f"/lists/1/items/{item['id']}")
+
+        data = client.get(f"/changes/?since={seq}").json()
+        assert [change["type"] for change in data["changes"]] == ["item_created", "item_updated", "item_deleted"]
+        assert data["changes"][1]["item"]["completed"] == True
+        assert data["seq"] == seq + 3
+        assert client.get(f"/changes/?since={data['seq']}").json()["changes"] == []
+
+        data = client.get(f"/changes/?since={seq}&limit=1").json()
+        assert data["seq"] == seq + 1
+
+    def test_changes_filtered_by_list(self):
+        """Test filtrar los cambios de una lista"""
+        seq = client.get("/changes/").json()["seq"]
+        client.post("/lists/1/items/", json={"description": "Cambio lista uno"})
+        client.post("/lists/2/items/", json={"description": "Cambio lista dos"})
+
+        data = client.get(f"/changes/?since={seq}&list_id=2").json()
+        assert [change["item"]["description"] for change in data["changes"]] == ["Cambio lista dos"]
+        assert data["seq"] == seq + 2
+
+    def test_expired_sequence(self, monkeypatch):
+        """Test una secuencia cuyos cambios ya se descartaron"""
+        from app.changes import ChangeFeed
+        from app.routes import changes
+        small = ChangeFeed(2)
+        monkeypatch.setattr(changes, "feed", small)
+        for n in range(3):
+            small.publish("item_created", 1)
+        assert client.get("/changes/?since=0").status_code == 410
+        assert client.get("/changes/stream?since=0").status_code == 410
+        assert [change["seq"] for change in client.get("/changes/?since=1").json()["changes"]] == [2, 3]
+
+    def test_sequence_ahead_of_server(self, monkeypatch):
+        """Test una secuencia posterior a la actual (el servidor se reinició)"""
+        import asyncio
+        from app.changes import ChangeFeed
+        from app.routes import changes
+        restarted = ChangeFeed(10)
+        monkeypatch.setattr(changes, "feed", restarted)
+        assert client.get("/changes/?since=500").status_code == 410
+        restarted.publish("item_created", 1)
+        response = client.get("/changes/?since=500&wait=5")
+        assert response.status_code == 410
+        assert "reinició" in response.json()["detail"]
+        last_event_id = f"{restarted.epoch}:500"
+        assert client.get("/changes/stream", headers={"Last-Event-ID": last_event_id}).status_code == 410
+        # La espera no bloquea con una secuencia adelantada
+        assert asyncio.run(restarted.wait(500, 5)) is True
+
+    def test_sequence_from_another_process(self, monkeypatch):
+        """Test una secuencia de otro proceso del servidor (reiniciado u otro worker)"""
+        from app.changes import ChangeFeed
+        from app.routes import changes
+        old = client.get("/changes/").json()
+        restarted = ChangeFeed(10)
+        monkeypatch.setattr(changes, "feed", restarted)
+        # El nuevo proceso ya llegó a la misma secuencia: sin epoch no se puede detectar
+        for n in range(old["seq"] + 2):
+            restarted.publish("item_created", 1)
+        response = client.get(f"/changes/?since={old['seq']}&epoch={old['epoch']}")
+        assert response.status_code == 410
+        assert "otro proceso" in response.json()["detail"]
+        assert client.get(f"/changes/stream?since={old['seq']}&epoch={old['epoch']}").status_code == 410
+        last_event_id = f"{old['epoch']}:{old['seq']}"
+        assert client.get("/changes/stream", headers={"Last-Event-ID": last_event_id}).status_code == 410
+        assert client.get("/changes/stream", headers={"Last-Event-ID": str(old["seq"])}).status_code == 410
+        data = client.get(f"/changes/?since={old['seq']}&epoch={restarted.epoch}").json()
+        assert data["epoch"] == restarted.epoch
+        assert data["seq"] == old["seq"] + 2
+
+    def test_long_polling_waits_for_change(self):
+        """Test esperar a un cambio con long polling"""
+        import threading
+        seq = client.get("/changes/").json()["seq"]
+        timer = threading.Timer(0.2, lambda: client.post("/lists/1/items/", json={"description": "Cambio esperado"}))
+        timer.start()
+        data = client.get(f"/changes/?since={seq}&wait=5").json()
+        timer.join()
+        assert [change["type"] for change in data["changes"]] == ["item_created"]
+
+    def test_stream_sends_events(self, monkeypatch):
+        """Test enviar los cambios como eventos SSE y reanudar con Last-Event-ID"""
+        import asyncio
+        from app.routes import changes
+        from app.routes.changes import stream_changes
+        monkeypatch.setattr(changes, "HEARTBEAT_SECONDS", 0.01)
+
+        class Request:
+            # Se desconecta después de la primera vuelta
+            checks = 0
+
+            async def is_disconnected(self):
+                self.checks += 1
+                return self.checks > 1
+
+        async def read(**kwargs):
+            response = await stream_changes(Request(), **{"since": None, "list_id": None, "epoch": None,
+                                                          "last_event_id": None, **kwargs})
+            return "".join([chunk async for chunk in response.body_iterator])
+
+        cursor = client.get("/changes/").json()
+        seq, epoch = cursor["seq"], cursor["epoch"]
+        client.post("/lists/1/items/", json={"description": "Cambio en vivo"})
+        body = asyncio.run(read(since=seq, epoch=epoch))
+        assert body.startswith(f"id: {epoch}:{seq + 1}\nevent: item_created\ndata: ")
+        assert json.loads(body.split("data: ")[1])["item"]["description"] == "Cambio en vivo"
+        # Sin cambios nuevos desde el último recibido: solo el latido
+        assert asyncio.run(read(last_event_id=f"{epoch}:{seq + 1}")) == ": ping\n\n"
+
+
+class TestByName:
+    def test_snapshot(self):
+        """Test obtener todas las listas con contadores y pendientes en una petición"""
+        response = client.get("/lists/snapshot?include_open_items=true")
+        assert response.status_code == 200
+        data = response.json()
+        assert [(lst["name"], lst["item_count"], lst["completed_count"]) for lst in data[:2]] == [
+            ("Trabajo", 2, 1), ("Casa", 2, 1)]
+        assert [item["id"] for item in data[0]["open_items"]] == [1]
+        assert client.get("/lists/snapshot").json()[0]["open_items"] is None
+        etag = response.headers["etag"]
+        client.patch("/lists/1/items/1/complete")
+        response = client.get("/lists/snapshot?include_open_items=true", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.json()[0]["open_items"] == []
+
+    def test_items_by_list_name(self):
+        """Test leer y añadir ítems resolviendo la lista por su nombre"""
+        response = client.get("/by-name/items/?list_name=TRABAJO&completed=false")
+        assert [item["id"] for item in response.json()] == [1]
+        assert client.get("/by-name/items/?list_name=Compras").status_code == 404
+        body = {"list_name": "Compras", "items": [{"description": "Comprar limón"}, {"description": "Pan"}]}
+        assert client.post("/by-name/items/", json=body).status_code == 404
+        response = client.post("/by-name/items/", json={**body, "create_list": True})
+        assert response.status_code == 201
+        assert [result["item"]["list_id"] for result in response.json()] == [3, 3]
+        assert client.post("/by-name/items/", json={"list_name": "compras", "items": [{"description": "Hi"}]}).status_code == 422
+
+    def test_complete_and_delete_by_name(self):
+        """Test completar y eliminar un ítem por su descripción, sin mayúsculas ni acentos"""
+        client.post("/lists/", json={"name": "Compras"})
+        client.post("/lists/3/items/", json={"description": "Comprar limón"})
+        response = client.patch("/by-name/items/complete", json={"list_name": "cómpras", "description": "COMPRAR LIMON!"})
+        assert response.status_code == 200
+        assert response.json()["completed"] == True
+        response = client.patch("/by-name/items/complete", json={"list_name": "Compras", "description": "limón"})
+        assert response.status_code == 404
+        assert "parecidos: Comprar limón" in response.json()["detail"]
+        response = client.request("DELETE", "/by-name/items/", json={"list_name": "compras", "description": "comprar limón"})
+        assert response.json()["description"] == "Comprar limón"
+        assert client.get("/lists/3/items/").json() == []
+
+    def test_ambiguous_names(self):
+        """Test un nombre que sin acentos coincide con varias listas"""
+        client.post("/lists/", json={"name": "Té"})
+        client.post("/lists/", json={"name": "Te"})
+        assert client.get("/by-name/items/?list_name=té").status_code == 200
+        response = client.get("/by-name/items/?list_name=tê")
+        assert response.status_code == 400
+        assert "Varias listas" in response.json()["detail"]
+
 # Fixtures para limpiar datos entre tests si es necesario
 @pytest.fixture(autouse=True)
 def reset_db():
-    """Reset the fake database before each test"""
-    from app.routes.items import fake_items_db
+    """Reset the store before each test"""
+    from app.database import store
     # Guardar estado inicial y restaurar después del test
-    original_items = fake_items_db.copy()
+    original_lists, original_items = store.export()
     yield
-    fake_items_db.clear()
-    fake_items_db.extend(original_items)
\ No newline at end of file
+    store.reset(original_lists, original_items)
\ No newline at end of file
@@ -1,102 +1,314 @@
+import asyncio
+import json
+
+import httpx
 import pytest
-import requests_mock
-from app.mcp_server import safe_request as make_api_request
-from app.mcp_server import get_lists, get_items, create_item, create_list
+from app import mcp_server
+from app.mcp_server import async_safe_request
+from app.mcp_server import get_lists, get_items, create_item, create_list, create_items, delete_items, search_items
+
+
+def make_api_request(method, url, data=None):
+    return asyncio.run(async_safe_request(method, url, data))
 
 
 class TestMCPServerHelpers:
     """Tests para las funciones auxiliares del servidor MCP"""
 
-    def test_make_api_request_get_success(self):
-        with requests_mock.Mocker() as m:
-            m.get('http://localhost:8000/test', json={'status': 'ok'})
-            result = make_api_request('GET', 'http://localhost:8000/test')
-            assert result == {'status': 'ok'}
+    def test_make_api_request_get_success(self, api):
+        api.add('GET', 'http://localhost:8000/test', json={'status': 'ok'})
+        result = make_api_request('GET', 'http://localhost:8000/test')
+        assert result == {'status': 'ok'}
+
+    def test_make_api_request_post_success(self, api):
+        api.add('POST', 'http://localhost:8000/test', json={'id': 1}, status_code=201)
+        result = make_api_request('POST', 'http://localhost:8000/test', {'data': 'test'})
+        assert result == {'id': 1}
+
+    def test_make_api_request_delete_success(self, api):
+        api.add('DELETE', 'http://localhost:8000/test', status_code=204)
+        result = make_api_request('DELETE', 'http://localhost:8000/test')
+        assert result == {"message": "Operación exitosa", "status": "success"}
+
+    def test_make_api_request_http_error(self, api):
+        api.add('GET', 'http://localhost:8000/test', status_code=404, json={"detail": "No encontrado"})
+        result = make_api_request('GET', 'http://localhost:8000/test')
+        assert "error" in result
+        assert "Error 404" in result["error"]
+
+    def test_make_api_request_unsupported_method(self):
+        result = make_api_request('HEAD', 'http://localhost:8000/test')
+        assert "Método no soportado" in result["error"]
+
+
+class MockApi:
+    """API simulada para el cliente asíncrono (httpx) de las herramientas MCP"""
+
+    def __init__(self):
+        self.responses = {}
+        self.last_request = None
+
+    def add(self, method, url, json=None, status_code=200):
+        self.responses[(method, url)] = (status_code, json)
 
-    def test_make_api_request_post_success(self):
-        with requests_mock.Mocker() as m:
-            m.post('http://localhost:8000/test', json={'id': 1}, status_code=201)
-            result = make_api_request('POST', 'http://localhost:8000/test', {'data': 'test'})
-            assert result == {'id': 1}
+    def handler(self, request):
+        self.last_request = request
+        status_code, body = self.responses.get((request.method, str(request.url)), (404, {"detail": "Not Found"}))
+        return httpx.Response(status_code, json=body)
 
-    def test_make_api_request_delete_success(self):
-        with requests_mock.Mocker() as m:
-            m.delete('http://localhost:8000/test', status_code=204)
-            result = make_api_request('DELETE', 'http://localhost:8000/test')
-            assert result == {"message": "Operación exitosa", "status": "success"}
 
-    def test_make_api_request_http_error(self):
-        with requests_mock.Mocker() as m:
-            m.get('http://localhost:8000/test', status_code=404, json={"detail": "No encontrado"})
-            result = make_api_request('GET', 'http://localhost:8000/test')
-            assert "error" in result
-            assert "Error 404" in result["error"]
+@pytest.fixture
+def api(monkeypatch):
+    mock_api = MockApi()
+    client = httpx.AsyncClient(transport=httpx.MockTransport(mock_api.handler))
+    monkeypatch.setattr(mcp_server, "async_client", client)
+    monkeypatch.setattr(mcp_server, "transport", mcp_server.HttpTransport("http://localhost:8000"))
+    monkeypatch.setattr(mcp_server, "conditional_cache", {})
+    return mock_api
 
 
 class TestMCPTools:
     """Tests para las herramientas MCP (funciones registradas con @mcp.tool())"""
 
-    def test_get_lists_success(self):
-        with requests_mock.Mocker() as m:
-            m.get('http://localhost:8000/lists', json=[
-                {"id": 1, "name": "Trabajo"},
-                {"id": 2, "name": "Casa"}
-            ])
-            result = get_lists()
-            assert isinstance(result, list)
-            assert len(result) == 2
-            assert result[0]["name"] == "Trabajo"
-
-    def test_get_lists_empty(self):
-        with requests_mock.Mocker() as m:
-            m.get('http://localhost:8000/lists', json=[])
-            result = get_lists()
-            assert isinstance(result, list)
-            assert result == []
-
-    def test_create_list_success(self):
-        with requests_mock.Mocker() as m:
-            m.post('http://localhost:8000/lists', json={
-                "id": 3,
-                "name": "Nueva Lista"
-            }, status_code=201)
-            result = create_list("Nueva Lista")
-            assert isinstance(result, dict)
-            assert result["name"] == "Nueva Lista"
-            assert result["id"] == 3
-
-    def test_get_items_success(self):
-        with requests_mock.Mocker() as m:
-            m.get('http://localhost:8000/lists/1/items', json=[
-                {"id": 1, "description": "Tarea 1", "completed": False},
-                {"id": 2, "description": "Tarea 2", "completed": True}
-            ])
-            result = get_items(1)
-            assert isinstance(result, list)
-            assert len(result) == 2
-
-    def test_create_item_success(self):
-        with requests_mock.Mocker() as m:
-            m.post('http://localhost:8000/lists/1/items', json={
-                "id": 5,
-                "description": "Nueva tarea",
-                "completed": False,
-                "list_id": 1
-            }, status_code=201)
-            result = create_item(1, "Nueva tarea")
-            assert isinstance(result, dict)
-            assert result["description"] == "Nueva tarea"
-
-    def test_create_item_error(self):
-        with requests_mock.Mocker() as m:
-            m.post(
-                'http://localhost:8000/lists/1/items',
-                status_code=400,
-                json={"detail": "Ya existe un ítem con esta descripción"}
-            )
-            result = create_item(1, "Tarea duplicada")
-            assert "error" in result
-            assert "Error 400" in result["error"] 
+    def test_get_lists_success(self, api):
+        api.add('GET', 'http://localhost:8000/lists/', json=[
+            {"id": 1, "name": "Trabajo"},
+            {"id": 2, "name": "Casa"}
+        ])
+        result = asyncio.run(get_lists())
+        assert isinstance(result, list)
+        assert len(result) == 2
+        assert result[0]["name"] == "Trabajo"
+
+    def test_get_lists_empty(self, api):
+        api.add('GET', 'http://localhost:8000/lists/', json=[])
+        result = asyncio.run(get_lists())
+        assert isinstance(result, list)
+        assert result == []
+
+    def test_create_list_success(self, api):
+        api.add('POST', 'http://localhost:8000/lists/', json={
+            "id": 3,
+            "name": "Nueva Lista"
+        }, status_code=201)
+        result = asyncio.run(create_list("Nueva Lista"))
+        assert isinstance(result, dict)
+        assert result["name"] == "Nueva Lista"
+        assert result["id"] == 3
+
+    def test_get_items_success(self, api):
+        api.add('GET', 'http://localhost:8000/lists/1/items/', json=[
+            {"id": 1, "description": "Tarea 1", "completed": False},
+            {"id": 2, "description": "Tarea 2", "completed": True}
+        ])
+        result = asyncio.run(get_items(1))
+        assert isinstance(result, list)
+        assert len(result) == 2
+
+    def test_search_items_success(self, api):
+        api.add('GET', 'http://localhost:8000/search/?q=comprar+leche&limit=20', json=[
+            {"id": 7, "list_id": 3, "description": "Comprar leche", "completed": False}
+        ])
+        result = asyncio.run(search_items("comprar leche"))
+        assert result[0]["id"] == 7
+
+    def test_create_item_success(self, api):
+        api.add('POST', 'http://localhost:8000/lists/1/items/', json={
+            "id": 5,
+            "description": "Nueva tarea",
+            "completed": False,
+            "list_id": 1
+        }, status_code=201)
+        result = asyncio.run(create_item(1, "Nueva tarea"))
+        assert isinstance(result, dict)
+        assert result["description"] == "Nueva tarea"
+
+    def test_create_item_error(self, api):
+        api.add(
+            'POST',
+            'http://localhost:8000/lists/1/items/',
+            status_code=400,
+            json={"detail": "Ya existe un ítem con esta descripción"}
+        )
+        result = asyncio.run(create_item(1, "Tarea duplicada"))
+        assert "error" in result
+        assert "Error 400" in result["error"]
+
+    def test_create_items_success(self, api):
+        api.add('POST', 'http://localhost:8000/lists/1/items/batch', json=[
+            {"index": 0, "status": 201, "item": {"id": 5, "description": "Tarea 1", "completed": False, "list_id": 1}},
+            {"index": 1, "status": 201, "item": {"id": 6, "description": "Tarea 2", "completed": False, "list_id": 1}}
+        ], status_code=201)
+        result = asyncio.run(create_items(1, ["Tarea 1", "Tarea 2"]))
+        assert len(result) == 2
+        assert json.loads(api.last_request.content) == [{"description": "Tarea 1"}, {"description": "Tarea 2"}]
+
+    def test_rename_and_delete_list(self, api):
+        api.add('PATCH', 'http://localhost:8000/lists/2', json={"id": 2, "name": "Hogar"})
+        api.add('DELETE', 'http://localhost:8000/lists/2', status_code=204)
+        assert asyncio.run(mcp_server.rename_list(2, "Hogar")) == {"id": 2, "name": "Hogar"}
+        assert json.loads(api.last_request.content) == {"name": "Hogar"}
+        assert asyncio.run(mcp_server.delete_list(2))["status"] == "success"
+
+    def test_name_addressed_tools(self, api):
+        api.add('GET', 'http://localhost:8000/lists/snapshot?include_open_items=true&items_per_list=50', json=[
+            {"id": 1, "name": "Trabajo", "item_count": 1, "completed_count": 0, "open_items": []}
+        ])
+        assert asyncio.run(mcp_server.get_snapshot())[0]["name"] == "Trabajo"
+        api.add('POST', 'http://localhost:8000/by-name/items/', json=[], status_code=201)
+        asyncio.run(mcp_server.add_items_to_list_by_name("Compras", ["Pan"], create_list=True))
+        assert json.loads(api.last_request.content) == {"list_name": "Compras", "items": [{"description": "Pan"}],
+                                                        "create_list": True}
+        api.add('PATCH', 'http://localhost:8000/by-name/items/complete', json={"id": 5, "completed": True})
+        assert asyncio.run(mcp_server.complete_item_by_name("Compras", "Pan"))["completed"] == True
+        assert json.loads(api.last_request.content) == {"list_name": "Compras", "description": "Pan"}
+
+    def test_delete_items_sends_ids(self, api):
+        api.add('DELETE', 'http://localhost:8000/lists/1/items/batch', json=[], status_code=200)
+        asyncio.run(delete_items(1, [1, 2]))
+        assert json.loads(api.last_request.content) == {"ids": [1, 2]}
+
+    def test_get_changes_success(self, api):
+        api.add('GET', 'http://localhost:8000/changes/?limit=100&since=4', json={"seq": 5, "changes": [
+            {"seq": 5, "type": "item_deleted", "list_id": 1, "item": {"id": 2}}
+        ]})
+        result = asyncio.run(mcp_server.get_changes(since=4))
+        assert result["changes"][0]["type"] == "item_deleted"
+
+    def test_retries_idempotent_requests(self, api, monkeypatch):
+        monkeypatch.setattr(mcp_server, "HTTP_BACKOFF", 0)
+        calls = []
+        def flaky(request):
+            calls.append(request.method)
+            if len(calls) == 1:
+                return httpx.Response(503)
+            return httpx.Response(200, json=[])
+        monkeypatch.setattr(mcp_server, "async_client", httpx.AsyncClient(transport=httpx.MockTransport(flaky)))
+        assert asyncio.run(get_lists()) == []
+        assert calls == ["GET", "GET"]
+
+    def test_revalidates_get_with_etag(self, api, monkeypatch):
+        requests_seen = []
+
+        def conditional(request):
+            requests_seen.append(request.headers.get("if-none-match"))
+            if request.headers.get("if-none-match") == '"v1"':
+                return httpx.Response(304, headers={"ETag": '"v1"'})
+            return httpx.Response(200, json=[{"id": 1, "name": "Trabajo"}], headers={"ETag": '"v1"'})
+
+        monkeypatch.setattr(mcp_server, "async_client", httpx.AsyncClient(transport=httpx.MockTransport(conditional)))
+        first = asyncio.run(get_lists())
+        second = asyncio.run(get_lists())
+        assert first == second == [{"id": 1, "name": "Trabajo"}]
+        assert requests_seen == [None, '"v1"']
+
+    def test_retries_post_with_the_same_idempotency_key(self, api, monkeypatch):
+        monkeypatch.setattr(mcp_server, "HTTP_BACKOFF", 0)
+        keys = []
+        def flaky(request):
+            keys.append(request.headers.get("idempotency-key"))
+            if len(keys) < 3:
+                return httpx.Response(503 if len(keys) == 1 else 409)
+            return httpx.Response(201, json={"id": 3, "name": "Nueva"})
+        monkeypatch.setattr(mcp_server, "async_client", httpx.AsyncClient(transport=httpx.MockTransport(flaky)))
+        assert asyncio.run(create_list("Nueva")) == {"id": 3, "name": "Nueva"}
+        assert len(keys) == 3 and keys[0] and len(set(keys)) == 1
+        # Cada llamada a una herramienta es una escritura distinta: clave nueva
+        asyncio.run(create_list("Nueva"))
+        assert keys[3] != keys[0]
+
+    def test_gives_up_after_retries(self, api, monkeypatch):
+        monkeypatch.setattr(mcp_server, "HTTP_BACKOFF", 0)
+        calls = []
+        def failing(request):
+            calls.append(request.method)
+            return httpx.Response(503)
+        monkeypatch.setattr(mcp_server, "async_client", httpx.AsyncClient(transport=httpx.MockTransport(failing)))
+        assert "Error 503" in asyncio.run(create_list("Nueva"))["error"]
+        assert calls == ["POST"] * (mcp_server.HTTP_RETRIES + 1)
+
+class TestInProcessTransport:
+    """Tests del transporte en proceso (sin API REST)"""
+
+    @pytest.fixture(autouse=True)
+    def reset_store(self):
+        from app.database import store
+        original_lists, original_items = store.export()
+        yield
+        store.reset(original_lists, original_items)
+
+    @pytest.fixture
+    def transport(self):
+        from app.inprocess import InProcessTransport
+        return InProcessTransport()
+
+    def test_get_lists(self, transport):
+        result = asyncio.run(transport.get_lists())
+        assert [lst["name"] for lst in result[:2]] == ["Trabajo", "Casa"]
+
+    def test_create_and_complete_item(self, transport):
+        item = asyncio.run(transport.create_item(1, "Comprar leche"))
+        assert item["description"] == "Comprar leche"
+        assert asyncio.run(transport.complete_item(1, item["id"]))["completed"] == True
+        assert asyncio.run(transport.delete_item(1, item["id"])) == {"message": "Operación exitosa", "status": "success"}
+
+    def test_search_items(self, transport):
+        result = asyncio.run(transport.search_items("PORTATIL"))
+        assert [item["id"] for item in result] == [1]
+        assert asyncio.run(transport.search_items("portátil", list_id=2)) == []
+        assert asyncio.run(transport.search_items("platos", list_id=999))["error"].startswith("Error 404")
+
+    def test_errors_match_http_format(self, transport):
+        result = asyncio.run(transport.create_item(1, "Smartphone Android"))
+        assert result["error"].startswith("Error 400")
+        assert "Ya existe un ítem con esta descripción" in result["error"]
+        assert asyncio.run(transport.get_items(999))["error"].startswith("Error 404")
+        assert asyncio.run(transport.create_item(1, "Hi"))["error"].startswith("Error 422")
+
+    def test_rename_and_delete_list(self, transport):
+        assert asyncio.run(transport.rename_list(2, "Hogar")) == {"id": 2, "name": "Hogar"}
+        assert asyncio.run(transport.rename_list(2, "trabajo"))["error"].startswith("Error 400")
+        assert asyncio.run(transport.delete_list(2)) == {"message": "Operación exitosa", "status": "success"}
+        assert asyncio.run(transport.get_items(2))["error"].startswith("Error 404")
+        assert asyncio.run(transport.delete_list(2))["error"].startswith("Error 404")
+
+    def test_name_addressed_tools(self, transport):
+        snapshot = asyncio.run(transport.get_snapshot())
+        assert [item["id"] for item in snapshot[0]["open_items"]] == [1]
+        results = asyncio.run(transport.create_items_by_name("Compras", ["Comprar limón"], create_list=True))
+        assert results[0]["item"]["list_id"] == 3
+        assert asyncio.run(transport.complete_item_by_name("compras", "comprar limon"))["completed"] == True
+        assert asyncio.run(transport.get_items_by_name("COMPRAS", completed=False)) == []
+        assert asyncio.run(transport.delete_item_by_name("Compras", "Comprar limón"))["id"] == results[0]["item"]["id"]
+        assert asyncio.run(transport.delete_item_by_name("Compras", "Pan"))["error"].startswith("Error 404")
+
+    def test_get_changes(self, transport):
+        cursor = asyncio.run(transport.get_changes())
+        seq = cursor["seq"]
+        asyncio.run(transport.create_item(2, "Comprar pan"))
+        result = asyncio.run(transport.get_changes(since=seq, epoch=cursor["epoch"]))
+        assert result["seq"] == seq + 1
+        assert result["epoch"] == cursor["epoch"]
+        assert result["changes"][0]["item"]["description"] == "Comprar pan"
+        assert asyncio.run(transport.get_changes(since=seq, list_id=1))["changes"] == []
+        assert asyncio.run(transport.get_changes(since=seq, epoch="otra"))["error"].startswith("Error 410")
+
+    def test_create_transport_by_name(self):
+        from app.mcp_server import DeferredTransport, HttpTransport, create_transport
+        assert isinstance(create_transport("http"), HttpTransport)
+        # El transporte en proceso se crea en segundo plano y se espera en la primera llamada
+        transport = create_transport("inprocess")
+        assert isinstance(transport, DeferredTransport)
+        assert asyncio.run(transport.get_lists())[0]["name"] == "Trabajo"
+
+    def test_deferred_transport_reports_creation_errors(self):
+        from app.mcp_server import DeferredTransport
+
+        def failing():
+            raise RuntimeError("almacén no disponible")
+
+        with pytest.raises(RuntimeError, match="almacén no disponible"):
+            asyncio.run(DeferredTransport(failing).get_lists())
 
 # Configuración opcional para pytest
 def pytest_configure(config):
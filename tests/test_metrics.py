@@ -0,0 +1,112 @@
+import asyncio
+import threading
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from app import mcp_server, metrics
+from app.main import app
+
+client = TestClient(app)
+
+
+@pytest.fixture(autouse=True)
+def clean_metrics():
+    metrics.reset()
+    yield
+    metrics.reset()
+
+
+def sample(text, line_prefix):
+    """Valor de la primera línea de /metrics que empieza por ``line_prefix``"""
+    for line in text.splitlines():
+        if line.startswith(line_prefix):
+            return float(line.rsplit(" ", 1)[1])
+    return None
+
+
+class TestMetricTypes:
+    def test_counter_sums_all_threads(self):
+        counter = metrics.HTTP_REQUESTS
+
+        def work():
+            for _ in range(1000):
+                counter.inc("GET", "/test", "200")
+
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        text = metrics.render()
+        assert sample(text, 'todolist_http_requests_total{method="GET",route="/test",status="200"}') == 4000
+
+    def test_finished_threads_do_not_keep_shards(self):
+        def work():
+            metrics.HTTP_REQUESTS.inc("GET", "/corto", "200")
+            metrics.HTTP_REQUEST_SECONDS.observe(0.001, "GET", "/corto")
+
+        for _ in range(500):
+            thread = threading.Thread(target=work)
+            thread.start()
+            thread.join()
+        # Solo quedan las copias de los hilos vivos (el principal y los del cliente de pruebas)
+        assert len(metrics._shards) <= threading.active_count()
+        text = metrics.render()
+        assert sample(text, 'todolist_http_requests_total{method="GET",route="/corto",status="200"}') == 500
+        assert sample(text, 'todolist_http_request_duration_seconds_count{method="GET",route="/corto"}') == 500
+
+    def test_histogram_buckets_are_cumulative(self):
+        histogram = metrics.STORE_OPERATION_SECONDS
+        for value in (0.00005, 0.003, 20):
+            histogram.observe(value, "test")
+        text = metrics.render()
+        prefix = 'todolist_store_operation_duration_seconds_bucket{operation="test",'
+        assert sample(text, prefix + 'le="0.0001"}') == 1
+        assert sample(text, prefix + 'le="0.005"}') == 2
+        assert sample(text, prefix + 'le="10.0"}') == 2
+        assert sample(text, prefix + 'le="+Inf"}') == 3
+        assert sample(text, 'todolist_store_operation_duration_seconds_count{operation="test"}') == 3
+
+    def test_disabled_metrics_are_not_recorded(self, monkeypatch):
+        monkeypatch.setattr(metrics, "enabled", False)
+        metrics.HTTP_REQUESTS.inc("GET", "/test", "200")
+        assert "/test" not in metrics.render()
+
+
+class TestMetricsEndpoint:
+    def test_requests_by_route_template_and_status(self):
+        client.get("/lists/1/items/")
+        client.get("/lists/999/items/")
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        text = response.text
+        route = 'method="GET",route="/lists/{list_id}/items/"'
+        assert sample(text, f'todolist_http_requests_total{{{route},status="200"}}') == 1
+        assert sample(text, f'todolist_http_requests_total{{{route},status="404"}}') == 1
+        assert sample(text, f'todolist_http_request_duration_seconds_count{{{route}}}') == 2
+
+    def test_store_operations_are_timed(self):
+        client.post("/lists/1/items/", json={"description": "Medir esto"})
+        client.get("/lists/1/items/", params={"limit": 1})
+        text = client.get("/metrics").text
+        for operation in ("lookup", "duplicate_check", "write", "read", "serialize"):
+            assert sample(text, f'todolist_store_operation_duration_seconds_count{{operation="{operation}"}}') >= 1
+
+
+class TestMCPMetrics:
+    def test_tool_latency_and_upstream_errors(self, monkeypatch):
+        monkeypatch.setattr(mcp_server, "HTTP_BACKOFF", 0)
+        monkeypatch.setattr(mcp_server, "conditional_cache", {})
+        monkeypatch.setattr(mcp_server, "transport", mcp_server.HttpTransport("http://localhost:8000"))
+        monkeypatch.setattr(mcp_server, "async_client", httpx.AsyncClient(
+            transport=httpx.MockTransport(lambda request: httpx.Response(503))))
+        result = asyncio.run(mcp_server.get_lists())
+        assert result["error"].startswith("Error 503")
+        text = metrics.render()
+        assert sample(text, 'todolist_mcp_tool_duration_seconds_count{tool="get_lists"}') == 1
+        assert sample(text, 'todolist_mcp_upstream_request_duration_seconds_count{method="GET"}') == mcp_server.HTTP_RETRIES + 1
+        assert sample(text, 'todolist_mcp_upstream_errors_total{method="GET",kind="retry"}') == mcp_server.HTTP_RETRIES
+        assert sample(text, 'todolist_mcp_upstream_errors_total{method="GET",kind="status"}') == 1
@@ -0,0 +1,56 @@
+import os
+import sys
+
+import pytest
+
+import run
+from app import config
+
+
+class TestApiCommand:
+    def test_production_command_has_no_reload(self, monkeypatch):
+        monkeypatch.setattr(config, "STORE_BACKEND", "sqlite")
+        command = run.api_command("0.0.0.0", 9000, 4, reload=False)
+        assert command[:3] == [sys.executable, "-m", "uvicorn"]
+        assert "--reload" not in command
+        assert command[command.index("--workers") + 1] == "4"
+        assert command[command.index("--host") + 1] == "0.0.0.0"
+        assert command[command.index("--port") + 1] == "9000"
+
+    def test_reload_only_with_one_worker(self, monkeypatch):
+        monkeypatch.setattr(config, "STORE_BACKEND", "sqlite")
+        assert "--reload" in run.api_command("127.0.0.1", 8000, 1, reload=True)
+        with pytest.raises(SystemExit, match="un worker"):
+            run.api_command("127.0.0.1", 8000, 2, reload=True)
+
+    @pytest.mark.parametrize("backend", ["memory", "columnar"])
+    def test_several_workers_need_shared_backend(self, monkeypatch, backend):
+        monkeypatch.setattr(config, "STORE_BACKEND", backend)
+        assert run.api_command("127.0.0.1", 8000, 1, reload=False)
+        with pytest.raises(SystemExit, match="compartido"):
+            run.api_command("127.0.0.1", 8000, 2, reload=False)
+
+
+class TestInstallRequirements:
+    def test_installs_only_when_requirements_change(self, monkeypatch, tmp_path):
+        requirements = tmp_path / "requirements.txt"
+        requirements.write_text("fastapi\n")
+        monkeypatch.setattr(run, "REQUIREMENTS_STAMP", str(tmp_path / "stamp"))
+        commands = []
+        monkeypatch.setattr(run, "run_command", commands.append)
+
+        run.install_requirements(str(requirements))
+        run.install_requirements(str(requirements))
+        assert len(commands) == 2
+
+        requirements.write_text("fastapi\nhttpx\n")
+        run.install_requirements(str(requirements))
+        assert len(commands) == 4
+
+        # Otro entorno de Python con el mismo requirements.txt también instala
+        monkeypatch.setattr(run.sys, "prefix", str(tmp_path / "otro-entorno"))
+        run.install_requirements(str(requirements))
+        assert len(commands) == 6
+
+    def test_stamp_lives_in_the_project(self):
+        assert os.path.dirname(run.REQUIREMENTS_STAMP) == os.path.dirname(os.path.abspath(run.__file__))
@@ -0,0 +1,304 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.columnar_store import ColumnarStore
+from app.sqlite_store import SQLiteStore
+from app.store import IdAllocator, InMemoryStore
+
+LISTS = [{"id": 1, "name": "Trabajo"}, {"id": 2, "name": "Casa"}]
+ITEMS = [
+    {"id": 1, "list_id": 1, "description": "Portátil", "completed": False},
+    {"id": 2, "list_id": 2, "description": "Lavar platos", "completed": False},
+]
+
+
+def open_redis_store(url):
+    import redis
+    from app.redis_store import RedisStore
+    redis.Redis.from_url(url).flushall()
+    return RedisStore(url, seed_lists=LISTS, seed_items=ITEMS)
+
+
+@pytest.fixture(params=["memory", "columnar", "sqlite", "redis"])
+def store(request, tmp_path):
+    """Ejecuta cada test contra los cuatro backends de almacenamiento"""
+    if request.param == "memory":
+        yield InMemoryStore(LISTS, ITEMS)
+    elif request.param == "columnar":
+        yield ColumnarStore(LISTS, ITEMS)
+    elif request.param == "redis":
+        redis_store = open_redis_store(request.getfixturevalue("redis_url"))
+        yield redis_store
+        redis_store.close()
+    else:
+        sqlite_store = SQLiteStore(str(tmp_path / "todolist.db"), LISTS, ITEMS)
+        yield sqlite_store
+        sqlite_store.close()
+
+
+class TestInMemoryStore:
+    def test_get_items_by_list(self, store):
+        assert [item["id"] for item in store.get_items(1)] == [1]
+        assert store.get_items(999) == []
+
+    def test_get_item_checks_list(self, store):
+        assert store.get_item(1, 1)["description"] == "Portátil"
+        assert store.get_item(2, 1) is None
+
+    def test_find_by_description_ignores_case(self, store):
+        assert store.find_by_description(1, "  PORTÁTIL ")["id"] == 1
+        assert store.find_by_description(2, "Portátil") is None
+
+    def test_update_item_reindexes_description(self, store):
+        store.update_item(1, 1, {"description": "Monitor"})
+        assert store.find_by_description(1, "Portátil") is None
+        assert store.find_by_description(1, "monitor")["id"] == 1
+
+    def test_delete_item_removes_indexes(self, store):
+        assert store.delete_item(1, 1)["id"] == 1
+        assert store.get_items(1) == []
+        assert store.find_by_description(1, "Portátil") is None
+        assert store.delete_item(1, 1) is None
+
+    def test_export_and_reset(self, store):
+        lists, items = store.export()
+        store.delete_item(2, 2)
+        store.reset(lists, items)
+        assert store.get_item(2, 2) is not None
+
+    def test_item_ids_are_not_reused(self, store):
+        new_id = store.next_item_id()
+        assert new_id == 3
+        store.delete_item(2, 2)
+        assert store.next_item_id() == 4
+
+    def test_page_items_after_cursor(self, store):
+        store.add_items([
+            {"id": store.next_item_id(), "list_id": 1, "description": f"Tarea {n}", "completed": n % 2 == 0}
+            for n in range(5)
+        ])
+        page = store.page_items(1, after_id=3, limit=2)
+        assert [item["id"] for item in page] == [4, 5]
+        completed = store.page_items(1, completed=True, prefix="tarea")
+        assert [item["description"] for item in completed] == ["Tarea 0", "Tarea 2", "Tarea 4"]
+        assert store.page_items(1, contains="TÁTIL")[0]["id"] == 1
+
+    def test_versions_change_on_writes(self, store):
+        lists_version = store.lists_version()
+        version = store.list_version(1)
+        other_version = store.list_version(2)
+        store.update_item(1, 1, {"completed": True})
+        assert store.list_version(1) > version
+        assert store.list_version(2) == other_version
+        assert store.lists_version() == lists_version
+        store.add_list({"id": store.next_list_id(), "name": "Compras"})
+        assert store.lists_version() > lists_version
+        assert store.list_version(999) is None
+
+    def test_list_counts_follow_writes(self, store):
+        assert store.list_counts(1) == (1, 0)
+        store.add_items([{"id": store.next_item_id(), "list_id": 1, "description": f"Tarea {n}", "completed": n == 0}
+                         for n in range(3)])
+        store.update_item(1, 1, {"completed": True})
+        store.update_item(1, 1, {"completed": True})
+        store.update_items(1, [(3, {"completed": False}), (4, {"description": "Tarea uno"})])
+        assert store.list_counts(1) == (4, 1)
+        store.delete_item(1, 1)
+        assert store.list_counts(1) == (3, 0)
+        assert store.list_counts(999) is None
+
+        data_version = store.data_version()
+        store.add_list({"id": store.next_list_id(), "name": "Compras"})
+        assert store.data_version() > data_version
+        assert store.page_lists(counts=True) == [
+            {"id": 1, "name": "Trabajo", "item_count": 3, "completed_count": 0},
+            {"id": 2, "name": "Casa", "item_count": 1, "completed_count": 0},
+            {"id": 3, "name": "Compras", "item_count": 0, "completed_count": 0},
+        ]
+        assert store.page_lists() == [{"id": 1, "name": "Trabajo"}, {"id": 2, "name": "Casa"}, {"id": 3, "name": "Compras"}]
+
+    def test_rename_list_updates_name_index(self, store):
+        lists_version = store.lists_version()
+        assert store.rename_list(2, "Hogar") == {"id": 2, "name": "Hogar"}
+        assert store.find_list_by_name("HOGAR") == {"id": 2, "name": "Hogar"}
+        assert store.find_list_by_name("Casa") is None
+        assert store.lists_version() > lists_version
+        assert store.rename_list(2, "hogar")["name"] == "hogar"
+        with pytest.raises(ValueError, match="nombre"):
+            store.rename_list(2, "TRABAJO")
+        assert store.rename_list(999, "Otra") is None
+        store.add_list({"id": store.next_list_id(), "name": "Casa"})
+        assert store.find_list_by_name("casa")["id"] == 3
+
+    def test_delete_list_removes_its_items(self, store):
+        store.add_items([{"id": store.next_item_id(), "list_id": 1, "description": f"Leche {n}", "completed": n == 0}
+                         for n in range(3)])
+        lists_version = store.lists_version()
+        assert store.delete_list(1) == {"id": 1, "name": "Trabajo", "item_count": 4, "completed_count": 1}
+        assert store.get_list(1) is None and not store.list_exists(1)
+        assert store.list_version(1) is None and store.list_counts(1) is None
+        assert store.lists_version() > lists_version
+        assert store.get_items(1) == [] and store.get_item(1, 1) is None
+        assert store.find_by_description(1, "Portátil") is None
+        assert store.search_items("leche") == [] and store.search_items("portatil") == []
+        assert store.page_lists(counts=True) == [{"id": 2, "name": "Casa", "item_count": 1, "completed_count": 0}]
+        assert store.delete_list(1) is None
+        # El nombre queda libre y los IDs no se reutilizan
+        store.add_list({"id": store.next_list_id(), "name": "trabajo"})
+        assert store.get_list(3)["name"] == "trabajo"
+        store.add_item({"id": store.next_item_id(), "list_id": 3, "description": "Portátil", "completed": False})
+        assert [item["id"] for item in store.get_items(3)] == [6]
+        assert [item["id"] for item in store.search_items("portatil")] == [6]
+
+    def test_search_items_ignores_case_and_accents(self, store):
+        store.add_item({"id": store.next_item_id(), "list_id": 2, "description": "Limón y leche", "completed": False})
+        assert [item["id"] for item in store.search_items("PORTATIL")] == [1]
+        assert [item["id"] for item in store.search_items("limon lec")] == [3]
+        assert store.search_items("leche", list_id=1) == []
+        assert store.search_items("¿?") == []
+
+    def test_search_prefix_beyond_latin1(self, store):
+        store.add_items([
+            {"id": store.next_item_id(), "list_id": 2, "description": description, "completed": False}
+            for description in ("Comprar żółw", "東京タワー")
+        ])
+        assert [item["id"] for item in store.search_items("zo")] == [3]
+        assert [item["id"] for item in store.search_items("東京")] == [4]
+
+    def test_search_index_follows_writes(self, store):
+        store.update_item(1, 1, {"description": "Monitor"})
+        assert store.search_items("portátil") == []
+        assert [item["id"] for item in store.search_items("monitor")] == [1]
+        store.delete_item(1, 1)
+        assert store.search_items("monitor") == []
+
+    def test_search_ranks_by_relevance(self, store):
+        store.add_items([
+            {"id": store.next_item_id(), "list_id": 1, "description": description, "completed": False}
+            for description in ["Leche", "Comprar leche, pan, huevos y fruta para toda la semana"]
+        ])
+        assert [item["description"] for item in store.search_items("leche")][0] == "Leche"
+        assert len(store.search_items("leche", limit=1)) == 1
+
+    def test_batch_inserts_are_all_or_nothing(self, store):
+        with pytest.raises(ValueError, match="ese ID"):
+            store.add_lists([{"id": 3, "name": "Compras"}, {"id": 1, "name": "Otra"}])
+        with pytest.raises(ValueError, match="La lista del ítem no existe"):
+            store.add_items([
+                {"id": 3, "list_id": 1, "description": "Monitor", "completed": False},
+                {"id": 4, "list_id": 999, "description": "Teclado", "completed": False},
+            ])
+        assert store.get_list(3) is None
+        assert [item["id"] for item in store.get_items(1)] == [1]
+
+
+class TestIdAllocator:
+    def test_observe_skips_used_ids(self):
+        allocator = IdAllocator()
+        allocator.observe(10)
+        assert allocator.allocate() == 11
+        allocator.observe(5)
+        assert allocator.allocate() == 12
+
+    def test_allocate_is_thread_safe(self):
+        allocator = IdAllocator()
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            ids = list(pool.map(lambda _: allocator.allocate(), range(2000)))
+        assert sorted(ids) == list(range(1, 2001))
+
+
+class TestColumnarStore:
+    def test_many_writes_keep_indexes_consistent(self, monkeypatch):
+        monkeypatch.setattr("app.columnar_store._COMPACT_MIN_GARBAGE", 64)
+        store = ColumnarStore(LISTS, ITEMS)
+        store.add_items([
+            {"id": item_id, "list_id": 1 + item_id % 2, "description": f"Tarea {item_id}", "completed": item_id % 3 == 0}
+            for item_id in range(3, 500)
+        ])
+        for item_id in range(3, 500, 2):
+            store.delete_item(2, item_id)
+        for item_id in range(4, 500, 4):
+            store.update_item(1, item_id, {"description": f"Tarea cambiada {item_id}"})
+        store.add_item({"id": 1000, "list_id": 2, "description": "Tarea 3", "completed": True})
+
+        # Los huecos liberados se reutilizan y el texto obsoleto se compacta
+        assert len(store._id_column) == 499
+        assert store._garbage * 2 <= len(store._text)
+        assert store.get_item(2, 3) is None
+        assert store.get_item(2, 1000) == {"id": 1000, "list_id": 2, "description": "Tarea 3", "completed": True}
+        assert store.find_by_description(1, "TAREA CAMBIADA 8")["id"] == 8
+        assert store.find_by_description(1, "Tarea 8") is None
+        assert [item["id"] for item in store.page_items(1, completed=True, limit=3)] == [6, 12, 18]
+        lists, items = store.export()
+        assert len(items) == 2 + 248 + 1
+        assert items == sorted(items, key=lambda item: item["id"])
+
+    def test_returned_items_are_copies(self):
+        store = ColumnarStore(LISTS, ITEMS)
+        store.get_item(1, 1)["description"] = "Cambiado"
+        assert store.get_item(1, 1)["description"] == "Portátil"
+
+
+class TestSQLiteStore:
+    def test_data_survives_reopen(self, tmp_path):
+        path = str(tmp_path / "todolist.db")
+        store = SQLiteStore(path, LISTS, ITEMS)
+        store.add_item({"id": store.next_item_id(), "list_id": 1, "description": "Monitor", "completed": True})
+        store.delete_item(1, 1)
+        store.close()
+
+        reopened = SQLiteStore(path, LISTS, ITEMS)
+        assert [item["description"] for item in reopened.get_items(1)] == ["Monitor"]
+        assert reopened.next_item_id() == 4
+        reopened.close()
+
+    def test_counts_backfilled_for_existing_database(self, tmp_path):
+        path = str(tmp_path / "todolist.db")
+        store = SQLiteStore(path, LISTS, ITEMS)
+        store.update_item(1, 1, {"completed": True})
+        conn = store._connection()
+        conn.execute("DROP TABLE list_counts")
+        store.close()
+
+        reopened = SQLiteStore(path, LISTS, ITEMS)
+        assert reopened.list_counts(1) == (1, 1)
+        assert reopened.list_counts(2) == (1, 0)
+        reopened.close()
+
+    def test_unique_list_name(self, tmp_path):
+        store = SQLiteStore(str(tmp_path / "todolist.db"), LISTS, ITEMS)
+        with pytest.raises(ValueError):
+            store.add_list({"id": store.next_list_id(), "name": "TRABAJO"})
+        store.close()
+
+
+class TestRedisStore:
+    def test_seed_loaded_once(self, redis_url):
+        store = open_redis_store(redis_url)
+        store.add_item({"id": store.next_item_id(), "list_id": 1, "description": "Monitor", "completed": True})
+        # Otro worker que arranca después no vuelve a cargar los datos de ejemplo
+        from app.redis_store import RedisStore
+        other = RedisStore(redis_url, seed_lists=LISTS, seed_items=ITEMS)
+        assert [item["description"] for item in other.get_items(1)] == ["Portátil", "Monitor"]
+        assert other.next_item_id() == 4
+        store.close()
+        other.close()
+
+    def test_versions_not_repeated_after_reset(self, redis_url):
+        store = open_redis_store(redis_url)
+        version = store.list_version(1)
+        store.reset(LISTS, ITEMS)
+        assert store.list_version(1) > version
+        store.close()
+
+    def test_versions_not_repeated_after_delete(self, redis_url):
+        store = open_redis_store(redis_url)
+        store.add_item({"id": store.next_item_id(), "list_id": 2, "description": "Lámpara", "completed": False})
+        version = store.list_version(2)
+        store.delete_list(2)
+        # La lista vuelve con el mismo ID: su versión (y su ETag) no puede coincidir con la anterior
+        store.add_list({"id": 2, "name": "Casa"})
+        assert store.list_version(2) > version
+        assert store.lists_version() > version
+        store.close()
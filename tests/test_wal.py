@@ -0,0 +1,173 @@
+import os
+import pickle
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from app import wal
+from app.columnar_store import ColumnarStore
+from app.store import InMemoryStore
+from app.wal import DurableStore
+
+LISTS = [{"id": 1, "name": "Trabajo"}, {"id": 2, "name": "Casa"}]
+ITEMS = [
+    {"id": 1, "list_id": 1, "description": "Portátil", "completed": False},
+    {"id": 2, "list_id": 2, "description": "Lavar platos", "completed": False},
+]
+
+
+def open_store(directory, store_class=InMemoryStore, **kwargs):
+    return DurableStore(store_class(LISTS, ITEMS), str(directory), **kwargs)
+
+
+def write_some(store):
+    store.add_list({"id": store.next_list_id(), "name": "Compras"})
+    store.add_item({"id": store.next_item_id(), "list_id": 3, "description": "Leche", "completed": False})
+    store.add_items([{"id": store.next_item_id(), "list_id": 1, "description": f"Tarea {n}", "completed": False}
+                     for n in range(3)])
+    store.update_item(3, 3, {"completed": True})
+    store.update_items(1, [(4, {"description": "Tarea cero"})])
+    store.delete_item(1, 6)
+    store.sync()
+
+
+class TestDurableStore:
+    @pytest.mark.parametrize("store_class", [InMemoryStore, ColumnarStore])
+    @pytest.mark.parametrize("fsync", ["always", "interval", "never"])
+    def test_recovers_after_restart(self, tmp_path, store_class, fsync):
+        store = open_store(tmp_path, store_class, fsync=fsync)
+        write_some(store)
+        expected = store.export()
+
+        # Sin cerrar el primero: como si el proceso hubiera muerto
+        recovered = open_store(tmp_path, store_class, fsync=fsync)
+        assert recovered.export() == expected
+        assert recovered.find_by_description(1, "TAREA CERO")["id"] == 4
+        assert recovered.search_items("leche")[0]["id"] == 3
+        # El ID del ítem borrado no se reutiliza
+        assert recovered.next_item_id() == 7
+        recovered.close()
+
+    def test_snapshot_replaces_log(self, tmp_path):
+        store = open_store(tmp_path, snapshot_every=1_000_000)
+        write_some(store)
+        store.snapshot()
+        assert len(wal._segments(str(tmp_path))) == 1
+        store.add_item({"id": store.next_item_id(), "list_id": 2, "description": "Barrer", "completed": False})
+        store.sync()
+        store.close()
+
+        recovered = open_store(tmp_path)
+        assert [item["description"] for item in recovered.get_items(2)] == ["Lavar platos", "Barrer"]
+        recovered.close()
+
+    def test_snapshot_every_runs_in_background(self, tmp_path):
+        store = open_store(tmp_path, snapshot_every=3)
+        write_some(store)
+        deadline = time.monotonic() + 5
+        while store._snapshot_seq < 3 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert store._snapshot_seq >= 3
+        store.close()
+
+    def test_discards_partial_last_line(self, tmp_path, caplog):
+        store = open_store(tmp_path)
+        write_some(store)
+        store.close()
+        segment = wal._segments(str(tmp_path))[-1]
+        with open(segment, "ab") as file:
+            file.write(b'{"op":"delete_item","args":[1,')
+
+        recovered = open_store(tmp_path)
+        assert recovered.get_item(1, 4) is not None
+        assert "incompleta" in caplog.text
+        recovered.close()
+
+    def test_concurrent_writes_share_fsync(self, tmp_path, monkeypatch):
+        store = open_store(tmp_path)
+        calls = []
+        real_fsync = os.fsync
+        monkeypatch.setattr(wal.os, "fsync", lambda fd: (calls.append(fd), real_fsync(fd)))
+
+        def create(n):
+            for i in range(20):
+                with store.lock_list(1):
+                    store.add_item({"id": store.next_item_id(), "list_id": 1, "description": f"Hilo {n} {i}",
+                                    "completed": False})
+                store.sync()
+
+        threads = [threading.Thread(target=create, args=(n,)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(store.get_items(1)) == 161
+        assert 0 < len(calls) <= 160
+        store.close()
+
+    @pytest.mark.parametrize("store_class", [InMemoryStore, ColumnarStore])
+    def test_replays_list_rename_and_delete(self, tmp_path, store_class):
+        store = open_store(tmp_path, store_class)
+        write_some(store)
+        store.rename_list(2, "Hogar")
+        store.delete_list(3)
+        store.sync()
+
+        recovered = open_store(tmp_path, store_class)
+        assert recovered.page_lists() == [{"id": 1, "name": "Trabajo"}, {"id": 2, "name": "Hogar"}]
+        assert recovered.find_list_by_name("hogar")["id"] == 2
+        assert recovered.search_items("leche") == []
+        assert recovered.next_list_id() == 4
+        recovered.close()
+
+    def test_rebuilds_snapshot_of_previous_format(self, tmp_path):
+        store = open_store(tmp_path)
+        write_some(store)
+        store.snapshot()
+        store.close()
+        # Instantánea anterior a los contadores de completados
+        path = tmp_path / wal.SNAPSHOT_FILE
+        snapshot = pickle.loads(path.read_bytes())
+        snapshot["format"] = 1
+        del snapshot["store"]._completed_counts
+        path.write_bytes(pickle.dumps(snapshot))
+
+        recovered = open_store(tmp_path)
+        assert recovered.list_counts(3) == (1, 1)
+        assert recovered.list_counts(1) == (3, 0)
+        recovered.close()
+
+    @pytest.mark.parametrize("store_class", [InMemoryStore, ColumnarStore])
+    def test_snapshot_recovers_in_process_with_another_hash_seed(self, tmp_path, store_class):
+        """La instantánea se escribe y se carga en procesos con distinto ``PYTHONHASHSEED``."""
+        script = f"""
+import sys
+from tests.test_wal import open_store, write_some
+from {store_class.__module__} import {store_class.__name__}
+store = open_store(sys.argv[1], {store_class.__name__})
+if sys.argv[2] == "write":
+    write_some(store)
+    store.snapshot()
+else:
+    assert store.find_by_description(1, "TAREA CERO")["id"] == 4
+    assert store.find_by_description(1, "portátil")["id"] == 1
+    store.delete_item(1, 4)
+    assert store.find_by_description(1, "Tarea cero") is None
+store.close()
+"""
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        for seed, mode in (("1", "write"), ("2", "check")):
+            subprocess.run([sys.executable, "-c", script, str(tmp_path), mode], cwd=root, check=True,
+                           env={**os.environ, "PYTHONHASHSEED": seed})
+
+        recovered = open_store(tmp_path, store_class)
+        assert recovered.find_by_description(1, "tarea cero") is None
+        assert recovered.find_by_description(1, "Tarea 1")["id"] == 5
+        recovered.close()
+
+    def test_rejects_unknown_fsync_policy(self, tmp_path):
+        with pytest.raises(ValueError, match="fsync"):
+            open_store(tmp_path, fsync="a veces")